@@ -2,8 +2,10 @@ import tkinter
 import customtkinter
 import psutil
 import ctypes
-import threading
-import time
+
+from cpu_topology import PRESETS, get_topology
+from process_index import get_process_index
+from process_watcher import ProcessWatcher
 
 def is_admin():
     try:
@@ -21,7 +23,9 @@ class AffinityApp(customtkinter.CTk):
         self.grid_rowconfigure(0, weight=1)
 
         self.monitoring = False
-        self.monitor_thread = None
+        self.process_watcher = None
+        self.process_index = get_process_index()
+        self.topology = get_topology()
         self.all_processes = []
         self.process_buttons = []
         self.cpu_checkboxes = []
@@ -93,12 +97,11 @@ class AffinityApp(customtkinter.CTk):
         preset_frame.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         preset_frame.grid_columnconfigure(0, weight=1)
         
-        customtkinter.CTkButton(preset_frame, text="Performance Cores Only (Even)", command=lambda: self.apply_preset("p_cores")).pack(fill="x", pady=4, expand=True)
-        customtkinter.CTkButton(preset_frame, text="Efficiency Cores Only (Odd)", command=lambda: self.apply_preset("e_cores")).pack(fill="x", pady=4, expand=True)
-        customtkinter.CTkButton(preset_frame, text="First Core Only (CPU 0)", command=lambda: self.apply_preset("first_core")).pack(fill="x", pady=4, expand=True)
-        customtkinter.CTkButton(preset_frame, text="First Half of Cores", command=lambda: self.apply_preset("first_half")).pack(fill="x", pady=4, expand=True)
-        customtkinter.CTkButton(preset_frame, text="Last Half of Cores", command=lambda: self.apply_preset("last_half")).pack(fill="x", pady=4, expand=True)
-        customtkinter.CTkButton(preset_frame, text="Disable SMT/Hyper-Threading (Even)", command=lambda: self.apply_preset("no_smt")).pack(fill="x", pady=4, expand=True)
+        # Presets come from the detected topology; e-cores only exist on hybrid CPUs
+        for preset_name, (label, _) in PRESETS.items():
+            if preset_name == "e_cores" and not self.topology.is_hybrid:
+                continue
+            customtkinter.CTkButton(preset_frame, text=label, command=lambda name=preset_name: self.apply_preset(name)).pack(fill="x", pady=4, expand=True)
 
         self.bottom_frame = customtkinter.CTkFrame(self)
         self.bottom_frame.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="nsew")
@@ -170,12 +173,13 @@ class AffinityApp(customtkinter.CTk):
         self.all_processes.clear()
 
         try:
-            all_procs = [p for p in psutil.process_iter(['name', 'pid']) if p.info['name']]
-            self.all_processes = sorted(all_procs, key=lambda p: p.info['name'].lower())
+            self.process_index.refresh(force=True)
+            all_procs = [{'name': name, 'pid': pid} for name, pid in self.process_index.processes()]
+            self.all_processes = sorted(all_procs, key=lambda p: p['name'].lower())
         
             for process in self.all_processes:
-                proc_name = process.info['name']
-                proc_pid = process.info['pid']
+                proc_name = process['name']
+                proc_pid = process['pid']
                 button = customtkinter.CTkButton(
                     self.process_list_frame,
                     text=f"{proc_name}",
@@ -191,23 +195,15 @@ class AffinityApp(customtkinter.CTk):
     def populate_cpu_list(self):
         for i in range(psutil.cpu_count()):
             var = tkinter.IntVar(value=1)
-            cb = customtkinter.CTkCheckBox(self.cpu_list_frame, text=f"CPU {i}", variable=var)
+            topology_label = self.topology.label(i)
+            cb = customtkinter.CTkCheckBox(self.cpu_list_frame, text=f"CPU {i} ({topology_label})" if topology_label else f"CPU {i}", variable=var)
             cb.pack(anchor="w", padx=10, pady=2)
             self.cpu_checkboxes.append((var, cb))
     
     def apply_preset(self, preset_name):
-        cpu_count = len(self.cpu_checkboxes)
+        selected = set(self.topology.preset(preset_name))
         for i, (var, cb) in enumerate(self.cpu_checkboxes):
-            if preset_name == "p_cores" or preset_name == "no_smt":
-                var.set(1 if i % 2 == 0 else 0)
-            elif preset_name == "e_cores":
-                var.set(1 if i % 2 != 0 else 0)
-            elif preset_name == "first_core":
-                var.set(1 if i == 0 else 0)
-            elif preset_name == "first_half":
-                var.set(1 if i < cpu_count / 2 else 0)
-            elif preset_name == "last_half":
-                var.set(1 if i >= cpu_count / 2 else 0)
+            var.set(1 if i in selected else 0)
         self.update_status(f"Preset '{preset_name}' prepared. Click 'Apply'.", self.color_info)
 
     def get_selected_cpus(self):
@@ -232,12 +228,8 @@ class AffinityApp(customtkinter.CTk):
             self.update_status("Error: At least one CPU core must be selected.", self.color_error)
             return False
 
-        target_process = None
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'].lower() == process_name.lower():
-                    target_process = psutil.Process(proc.pid)
-                    break 
+            target_process = self.process_index.find(process_name)
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
             self.update_status(f"Error while scanning for process: {e}", self.color_error)
             return False
@@ -269,10 +261,23 @@ class AffinityApp(customtkinter.CTk):
                 self.update_status("Enter a process name before starting monitor.", self.color_error)
                 self.monitor_switch.deselect()
                 return
+            selected_cpus = self.get_selected_cpus()
+            if not selected_cpus:
+                self.update_status("Error: At least one CPU core must be selected.", self.color_error)
+                self.monitor_switch.deselect()
+                return
 
             self.monitoring = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
+            try:
+                self.process_watcher = ProcessWatcher()
+                self.process_watcher.watch(self.process_entry.get(),
+                                           lambda process: self._on_monitored_process(process, selected_cpus),
+                                           once=True)
+            except OSError as e:
+                self.update_status(f"Could not start monitor: {e}", self.color_error)
+                self.monitoring = False
+                self.monitor_switch.deselect()
+                return
             self.progress_bar.grid(row=1, column=0, padx=10, pady=(5,0), sticky="ew")
             self.progress_bar.start()
             self.apply_button.configure(state="disabled")
@@ -280,20 +285,33 @@ class AffinityApp(customtkinter.CTk):
             self.update_status(f"Monitoring for '{self.process_entry.get()}'...", self.color_info)
         else:
             self.monitoring = False
+            if self.process_watcher:
+                self.process_watcher.stop()
+                self.process_watcher = None
             self.progress_bar.stop()
             self.progress_bar.grid_forget()
             self.apply_button.configure(state="normal")
             self.process_entry.configure(state="normal")
             self.update_status("Monitoring stopped.", self.color_default)
 
-    def _monitor_loop(self):
-        while self.monitoring:
-            if self.apply_affinity():
-                self.update_status(f"Monitored process found! Affinity set. Stopping.", self.color_success)
-                self.monitor_switch.deselect()
-                self.after(0, self.toggle_monitoring)
-                break
-            time.sleep(2)
+    def _on_monitored_process(self, process, selected_cpus):
+        """Runs on the watcher thread the moment the monitored process starts"""
+        def _stop():
+            self.monitor_switch.deselect()
+            self.toggle_monitoring()
+        self.after(0, _stop)
+        try:
+            name = process.name()
+            process.cpu_affinity(selected_cpus)
+            self.update_status(f"Monitored process found! Affinity set to {process.cpu_affinity()}. Stopping.",
+                               self.color_success)
+            self.after(0, lambda: self.on_process_selected(name, process.pid))
+        except psutil.AccessDenied:
+            self.update_status(f"Access Denied for PID {process.pid}. Run as Administrator.", self.color_error)
+        except psutil.NoSuchProcess:
+            self.update_status("Error: Process terminated unexpectedly.", self.color_error)
+        except ValueError:
+            self.update_status("Error: Invalid CPU cores selected for this process.", self.color_error)
 
     def update_status(self, message, color):
         def _update():
@@ -0,0 +1,321 @@
+"""
+Affinity Watchdog - catches affinity and priority drift and puts it back
+Launchers, anti-cheat helpers or the game itself can reset a mask after it
+was applied. One thread checks every watched process: its CPU mask, its
+priority and, when threads are pinned individually, every pinned thread.
+All entries that are due are verified in one pass. A process is checked
+often right after it is watched and after a repaired drift, and less
+often while it stays clean, never less often than the bound. Drift is
+repaired on the spot and logged with what changed, how widely and when;
+drift that can't be repaired is logged once until it changes.
+"""
+
+import collections
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+from scheduling import PRIORITY_CLASSES, set_priority_class
+from thread_affinity import get_thread_name, set_thread_affinity
+
+logger = logging.getLogger(__name__)
+
+IS_WINDOWS = os.name == 'nt'
+
+# First check interval, and the interval again after a drift
+DEFAULT_MIN_INTERVAL = 0.1
+
+# Longest interval between checks: the bound on how long a drift can go unnoticed
+DEFAULT_MAX_INTERVAL = 2.0
+
+# Interval growth after each clean check
+BACKOFF = 2.0
+
+# Drift events kept for inspection
+HISTORY = 100
+
+
+def _read_cpus(tid: int) -> Optional[frozenset]:
+    """CPU mask of a task, or None if it is gone (one sched_getaffinity call on Linux)"""
+    try:
+        if IS_WINDOWS:
+            return frozenset(psutil.Process(tid).cpu_affinity())
+        return frozenset(os.sched_getaffinity(tid))
+    except (OSError, psutil.Error):
+        return None
+
+
+def _read_priority(pid: int):
+    """Nice value (priority class on Windows) of a process, or None if it is gone"""
+    try:
+        if IS_WINDOWS:
+            return psutil.Process(pid).nice()
+        return os.getpriority(os.PRIO_PROCESS, pid)
+    except (OSError, psutil.Error):
+        return None
+
+
+class DriftEvent:
+    """One detected drift and its repair"""
+
+    __slots__ = ('time', 'since', 'pid', 'name', 'parent', 'kind', 'tid', 'thread_name', 'expected',
+                 'found', 'scope', 'repaired')
+
+    def __init__(self, since, pid, name, parent, kind, expected, found, tid=None, thread_name='', scope=''):
+        self.time = time.time()
+        self.since = since          # wall time of the last check that found it correct
+        self.pid = pid
+        self.name = name
+        self.parent = parent        # name of the parent process (usually the launcher)
+        self.kind = kind            # 'affinity', 'priority' or 'thread'
+        self.tid = tid
+        self.thread_name = thread_name
+        self.expected = expected
+        self.found = found
+        self.scope = scope          # how widely the change was made, when known
+        self.repaired = False
+
+    def describe(self) -> str:
+        target = f"{self.name} (PID {self.pid}"
+        if self.tid is not None:
+            target += f", thread {self.tid} {self.thread_name}".rstrip()
+        target += ")"
+        when = (f"between {time.strftime('%H:%M:%S', time.localtime(self.since))} "
+                f"and {time.strftime('%H:%M:%S', time.localtime(self.time))}")
+        scope = f", {self.scope}" if self.scope else ""
+        outcome = "re-applied" if self.repaired else "could not re-apply"
+        return (f"{self.kind} of {target} changed to {self.found} (expected {self.expected}) {when}"
+                f"{scope}, parent {self.parent or '?'}; {outcome}")
+
+    def __repr__(self):
+        return f"DriftEvent({self.describe()})"
+
+
+class WatchedProcess:
+    """What a process should look like and when to check it next"""
+
+    def __init__(self, pid: int, cpus=None, priority: Optional[str] = None,
+                 thread_masks: Optional[Callable[[], Dict[int, list]]] = None):
+        self.pid = pid
+        self.cpus = frozenset(cpus) if cpus else None
+        self.priority = priority
+        self.nice = PRIORITY_CLASSES[priority] if priority else None
+        self.thread_masks = thread_masks   # returns {tid: cpus} of the individually pinned threads
+        try:
+            process = psutil.Process(pid)
+            self.name = process.name()
+            self.created = process.create_time()
+        except psutil.Error:
+            self.name = '?'
+            self.created = None
+        self.interval = 0.0
+        self.due = 0.0
+        self.verified = time.time()
+        self.drifts = 0
+        self.unrepaired = set()   # keys of drift that could not be repaired, already reported
+
+
+class AffinityWatchdog:
+    """
+    Verifies watched processes on an adaptive schedule and repairs drift
+    min_interval: check interval right after watch() and after a drift
+    max_interval: the interval backs off to this bound while nothing drifts
+    on_drift: called with each DriftEvent, from the watchdog thread
+    """
+
+    def __init__(self, min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                 on_drift: Optional[Callable[[DriftEvent], None]] = None):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.on_drift = on_drift
+        self.history = collections.deque(maxlen=HISTORY)
+        self.checks = 0
+        self.running = False
+        self._watched: Dict[int, WatchedProcess] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def watch(self, pid: int, cpus=None, priority: Optional[str] = None,
+              thread_masks: Optional[Callable[[], Dict[int, list]]] = None):
+        """
+        Start verifying a process; replaces an earlier watch of the same PID
+        cpus: the process mask, or None to leave it alone (per-thread pinning)
+        thread_masks: returns {tid: cpus} for threads pinned individually
+        """
+        entry = WatchedProcess(pid, cpus, priority, thread_masks)
+        entry.interval = self.min_interval
+        entry.due = time.monotonic() + entry.interval
+        with self._lock:
+            self._watched[pid] = entry
+        self._wakeup.set()
+
+    def unwatch(self, pid: int):
+        with self._lock:
+            self._watched.pop(pid, None)
+
+    def check(self) -> List[DriftEvent]:
+        """Verify every due process in one pass; returns the drift found"""
+        now = time.monotonic()
+        with self._lock:
+            due = [entry for entry in self._watched.values() if entry.due <= now]
+        events = []
+        for entry in due:
+            found = self._verify(entry)
+            if found is None:
+                # Exited
+                self.unwatch(entry.pid)
+                continue
+            self.checks += 1
+            # Drift that can't be repaired (access denied) is reported once until
+            # it changes, and doesn't hold the process at the fast interval
+            unrepaired = {self._drift_key(event) for event in found if not event.repaired}
+            reported = [event for event in found
+                        if event.repaired or self._drift_key(event) not in entry.unrepaired]
+            entry.unrepaired = unrepaired
+            entry.drifts += len(reported)
+            events.extend(reported)
+            if any(event.repaired for event in found):
+                entry.interval = self.min_interval
+            else:
+                if not found:
+                    entry.verified = time.time()
+                entry.interval = min(self.max_interval, entry.interval * BACKOFF)
+            entry.due = now + entry.interval
+        for event in events:
+            self._report(event)
+        return events
+
+    def _verify(self, entry: WatchedProcess) -> Optional[List[DriftEvent]]:
+        """Drift of one process, already repaired; None if it is gone"""
+        events = []
+        if entry.cpus is not None:
+            cpus = _read_cpus(entry.pid)
+            if cpus is None:
+                return None
+            if cpus != entry.cpus:
+                if not self._same_process(entry):
+                    return None
+                event = self._event(entry, 'affinity', entry.cpus, cpus, scope=self._affinity_scope(entry, cpus))
+                event.repaired = self._set_cpus(entry.pid, entry.cpus)
+                events.append(event)
+
+        if entry.nice is not None:
+            nice = _read_priority(entry.pid)
+            if nice is None:
+                return None
+            if nice != entry.nice:
+                if not self._same_process(entry):
+                    return None
+                event = self._event(entry, 'priority', entry.priority, nice)
+                try:
+                    set_priority_class(psutil.Process(entry.pid), entry.priority)
+                    event.repaired = True
+                except psutil.Error:
+                    pass
+                events.append(event)
+
+        if entry.thread_masks is not None and not IS_WINDOWS:
+            for tid, cpus in entry.thread_masks().items():
+                if cpus is None:
+                    # Access was denied when it was pinned
+                    continue
+                current = _read_cpus(tid)
+                if current is None or current == frozenset(cpus):
+                    continue
+                event = self._event(entry, 'thread', frozenset(cpus), current, tid=tid,
+                                    thread_name=get_thread_name(entry.pid, tid))
+                event.repaired = set_thread_affinity(tid, cpus)
+                events.append(event)
+        return events
+
+    @staticmethod
+    def _drift_key(event: DriftEvent):
+        return event.kind, event.tid, str(event.found)
+
+    def _event(self, entry, kind, expected, found, **details) -> DriftEvent:
+        if isinstance(expected, frozenset):
+            expected, found = sorted(expected), sorted(found)
+        try:
+            parent = psutil.Process(entry.pid).parent()
+            parent_name = parent.name() if parent is not None else None
+        except psutil.Error:
+            parent_name = None
+        return DriftEvent(entry.verified, entry.pid, entry.name, parent_name, kind, expected, found, **details)
+
+    @staticmethod
+    def _same_process(entry: WatchedProcess) -> bool:
+        """False when the PID was reused by another process (only asked once drift is seen)"""
+        try:
+            return entry.created is None or psutil.Process(entry.pid).create_time() == entry.created
+        except psutil.Error:
+            return False
+
+    @staticmethod
+    def _affinity_scope(entry: WatchedProcess, cpus: frozenset) -> str:
+        """
+        How widely a mask change was made, from the threads that carry it
+        The kernel does not record who set a mask; a change on every thread
+        points at a whole-process call (a launcher or helper), a change on
+        the main thread only at the process itself or a single call.
+        """
+        if IS_WINDOWS:
+            return "process mask"
+        try:
+            tids = [int(tid) for tid in os.listdir(f"/proc/{entry.pid}/task")]
+        except OSError:
+            return ""
+        changed = sum(_read_cpus(tid) == cpus for tid in tids)
+        if changed == len(tids):
+            return f"set on all {len(tids)} threads"
+        return f"set on {changed} of {len(tids)} threads"
+
+    @staticmethod
+    def _set_cpus(pid: int, cpus) -> bool:
+        try:
+            if IS_WINDOWS:
+                psutil.Process(pid).cpu_affinity(sorted(cpus))
+            else:
+                os.sched_setaffinity(pid, cpus)
+            return True
+        except (OSError, psutil.Error):
+            return False
+
+    def _report(self, event: DriftEvent):
+        self.history.append(event)
+        logger.warning("Drift: %s", event.describe())
+        if self.on_drift is not None:
+            try:
+                self.on_drift(event)
+            except Exception:
+                logger.exception("Drift listener failed")
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name='thalix-watchdog')
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        self._thread = None
+
+    def _run(self):
+        while self.running:
+            # Cleared before the pass, so a watch() during it isn't missed
+            self._wakeup.clear()
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Watchdog pass failed")
+            with self._lock:
+                next_due = min((entry.due for entry in self._watched.values()), default=None)
+            self._wakeup.wait(None if next_due is None else max(0.0, next_due - time.monotonic()))
@@ -0,0 +1,150 @@
+"""
+AOB Scan Module - array-of-bytes signature search with wildcards
+Patterns use the Cheat Engine / .ct syntax, e.g. "48 8B 05 ?? ?? ?? ?? 48 85 C0".
+"?" or "??" skips a byte and "4?" / "?8" match a single nibble.
+"""
+
+import numpy as np
+
+from scan_results import ScanResultStore
+
+# Anchors at least this long are located with the C-level substring search;
+# shorter ones are cheaper to filter with NumPy
+MIN_FIND_ANCHOR = 4
+
+
+class AobPattern:
+    """A parsed byte signature with per-byte masks"""
+
+    def __init__(self, pattern):
+        values = []
+        masks = []
+        for token in pattern.replace(',', ' ').split():
+            if token in ('?', '??', '*', '**'):
+                values.append(0)
+                masks.append(0)
+                continue
+            if len(token) != 2:
+                raise ValueError(f"Invalid AOB byte: {token!r}")
+            value = mask = 0
+            for shift, nibble in ((4, token[0]), (0, token[1])):
+                if nibble in '?*':
+                    continue
+                value |= int(nibble, 16) << shift
+                mask |= 0xF << shift
+            values.append(value)
+            masks.append(mask)
+
+        if not any(masks):
+            raise ValueError("AOB pattern needs at least one fixed byte")
+
+        self.pattern = pattern
+        self.values = bytes(values)
+        self.masks = bytes(masks)
+        self.length = len(values)
+
+        # Anchor on the longest run of fully fixed bytes
+        best_start = best_length = run_start = 0
+        for i, mask in enumerate(masks + [0]):
+            if mask != 0xFF:
+                if i - run_start > best_length:
+                    best_start, best_length = run_start, i - run_start
+                run_start = i + 1
+        if best_length:
+            self.anchor_offset = best_start
+            self.anchor = self.values[best_start:best_start + best_length]
+        else:
+            # Only nibble wildcards; filter on the first partially fixed byte
+            self.anchor_offset = next(i for i, mask in enumerate(masks) if mask)
+            self.anchor = b''
+
+        anchor_end = self.anchor_offset + len(self.anchor)
+        self._checks = [(i, values[i], masks[i]) for i in range(self.length)
+                        if masks[i] and not self.anchor_offset <= i < anchor_end]
+        if len(self.anchor) < MIN_FIND_ANCHOR:
+            # The NumPy path checks every fixed byte, anchor included
+            self._checks = [(i, values[i], masks[i]) for i in range(self.length) if masks[i]]
+
+    def __repr__(self):
+        return f"AobPattern({self.pattern!r})"
+
+    def find_all(self, buffer, end=None, limit=None):
+        """
+        Offsets of every (overlapping) match in buffer[:end]
+        buffer: bytes, bytearray or mmap
+        limit: only report matches starting before this offset
+        Returns an int64 array
+        """
+        if end is None:
+            end = len(buffer)
+        starts = end - self.length + 1
+        if limit is not None:
+            starts = min(starts, limit)
+        if starts <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        data = np.frombuffer(buffer, dtype=np.uint8, count=end)
+        checks = self._checks
+        if len(self.anchor) >= MIN_FIND_ANCHOR:
+            candidates = self._anchor_candidates(buffer, end, starts)
+        else:
+            index, value, mask = checks[0]
+            checks = checks[1:]
+            window = data[index:index + starts]
+            if mask != 0xFF:
+                window = window & mask
+            candidates = np.flatnonzero(window == value)
+
+        for index, value, mask in checks:
+            if not len(candidates):
+                break
+            column = data[candidates + index]
+            if mask != 0xFF:
+                column = column & mask
+            candidates = candidates[column == value]
+        return candidates.astype(np.int64)
+
+    def _anchor_candidates(self, buffer, end, starts):
+        """Match starts whose anchor bytes are present, via substring search"""
+        anchor = self.anchor
+        offset = self.anchor_offset
+        hits = []
+        position = buffer.find(anchor, offset, end)
+        while position != -1:
+            start = position - offset
+            if start >= starts:
+                break
+            hits.append(start)
+            position = buffer.find(anchor, position + 1, end)
+        return np.array(hits, dtype=np.int64)
+
+
+def aob_scan(memory_editor, pattern, regions=None, modules=None, executable=None,
+             start_address=0x10000, end_address=None):
+    """
+    Find every match of an AOB pattern in the target
+    regions: MemoryRegion list to search (default: every readable region)
+    modules: only search image regions of these modules (e.g. ['game.exe'])
+    executable: True = code only, False = data only, None = either
+    Returns a ScanResultStore of match addresses
+    """
+    if not isinstance(pattern, AobPattern):
+        pattern = AobPattern(pattern)
+    if regions is None:
+        regions = memory_editor.get_memory_regions(start_address, end_address,
+                                                   image=True, private=not modules,
+                                                   mapped=not modules)
+    if modules:
+        wanted = {name.lower() for name in modules}
+        regions = [region for region in regions
+                   if region.region_type == 'image' and region.module_name in wanted]
+    if executable is not None:
+        regions = [region for region in regions if region.executable == executable]
+
+    results = ScanResultStore()
+    for address, view, owned in memory_editor.iter_memory_blocks(regions, overlap=pattern.length - 1):
+        # view starts at offset 0 of the pooled bytearray, search it in place
+        offsets = pattern.find_all(view.obj, len(view), owned)
+        if len(offsets):
+            results.append(offsets.astype(np.uint64) + np.uint64(address))
+    return results
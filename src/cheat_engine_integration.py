@@ -10,6 +10,8 @@ import logging
 import subprocess
 from typing import List, Dict, Optional, Any
 
+from pointer_resolver import PointerResolver
+
 logger = logging.getLogger(__name__)
 
 
@@ -160,6 +162,7 @@ class CheatEngineIntegration:
         self.memory_editor = memory_editor
         self.current_table = None
         self.active_cheats = {}  # Track active/frozen cheats
+        self.pointer_resolver = PointerResolver(memory_editor) if memory_editor else None
 
     def launch_external_cheat_engine(self, ce_exe_path: str, ct_file: Optional[str] = None) -> bool:
         """Launch an external Cheat Engine executable optionally opening a .ct file.
@@ -209,18 +212,16 @@ class CheatEngineIntegration:
             if address_str.startswith('0x') or address_str.isdigit():
                 base_addr = int(address_str, 16) if address_str.startswith('0x') else int(address_str)
             else:
-                # Complex address like "[module+offset]"
-                # For now, just try to parse as hex
-                try:
-                    base_addr = int(address_str.replace('[', '').replace(']', '').split('+')[1], 16)
-                except:
+                # Cheat Engine expression like "game.exe+1A2B3C" or "[game.exe+10]+4"
+                base_addr = self.evaluate_address(address_str)
+                if base_addr is None:
                     logger.warning(f"Cannot parse address: {address_str}")
                     return None
             
             # Apply pointer chain if offsets exist
             offsets = entry.get('offsets', [])
-            if offsets and self.memory_editor:
-                return self.memory_editor.read_pointer_chain(base_addr, offsets)
+            if offsets and self.pointer_resolver:
+                return self.pointer_resolver.compile(base_addr, offsets).resolve()
             
             return base_addr
             
@@ -228,6 +229,64 @@ class CheatEngineIntegration:
             logger.error(f"Failed to resolve address: {e}")
             return None
     
+    def evaluate_address(self, expression: str) -> Optional[int]:
+        """Evaluate a Cheat Engine address expression
+        
+        Numbers are hex (as in .ct files), module names resolve to their base
+        through the editor's cached module map and [x] reads the pointer at x.
+        A bare all-digit address is still read as decimal, as it always was.
+        """
+        if expression.strip().isdigit():
+            return int(expression)
+        tokens = _tokenize_address(expression)
+        if not tokens:
+            return None
+        position, value = self._parse_sum(tokens, 0)
+        if position != len(tokens):
+            raise ValueError(f"Unexpected '{tokens[position]}' in address {expression!r}")
+        return value
+    
+    def _parse_sum(self, tokens: List[str], position: int):
+        position, value = self._parse_term(tokens, position)
+        while position < len(tokens) and tokens[position] in '+-':
+            sign = tokens[position]
+            position, term = self._parse_term(tokens, position + 1)
+            value = value + term if sign == '+' else value - term
+        return position, value
+    
+    def _parse_term(self, tokens: List[str], position: int):
+        if position >= len(tokens):
+            raise ValueError("Address expression ends unexpectedly")
+        token = tokens[position]
+        if token == '[':
+            position, pointer_address = self._parse_sum(tokens, position + 1)
+            if position >= len(tokens) or tokens[position] != ']':
+                raise ValueError("Missing ']' in address expression")
+            if not self.memory_editor:
+                raise ValueError("Pointer expressions need an open process")
+            pointer = self.memory_editor.read_pointer(pointer_address)
+            if pointer is None:
+                raise ValueError(f"Cannot read pointer at 0x{pointer_address:X}")
+            return position + 1, pointer
+        if token in '+-]':
+            raise ValueError(f"Unexpected '{token}' in address expression")
+        return position + 1, self._resolve_symbol(token)
+    
+    def _resolve_symbol(self, token: str) -> int:
+        """Hex number or module name"""
+        name = token.strip('"')
+        if name == token:
+            try:
+                return int(token[2:] if token.lower().startswith('0x') else token, 16)
+            except ValueError:
+                pass
+        if not self.memory_editor:
+            raise ValueError(f"Module '{name}' needs an open process")
+        base = self.memory_editor.get_module_map().base_of(name)
+        if base is None:
+            raise ValueError(f"Module '{name}' is not loaded")
+        return base
+    
     def read_value(self, entry: Dict) -> Optional[Any]:
         """Read value for a cheat entry"""
         if not self.memory_editor:
@@ -330,6 +389,27 @@ class CheatEngineIntegration:
         return []
 
 
+def _tokenize_address(expression: str) -> List[str]:
+    """Split an address expression into brackets, +/- and symbols"""
+    tokens = []
+    current = ''
+    quoted = False
+    for char in expression.strip():
+        if char == '"':
+            quoted = not quoted
+            current += char
+        elif not quoted and char in '[]+-':
+            if current.strip():
+                tokens.append(current.strip())
+            current = ''
+            tokens.append(char)
+        else:
+            current += char
+    if current.strip():
+        tokens.append(current.strip())
+    return tokens
+
+
 def convert_ct_to_json(ct_file_path: str, json_output_path: str) -> bool:
     """Utility function to convert .ct file to JSON format"""
     table = CheatEngineTable()
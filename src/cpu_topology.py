@@ -0,0 +1,371 @@
+"""
+CPU Topology - physical layout of the logical CPUs and presets built from it
+Reads physical cores, SMT siblings, the L3 (CCX/CCD) cache domain, NUMA node
+and hybrid core type of every logical CPU from /sys/devices/system/cpu on
+Linux or GetLogicalProcessorInformationEx on Windows, so presets no longer
+have to guess that even CPUs are P-cores and odd ones SMT siblings.
+"""
+
+import ctypes
+from ctypes import wintypes
+import os
+
+import psutil
+
+from thread_affinity import parse_cpu_list
+
+IS_WINDOWS = os.name == 'nt'
+
+SYSFS_CPU_ROOT = '/sys/devices/system/cpu'
+
+# Cores below this share of the fastest core's capacity count as efficiency cores
+EFFICIENCY_CAPACITY_RATIO = 0.8
+
+# GetLogicalProcessorInformationEx relationships
+RELATION_PROCESSOR_CORE = 0
+RELATION_NUMA_NODE = 1
+RELATION_CACHE = 2
+RELATION_ALL = 0xFFFF
+
+
+class LogicalCpu:
+    """Where one logical CPU sits"""
+
+    __slots__ = ('cpu', 'core', 'package', 'cache_domain', 'numa_node', 'core_type', 'max_freq',
+                 'smt_index')
+
+    def __init__(self, cpu, core, package=0, cache_domain=0, numa_node=0, core_type='performance',
+                 max_freq=None, smt_index=0):
+        self.cpu = cpu
+        self.core = core                  # id of the physical core (its lowest CPU number)
+        self.package = package
+        self.cache_domain = cache_domain  # id of the L3 slice (CCX/CCD) it shares
+        self.numa_node = numa_node
+        self.core_type = core_type        # 'performance' or 'efficiency'
+        self.max_freq = max_freq          # MHz, if known
+        self.smt_index = smt_index        # 0 for the first thread of its core
+
+    def __repr__(self):
+        return (f"LogicalCpu({self.cpu}, core={self.core}, l3={self.cache_domain}, "
+                f"node={self.numa_node}, {self.core_type}, smt={self.smt_index})")
+
+
+class CpuTopology:
+    """The logical CPUs of this machine and how they group"""
+
+    def __init__(self, cpus):
+        self.cpus = {cpu.cpu: cpu for cpu in cpus}
+
+    @classmethod
+    def detect(cls):
+        """Read the topology of this machine, falling back to a guess from the CPU counts"""
+        try:
+            if IS_WINDOWS:
+                cpus = _detect_windows()
+            else:
+                cpus = _detect_linux()
+        except (OSError, ValueError):
+            cpus = None
+        return cls(cpus or _detect_fallback())
+
+    @property
+    def is_hybrid(self):
+        return len({cpu.core_type for cpu in self.cpus.values()}) > 1
+
+    def logical_cpus(self):
+        return sorted(self.cpus)
+
+    def cores(self):
+        """Physical core id -> its logical CPUs"""
+        return self._group('core')
+
+    def cache_domains(self):
+        """L3 domain id -> its logical CPUs"""
+        return self._group('cache_domain')
+
+    def numa_nodes(self):
+        """NUMA node -> its logical CPUs"""
+        return self._group('numa_node')
+
+    def label(self, cpu):
+        """Short description for the UI, e.g. "P · L3 0 · SMT" """
+        info = self.cpus.get(cpu)
+        if info is None:
+            return ''
+        parts = []
+        if self.is_hybrid:
+            parts.append('P' if info.core_type == 'performance' else 'E')
+        if len(self.cache_domains()) > 1:
+            parts.append(f"L3 {info.cache_domain}")
+        if info.smt_index:
+            parts.append('SMT')
+        return ' · '.join(parts)
+
+    def best_cache_domain(self, exclude_first_core=False):
+        """
+        The L3 domain with the most performance cores (ties: highest clock, then lowest id)
+        exclude_first_core: don't count CPU 0's core, which select() will drop anyway
+        """
+        first_core = self.cpus[0].core if exclude_first_core and 0 in self.cpus else None
+
+        def score(item):
+            domain, cpus = item
+            infos = [self.cpus[cpu] for cpu in cpus]
+            cores = {info.core for info in infos if info.core_type == 'performance' and info.core != first_core}
+            freq = max((info.max_freq or 0) for info in infos)
+            return (len(cores), freq, -domain)
+        return max(self.cache_domains().items(), key=score)[0]
+
+    def select(self, one_per_core=False, core_type=None, cache_domain=None, numa_node=None,
+               exclude_first_core=False):
+        """
+        Logical CPUs matching the given constraints
+        one_per_core: only the first SMT thread of each physical core
+        core_type: 'performance' / 'efficiency' (ignored on non-hybrid CPUs)
+        cache_domain: an L3 domain id, or 'best' for best_cache_domain()
+        exclude_first_core: drop CPU 0 and its SMT siblings, if anything is left
+        """
+        if cache_domain == 'best':
+            cache_domain = self.best_cache_domain(exclude_first_core)
+        selected = []
+        for info in sorted(self.cpus.values(), key=lambda info: info.cpu):
+            if one_per_core and info.smt_index:
+                continue
+            if core_type and self.is_hybrid and info.core_type != core_type:
+                continue
+            if cache_domain is not None and info.cache_domain != cache_domain:
+                continue
+            if numa_node is not None and info.numa_node != numa_node:
+                continue
+            selected.append(info.cpu)
+        if exclude_first_core and 0 in self.cpus:
+            first_core = self.cpus[0].core
+            remaining = [cpu for cpu in selected if self.cpus[cpu].core != first_core]
+            if remaining:
+                selected = remaining
+        return selected
+
+    def preset(self, name):
+        """CPUs of a named preset from PRESETS"""
+        if name not in PRESETS:
+            raise ValueError(f"Unknown preset: {name}")
+        return PRESETS[name][1](self)
+
+    def _group(self, attribute):
+        groups = {}
+        for cpu in sorted(self.cpus):
+            groups.setdefault(getattr(self.cpus[cpu], attribute), []).append(cpu)
+        return groups
+
+
+def _half(topology, first):
+    """First/second half of the physical cores, with all their threads"""
+    cores = sorted(topology.cores().items())
+    middle = (len(cores) + 1) // 2
+    chosen = cores[:middle] if first else cores[middle:]
+    return sorted(cpu for _, cpus in chosen for cpu in cpus) or topology.logical_cpus()
+
+
+# name: (label, builder)
+PRESETS = {
+    'game': ("Game: one thread per fast core in one cache domain, core 0 excluded",
+             lambda t: t.select(one_per_core=True, core_type='performance', cache_domain='best',
+                                exclude_first_core=True)),
+    'p_cores': ("Performance cores (all threads)",
+                lambda t: t.select(core_type='performance')),
+    'e_cores': ("Efficiency cores",
+                lambda t: t.select(core_type='efficiency') if t.is_hybrid else []),
+    'no_smt': ("One thread per physical core",
+               lambda t: t.select(one_per_core=True)),
+    'single_cache': ("Best cache domain (all threads)",
+                     lambda t: t.select(cache_domain='best')),
+    'first_core': ("First core only (CPU 0)",
+                   lambda t: [0]),
+    'first_half': ("First half of the cores",
+                   lambda t: _half(t, True)),
+    'last_half': ("Last half of the cores",
+                  lambda t: _half(t, False)),
+}
+
+
+def _read(path):
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+
+def _detect_linux(root=SYSFS_CPU_ROOT):
+    online = parse_cpu_list(_read(os.path.join(root, 'online')))
+    cpus = []
+    capacities = {}
+    core_types = _linux_hybrid_types()
+    for cpu in online:
+        base = os.path.join(root, f'cpu{cpu}')
+        siblings = parse_cpu_list(_read(os.path.join(base, 'topology', 'thread_siblings_list')))
+        try:
+            package = int(_read(os.path.join(base, 'topology', 'physical_package_id')))
+        except (OSError, ValueError):
+            package = 0
+
+        # L3 if there is one, else the last level cache, else the package
+        cache_domain = None
+        best_level = 0
+        cache_root = os.path.join(base, 'cache')
+        for index in sorted(os.listdir(cache_root)) if os.path.isdir(cache_root) else []:
+            if not index.startswith('index'):
+                continue
+            try:
+                level = int(_read(os.path.join(cache_root, index, 'level')))
+                if _read(os.path.join(cache_root, index, 'type')) == 'Instruction':
+                    continue
+                shared = parse_cpu_list(_read(os.path.join(cache_root, index, 'shared_cpu_list')))
+            except (OSError, ValueError):
+                continue
+            if level > best_level and level <= 3:
+                best_level = level
+                cache_domain = min(shared)
+        if cache_domain is None:
+            cache_domain = package
+
+        numa_node = 0
+        for entry in os.listdir(base):
+            if entry.startswith('node') and entry[4:].isdigit():
+                numa_node = int(entry[4:])
+                break
+
+        max_freq = None
+        try:
+            max_freq = int(_read(os.path.join(base, 'cpufreq', 'cpuinfo_max_freq'))) // 1000
+        except (OSError, ValueError):
+            pass
+        try:
+            capacities[cpu] = int(_read(os.path.join(base, 'cpu_capacity')))
+        except (OSError, ValueError):
+            pass
+
+        cpus.append(LogicalCpu(cpu, min(siblings), package, cache_domain, numa_node,
+                               core_types.get(cpu, 'performance'), max_freq,
+                               sorted(siblings).index(cpu) if cpu in siblings else 0))
+
+    if not core_types and capacities:
+        # ARM big.LITTLE and newer x86 kernels report relative core capacity
+        fastest = max(capacities.values())
+        for info in cpus:
+            if capacities.get(info.cpu, fastest) < fastest * EFFICIENCY_CAPACITY_RATIO:
+                info.core_type = 'efficiency'
+    return cpus
+
+
+def _linux_hybrid_types():
+    """Intel hybrid parts expose separate PMUs for P-cores and E-cores"""
+    types = {}
+    for pmu, core_type in (('cpu_core', 'performance'), ('cpu_atom', 'efficiency')):
+        try:
+            for cpu in parse_cpu_list(_read(f'/sys/devices/{pmu}/cpus')):
+                types[cpu] = core_type
+        except (OSError, ValueError):
+            pass
+    return types
+
+
+class GROUP_AFFINITY(ctypes.Structure):
+    _fields_ = [
+        ('Mask', ctypes.c_size_t),
+        ('Group', wintypes.WORD),
+        ('Reserved', wintypes.WORD * 3),
+    ]
+
+
+def _group_cpus(buffer, offset, count):
+    """Logical CPU numbers in `count` GROUP_AFFINITY records at offset"""
+    cpus = []
+    for i in range(count):
+        affinity = GROUP_AFFINITY.from_buffer_copy(buffer, offset + i * ctypes.sizeof(GROUP_AFFINITY))
+        bits = ctypes.sizeof(ctypes.c_size_t) * 8
+        cpus.extend(affinity.Group * bits + bit for bit in range(bits) if affinity.Mask >> bit & 1)
+    return cpus
+
+
+def _detect_windows():
+    kernel32 = ctypes.windll.kernel32
+    length = wintypes.DWORD(0)
+    kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, None, ctypes.byref(length))
+    buffer = ctypes.create_string_buffer(length.value)
+    if not kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, buffer, ctypes.byref(length)):
+        raise OSError("GetLogicalProcessorInformationEx failed")
+    raw = buffer.raw
+
+    cores = []        # (cpus, efficiency class)
+    caches = []       # (level, cpus)
+    nodes = []        # (node, cpus)
+    offset = 0
+    while offset < length.value:
+        relationship = int.from_bytes(raw[offset:offset + 4], 'little')
+        size = int.from_bytes(raw[offset + 4:offset + 8], 'little')
+        body = offset + 8
+        if relationship == RELATION_PROCESSOR_CORE:
+            efficiency = raw[body + 1]
+            count = int.from_bytes(raw[body + 22:body + 24], 'little')
+            cores.append((_group_cpus(raw, body + 24, count), efficiency))
+        elif relationship == RELATION_CACHE:
+            level = raw[body]
+            cache_type = int.from_bytes(raw[body + 8:body + 12], 'little')
+            count = int.from_bytes(raw[body + 30:body + 32], 'little') or 1
+            if cache_type != 1:  # skip instruction caches
+                caches.append((level, _group_cpus(raw, body + 32, count)))
+        elif relationship == RELATION_NUMA_NODE:
+            node = int.from_bytes(raw[body:body + 4], 'little')
+            count = int.from_bytes(raw[body + 22:body + 24], 'little') or 1
+            nodes.append((node, _group_cpus(raw, body + 24, count)))
+        offset += size
+
+    top_class = max((efficiency for _, efficiency in cores), default=0)
+    cache_of = {}
+    for level in (1, 2, 3):
+        for cache_level, cpus in caches:
+            if cache_level == level:
+                for cpu in cpus:
+                    cache_of[cpu] = min(cpus)
+    node_of = {cpu: node for node, cpus in nodes for cpu in cpus}
+    freqs = _windows_max_mhz(sum(len(cpus) for cpus, _ in cores))
+
+    result = []
+    for cpus, efficiency in cores:
+        for index, cpu in enumerate(sorted(cpus)):
+            result.append(LogicalCpu(
+                cpu, min(cpus), 0, cache_of.get(cpu, 0), node_of.get(cpu, 0),
+                'performance' if efficiency == top_class else 'efficiency',
+                freqs.get(cpu), index))
+    return result
+
+
+def _windows_max_mhz(count):
+    """Max clock per CPU from CallNtPowerInformation(ProcessorInformation)"""
+    class PROCESSOR_POWER_INFORMATION(ctypes.Structure):
+        _fields_ = [(name, wintypes.ULONG) for name in
+                    ('Number', 'MaxMhz', 'CurrentMhz', 'MhzLimit', 'MaxIdleState', 'CurrentIdleState')]
+    try:
+        info = (PROCESSOR_POWER_INFORMATION * count)()
+        if ctypes.windll.powrprof.CallNtPowerInformation(11, None, 0, info, ctypes.sizeof(info)) != 0:
+            return {}
+        return {entry.Number: entry.MaxMhz for entry in info}
+    except (OSError, AttributeError):
+        return {}
+
+
+def _detect_fallback():
+    """Guess: SMT siblings are adjacent CPU numbers, one cache domain"""
+    logical = psutil.cpu_count() or 1
+    physical = psutil.cpu_count(logical=False) or logical
+    per_core = max(1, logical // physical)
+    return [LogicalCpu(cpu, cpu - cpu % per_core, smt_index=cpu % per_core) for cpu in range(logical)]
+
+
+_topology = None
+
+
+def get_topology():
+    """Topology of this machine, detected once"""
+    global _topology
+    if _topology is None:
+        _topology = CpuTopology.detect()
+    return _topology
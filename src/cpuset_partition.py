@@ -0,0 +1,288 @@
+"""
+Cpuset Partition - kernel-enforced core isolation with cgroup v2 (Linux)
+The game gets its own cpuset cgroup, made an isolated (or root) partition
+where the kernel allows it, so its CPUs are taken away from every other
+cgroup. Everything else is confined to a background cpuset: the other
+top-level cgroups get the remaining CPUs and processes sitting in the root
+cgroup are moved into a background cgroup. Processes forked by the game
+land in its cgroup on their own. Every change is journaled so teardown,
+including after a crash, puts the system back as it was.
+"""
+
+import json
+import os
+
+from journal import write_journal
+from thread_affinity import format_cpu_list, parse_cpu_list
+
+CGROUP_MOUNTS_PATH = '/proc/self/mounts'
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.thalix', 'cpuset.json')
+
+GAME_CGROUP = 'thalix.game'
+BACKGROUND_CGROUP = 'thalix.background'
+
+# Partition types to try for the game, best first ("isolated" needs Linux 6.1+)
+PARTITION_TYPES = ('isolated', 'root')
+
+
+def find_cgroup2_root(mounts_path=CGROUP_MOUNTS_PATH):
+    """Mount point of the cgroup v2 hierarchy, or None"""
+    try:
+        with open(mounts_path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == 'cgroup2':
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+def process_cgroup(pid):
+    """The cgroup v2 path of a process relative to the hierarchy root ('/' for the root cgroup)"""
+    with open(f"/proc/{pid}/cgroup", 'r') as f:
+        for line in f:
+            if line.startswith('0::'):
+                return line[3:].strip()
+    return '/'
+
+
+class CpusetPartition:
+    """
+    Game and background cpusets on the cgroup v2 hierarchy
+    partition is the partition type the kernel accepted for the game cgroup:
+    'isolated', 'root', or 'member' when it refused both (the CPUs are then
+    only kept free by the background cpuset).
+    """
+
+    def __init__(self, game_cpus, root=None, journal_path=DEFAULT_JOURNAL_PATH):
+        self.game_cpus = sorted(game_cpus)
+        self.root = root or find_cgroup2_root()
+        self.journal_path = journal_path
+        self.partition = None
+        self.partition_error = None
+        self._journal = self._empty_journal()
+
+    @property
+    def game_path(self):
+        return os.path.join(self.root, GAME_CGROUP)
+
+    @property
+    def background_path(self):
+        return os.path.join(self.root, BACKGROUND_CGROUP)
+
+    def check(self):
+        """Raise OSError with the reason when cpuset partitions can't be used here"""
+        if self.root is None:
+            raise OSError("cgroup v2 is not mounted")
+        controllers = self._read('cgroup.controllers').split()
+        if 'cpuset' not in controllers:
+            raise OSError("the cpuset controller is not available on cgroup v2 "
+                          "(it is bound to a cgroup v1 hierarchy)")
+        online = set(parse_cpu_list(self._read('cpuset.cpus.effective')))
+        if not set(self.game_cpus) <= online:
+            raise OSError(f"CPUs {format_cpu_list(set(self.game_cpus) - online)} are not available")
+        if not online - set(self.game_cpus):
+            raise OSError("no CPUs would be left for the background")
+
+    def setup(self):
+        """Create both cpusets; raises OSError (and undoes what was done) on failure"""
+        self.check()
+        if os.path.exists(self.journal_path):
+            # Left by a crash; start from the original state
+            self.teardown()
+        try:
+            self._setup()
+        except OSError:
+            self.teardown()
+            raise
+
+    def _setup(self):
+        online = parse_cpu_list(self._read('cpuset.cpus.effective'))
+        background = [cpu for cpu in online if cpu not in self.game_cpus]
+        mems = self._read('cpuset.mems.effective')
+
+        if 'cpuset' not in self._read('cgroup.subtree_control').split():
+            self._journal['subtree_enabled'] = True
+            self._save_journal()
+            self._write('cgroup.subtree_control', '+cpuset')
+
+        for name, cpus in ((GAME_CGROUP, self.game_cpus), (BACKGROUND_CGROUP, background)):
+            if not os.path.isdir(os.path.join(self.root, name)):
+                self._journal['created'].append(name)
+                self._save_journal()
+                os.mkdir(os.path.join(self.root, name))
+            self._write(os.path.join(name, 'cpuset.mems'), mems)
+            self._write(os.path.join(name, 'cpuset.cpus'), format_cpu_list(cpus))
+
+        # Other top-level cgroups (system.slice, user.slice, ...) keep only the background CPUs.
+        # Done before the partition is made, since a partition's CPUs must not
+        # overlap a sibling's cpuset.cpus
+        for name in sorted(os.listdir(self.root)):
+            if name in (GAME_CGROUP, BACKGROUND_CGROUP) or not os.path.isdir(os.path.join(self.root, name)):
+                continue
+            cpus_file = os.path.join(name, 'cpuset.cpus')
+            try:
+                original = self._read(cpus_file)
+            except OSError:
+                continue
+            self._journal['cpus'].setdefault(name, original)
+            self._save_journal()
+            self._write(cpus_file, format_cpu_list(background))
+
+        self.partition = self._make_partition()
+
+        # Processes in the root cgroup (non-systemd setups) move to the background cpuset
+        self.move_root_processes()
+
+    def _make_partition(self):
+        """Turn the game cgroup into the best partition type the kernel accepts"""
+        partition_file = os.path.join(GAME_CGROUP, 'cpuset.cpus.partition')
+        for partition in PARTITION_TYPES:
+            try:
+                self._write(partition_file, partition)
+                state = self._read(partition_file)
+            except OSError as e:
+                self.partition_error = e.strerror or str(e)
+                continue
+            if 'invalid' not in state:
+                self.partition_error = None
+                return partition
+            # e.g. "root invalid (Cpu list in cpuset.cpus not exclusive)"
+            self.partition_error = state
+            self._write(partition_file, 'member')
+        return 'member'
+
+    def move_root_processes(self):
+        """Move user processes from the root cgroup into the background cpuset; returns how many"""
+        moved = 0
+        for pid_text in self._read('cgroup.procs').split():
+            if self._is_kernel_thread(pid_text):
+                continue
+            self._journal['procs'].setdefault(pid_text, '/')
+            try:
+                self._write(os.path.join(BACKGROUND_CGROUP, 'cgroup.procs'), pid_text)
+                moved += 1
+            except OSError:
+                # Exited, or one of the few processes that must stay in the root
+                self._journal['procs'].pop(pid_text, None)
+        self._save_journal()
+        return moved
+
+    def add_process(self, pid):
+        """Move a process (all its threads) into the game cpuset; its children follow on their own"""
+        pid_text = str(pid)
+        origin = self._journal['procs'].get(pid_text)
+        if origin is None:
+            origin = process_cgroup(pid)
+            self._journal['procs'][pid_text] = origin
+        # Where the game's children go back to at teardown
+        self._journal.setdefault('origin', origin)
+        self._save_journal()
+        self._write(os.path.join(GAME_CGROUP, 'cgroup.procs'), pid_text)
+
+    def teardown(self):
+        """
+        Undo everything the journal records: processes back to their cgroups,
+        top-level cpusets back to their CPUs, our cgroups removed
+        Returns the errors hit along the way; an empty list means a clean teardown.
+        """
+        if self.root is None:
+            return []
+        self._load_journal()
+        errors = []
+        if os.path.isdir(self.game_path):
+            try:
+                self._write(os.path.join(GAME_CGROUP, 'cpuset.cpus.partition'), 'member')
+            except OSError:
+                pass
+
+        for name, cpus in self._journal['cpus'].items():
+            try:
+                self._write(os.path.join(name, 'cpuset.cpus'), cpus)
+            except OSError as e:
+                if os.path.isdir(os.path.join(self.root, name)):
+                    errors.append(f"{name}: {e.strerror or e}")
+
+        for name in (GAME_CGROUP, BACKGROUND_CGROUP):
+            # Children the game forked are in its cgroup too; they go where the game came from
+            fallback = self._journal.get('origin', '/') if name == GAME_CGROUP else '/'
+            try:
+                members = self._read(os.path.join(name, 'cgroup.procs')).split()
+            except OSError:
+                continue
+            for pid_text in members:
+                target = self._journal['procs'].get(pid_text, fallback)
+                if not self._move_to(pid_text, target) and not self._move_to(pid_text, '/'):
+                    errors.append(f"PID {pid_text} could not leave {name}")
+
+        for name in reversed(self._journal['created']):
+            try:
+                os.rmdir(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                errors.append(f"{name}: {e.strerror or e}")
+
+        if self._journal['subtree_enabled']:
+            try:
+                self._write('cgroup.subtree_control', '-cpuset')
+            except OSError:
+                # Other cgroups started using cpuset meanwhile; leaving it on is harmless
+                pass
+
+        self.partition = None
+        self._journal = self._empty_journal()
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
+        return errors
+
+    def _move_to(self, pid_text, cgroup):
+        try:
+            self._write(os.path.join(cgroup.lstrip('/'), 'cgroup.procs'), pid_text)
+            return True
+        except OSError:
+            return False
+
+    def _is_kernel_thread(self, pid_text):
+        try:
+            with open(f"/proc/{pid_text}/stat", 'rb') as f:
+                stat = f.read()
+            # PF_KTHREAD in the flags field
+            return bool(int(stat[stat.rindex(b')') + 2:].split()[6]) & 0x00200000)
+        except (OSError, ValueError, IndexError):
+            return True
+
+    def _read(self, name):
+        with open(os.path.join(self.root, name), 'r') as f:
+            return f.read().strip()
+
+    def _write(self, name, text):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(text)
+
+    @staticmethod
+    def _empty_journal():
+        return {'created': [], 'cpus': {}, 'procs': {}, 'subtree_enabled': False}
+
+    def _load_journal(self):
+        """Take the journal on disk (a crashed run's) when nothing is recorded in memory"""
+        if self._journal != self._empty_journal():
+            return
+        try:
+            with open(self.journal_path, 'r') as f:
+                self._journal.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def _save_journal(self):
+        write_journal(self.journal_path, self._journal)
+
+
+def teardown_journal(journal_path=DEFAULT_JOURNAL_PATH):
+    """Undo cpusets left behind by a crash; returns the teardown errors"""
+    if not os.path.exists(journal_path):
+        return []
+    return CpusetPartition([], journal_path=journal_path).teardown()
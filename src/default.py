@@ -2,27 +2,19 @@ import psutil
 import time
 import ctypes
 
+from thalix_daemon import ThalixDaemon
+
 def is_admin():
     try:
         return ctypes.windll.shell32.IsUserAnAdmin()
     except:
         return False
 
-def set_affinity(process_name):
-    for process in psutil.process_iter(attrs=['pid', 'name']):
-        if process.info['name'].lower() == process_name.lower():
-            try:
-                p = psutil.Process(process.info['pid'])
-                available_cpus = list(range(psutil.cpu_count()))
-                if 0 in available_cpus:
-                    available_cpus.remove(0)
-                p.cpu_affinity(available_cpus)
-                print(f"Affinity set for {process_name}: {available_cpus}")
-                return
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                print(f"Access denied or process not found: {process_name}")
-                return
-    print(f"{process_name} not found. Make sure the game is running.")
+def print_event(event):
+    if event['event'] == 'applied':
+        print(f"Affinity set for {event['rule']} (PID {event['pid']}): {event['summary']}")
+    elif event['event'] == 'error':
+        print(f"Error: {event['message']}")
 
 if __name__ == "__main__":
     if not is_admin():
@@ -32,6 +24,10 @@ if __name__ == "__main__":
     
     game_process = "eldenring.exe"
     print("Waiting for Elden Ring to start...")
-    while True:
-        set_affinity(game_process)
-        time.sleep(5)
+    # Applies to an already running game right away, then to every new start;
+    # rules in ~/.thalix/rules.json are picked up as well
+    daemon = ThalixDaemon()
+    daemon.subscribe(print_event)
+    daemon.add_rule({'match': {'name': game_process},
+                     'cpus': [cpu for cpu in range(psutil.cpu_count()) if cpu != 0]})
+    daemon.run_forever()
@@ -0,0 +1,318 @@
+"""
+IRQ Affinity - steers device interrupts away from the game's cores (Linux)
+Reads /proc/interrupts twice to rank IRQs by rate, then rewrites
+/proc/irq/<n>/smp_affinity_list for the busiest device interrupts (GPU,
+NIC, USB, NVMe, audio) that currently land on the game's CPUs. Plans can be
+shown without applying them; original affinities are journaled before the
+first write so they can be restored.
+"""
+
+import json
+import os
+import re
+import time
+
+from journal import write_journal
+from process_index import get_process_index
+from thread_affinity import format_cpu_list, parse_cpu_list
+
+INTERRUPTS_PATH = '/proc/interrupts'
+IRQ_ROOT = '/proc/irq'
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.thalix', 'irq_affinity.json')
+
+# Seconds between the two /proc/interrupts samples
+DEFAULT_SAMPLE_INTERVAL = 1.0
+
+# IRQs below this many interrupts per second aren't worth moving
+DEFAULT_MIN_RATE = 1.0
+
+# Driver name prefixes by kind, matched at the start of the words of the action names in /proc/interrupts
+DEVICE_KINDS = {
+    'gpu': ('nvidia', 'amdgpu', 'i915', 'xe', 'radeon', 'nouveau'),
+    'nvme': ('nvme',),
+    'nic': ('eth', 'enp', 'eno', 'ens', 'wlan', 'wlp', 'iwlwifi', 'mlx', 'igb', 'igc', 'e1000', 'r8169',
+            'ath', 'rtw'),
+    'usb': ('xhci', 'ehci', 'ohci', 'uhci'),
+    'audio': ('snd_hda', 'snd_'),
+}
+DEFAULT_KINDS = ('gpu', 'nic', 'usb', 'nvme', 'audio')
+
+# Driver names too short to be used as prefixes ('xe' would match xen_* and more)
+EXACT_DRIVERS = {'xe'}
+
+# Hardware IRQ number and trigger column, e.g. "16-fasteoi" or "524288-edge"
+_TRIGGER = re.compile(r'^\S*-(edge|level|fasteoi)$', re.IGNORECASE)
+
+
+def device_kind(devices):
+    """Kind of device behind an IRQ ('other' when unknown)"""
+    words = re.findall(r'[a-z0-9_]+', devices.lower())
+    for kind, fragments in DEVICE_KINDS.items():
+        for fragment in fragments:
+            if fragment in EXACT_DRIVERS:
+                if fragment in words:
+                    return kind
+            elif any(word.startswith(fragment) for word in words):
+                return kind
+    return 'other'
+
+
+class IrqInfo:
+    """One numbered interrupt line from /proc/interrupts"""
+
+    __slots__ = ('irq', 'counts', 'chip', 'devices')
+
+    def __init__(self, irq, counts, chip, devices):
+        self.irq = irq
+        self.counts = counts    # cpu -> interrupts so far
+        self.chip = chip
+        self.devices = devices
+
+    @property
+    def kind(self):
+        return device_kind(self.devices)
+
+    def __repr__(self):
+        return f"IrqInfo({self.irq}, {self.devices!r})"
+
+
+def read_interrupts(path=INTERRUPTS_PATH):
+    """Numbered IRQs by number; NMI, LOC and other per-CPU lines can't be moved and are skipped"""
+    with open(path, 'r') as f:
+        cpus = [int(column[3:]) for column in f.readline().split()]
+        irqs = {}
+        for line in f:
+            label, _, rest = line.partition(':')
+            label = label.strip()
+            if not label.isdigit():
+                continue
+            fields = rest.split()
+            counts = {}
+            for cpu, field in zip(cpus, fields):
+                if not field.isdigit():
+                    break
+                counts[cpu] = int(field)
+            tail = fields[len(counts):]
+            # Chip, then hardware IRQ and trigger, then the action (device) names
+            chip = tail[0] if tail else ''
+            position = 1
+            while position < len(tail) and _TRIGGER.match(tail[position]):
+                position += 1
+            devices = ' '.join(tail[position:])
+            irqs[int(label)] = IrqInfo(int(label), counts, chip, devices)
+    return irqs
+
+
+def interrupt_rates(before, after, elapsed):
+    """{irq: {cpu: interrupts per second}} between two read_interrupts() results"""
+    rates = {}
+    for irq, info in after.items():
+        previous = before.get(irq)
+        if previous is None or previous.devices != info.devices:
+            continue
+        rates[irq] = {cpu: max(0, count - previous.counts.get(cpu, 0)) / elapsed
+                      for cpu, count in info.counts.items()}
+    return rates
+
+
+def sample_interrupts(interval=DEFAULT_SAMPLE_INTERVAL, path=INTERRUPTS_PATH):
+    """(IRQs, per-CPU rates) measured over interval seconds"""
+    before = read_interrupts(path)
+    start = time.monotonic()
+    time.sleep(interval)
+    after = read_interrupts(path)
+    return after, interrupt_rates(before, after, time.monotonic() - start)
+
+
+def get_irq_affinity(irq, root=IRQ_ROOT):
+    """CPUs an IRQ may be delivered to, or None if it can't be read"""
+    try:
+        with open(os.path.join(root, str(irq), 'smp_affinity_list'), 'r') as f:
+            return parse_cpu_list(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def get_effective_affinity(irq, root=IRQ_ROOT):
+    """CPUs the IRQ is actually routed to right now (falls back to smp_affinity_list)"""
+    try:
+        with open(os.path.join(root, str(irq), 'effective_affinity_list'), 'r') as f:
+            text = f.read().strip()
+        if text:
+            return parse_cpu_list(text)
+    except (OSError, ValueError):
+        pass
+    return get_irq_affinity(irq, root)
+
+
+def set_irq_affinity(irq, cpus, root=IRQ_ROOT):
+    """
+    Write an IRQ's affinity; returns None on success, else the error text
+    Kernel-managed IRQs (NVMe queues, some MSI-X vectors) reject the write
+    with EIO, which is reported here rather than raised.
+    """
+    try:
+        with open(os.path.join(root, str(irq), 'smp_affinity_list'), 'w') as f:
+            f.write(format_cpu_list(cpus))
+        return None
+    except OSError as e:
+        return e.strerror or str(e)
+
+
+def irqbalance_running():
+    """True when irqbalance runs and will undo our placement on its next pass"""
+    return bool(get_process_index().pids('irqbalance'))
+
+
+class IrqMove:
+    """One planned IRQ affinity change and its outcome"""
+
+    __slots__ = ('irq', 'kind', 'devices', 'rate', 'game_rate', 'current', 'target', 'error')
+
+    def __init__(self, irq, kind, devices, rate, game_rate, current, target):
+        self.irq = irq
+        self.kind = kind
+        self.devices = devices
+        self.rate = rate            # interrupts/s on all CPUs
+        self.game_rate = game_rate  # interrupts/s landing on the game's CPUs
+        self.current = current
+        self.target = target
+        self.error = None
+
+    def __repr__(self):
+        return f"IrqMove({self.irq} {self.kind} {self.current} -> {self.target})"
+
+
+class IrqSteering:
+    """Plans, applies and restores IRQ placement around a set of game CPUs"""
+
+    def __init__(self, game_cpus, kinds=DEFAULT_KINDS, min_rate=DEFAULT_MIN_RATE, limit=None,
+                 journal_path=DEFAULT_JOURNAL_PATH, root=IRQ_ROOT, interrupts_path=INTERRUPTS_PATH):
+        self.game_cpus = sorted(game_cpus)
+        self.kinds = tuple(kinds)
+        self.min_rate = min_rate
+        self.limit = limit
+        self.journal_path = journal_path
+        self.root = root
+        self.interrupts_path = interrupts_path
+
+    def sample(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        """(IRQs, per-CPU rates) for this steering's /proc paths"""
+        return sample_interrupts(interval, self.interrupts_path)
+
+    def plan(self, irqs, rates):
+        """IrqMoves for the busiest matching IRQs that reach the game's CPUs, busiest first"""
+        game = set(self.game_cpus)
+        online = set()
+        for info in irqs.values():
+            online.update(info.counts)
+        moves = []
+        for irq, cpu_rates in rates.items():
+            info = irqs[irq]
+            kind = info.kind
+            rate = sum(cpu_rates.values())
+            if kind not in self.kinds or rate < self.min_rate:
+                continue
+            current = get_effective_affinity(irq, self.root)
+            if current is None or not game & set(current):
+                continue
+            allowed = get_irq_affinity(irq, self.root) or current
+            target = [cpu for cpu in allowed if cpu not in game] or sorted(online - game)
+            if not target:
+                continue
+            game_rate = sum(cpu_rates.get(cpu, 0.0) for cpu in game)
+            moves.append(IrqMove(irq, kind, info.devices, rate, game_rate, current, target))
+        moves.sort(key=lambda move: move.rate, reverse=True)
+        return moves[:self.limit] if self.limit else moves
+
+    def dry_run(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        """Measure and plan without writing anything; returns (rates, moves)"""
+        irqs, rates = self.sample(interval)
+        return rates, self.plan(irqs, rates)
+
+    def apply(self, moves):
+        """
+        Write the planned affinities; returns the moves that failed
+        Originals go to the journal first; an IRQ already in the journal keeps
+        its first recorded original, so applying twice still restores to the
+        state before the first apply.
+        """
+        journal = self._load_journal()
+        for move in moves:
+            journal.setdefault(str(move.irq), get_irq_affinity(move.irq, self.root) or move.current)
+        self._save_journal(journal)
+
+        failed = []
+        for move in moves:
+            move.error = set_irq_affinity(move.irq, move.target, self.root)
+            if move.error is not None:
+                failed.append(move)
+        return failed
+
+    def restore(self):
+        """Put back every journaled affinity; returns {irq: error} for those that couldn't be"""
+        errors = {}
+        failed = {}
+        for irq_text, cpus in self._load_journal().items():
+            error = set_irq_affinity(int(irq_text), cpus, self.root)
+            # An IRQ that disappeared (device removed) has nothing to restore
+            if error is not None and os.path.isdir(os.path.join(self.root, irq_text)):
+                errors[int(irq_text)] = error
+                failed[irq_text] = cpus
+        if failed:
+            # Keep the originals that are still needed for a later restore
+            self._save_journal(failed)
+            return errors
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
+        return errors
+
+    def steer(self, interval=DEFAULT_SAMPLE_INTERVAL, dry_run=False):
+        """
+        Measure, apply and measure again
+        Returns (moves, rates before, rates after); after is None on a dry run.
+        """
+        before, moves = self.dry_run(interval)
+        if dry_run or not moves:
+            return moves, before, None
+        self.apply(moves)
+        after = self.sample(interval)[1]
+        return moves, before, after
+
+    def report(self, moves, before, after=None):
+        """Text table of each planned IRQ's rate on and off the game's CPUs, before and after"""
+        game = set(self.game_cpus)
+        lines = [f"Game CPUs: {format_cpu_list(game)}"]
+        if irqbalance_running():
+            lines.append("Warning: irqbalance is running and may move these IRQs back")
+        if not moves:
+            lines.append("No busy device IRQs land on the game CPUs")
+            return '\n'.join(lines)
+        lines.append(f"{'IRQ':>5} {'kind':<6} {'game/s':>9} {'other/s':>9}  {'after game/s':>12}  "
+                     f"{'CPUs':<12} device")
+        for move in moves:
+            rates = before.get(move.irq, {})
+            on_game = sum(rate for cpu, rate in rates.items() if cpu in game)
+            off_game = sum(rate for cpu, rate in rates.items() if cpu not in game)
+            if move.error is not None:
+                result = move.error[:12]
+            elif after is not None and move.irq in after:
+                result = f"{sum(rate for cpu, rate in after[move.irq].items() if cpu in game):.1f}"
+            else:
+                result = '-'
+            cpus = f"{format_cpu_list(move.current)}->{format_cpu_list(move.target)}"
+            lines.append(f"{move.irq:>5} {move.kind:<6} {on_game:>9.1f} {off_game:>9.1f}  {result:>12}  "
+                         f"{cpus:<12} {move.devices}")
+        return '\n'.join(lines)
+
+    def _load_journal(self):
+        try:
+            with open(self.journal_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_journal(self, journal):
+        write_journal(self.journal_path, journal)
@@ -0,0 +1,20 @@
+"""
+Journal - crash-safe JSON files under ~/.thalix
+Written to a temporary file, flushed to disk and renamed over the old
+file, so a crash leaves either the previous or the new contents, never
+half of them.
+"""
+
+import json
+import os
+
+
+def write_journal(path, data, indent=None):
+    """Replace the JSON file at path with data in one step"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
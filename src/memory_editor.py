@@ -5,9 +5,20 @@ For educational and single-player use only!
 
 import ctypes
 from ctypes import wintypes
+import errno
 import struct
 import json
 import os
+import threading
+
+import numpy as np
+
+from aob_scan import AobPattern
+from module_map import ModuleMap
+from scan_kernels import VALUE_TYPES, find_value
+from scan_results import ScanResultStore
+
+IS_WINDOWS = os.name == 'nt'
 
 # Windows API constants
 PROCESS_ALL_ACCESS = 0x1F0FFF
@@ -17,36 +28,276 @@ PROCESS_VM_OPERATION = 0x0008
 PROCESS_QUERY_INFORMATION = 0x0400
 
 # Memory protection constants
-PAGE_EXECUTE_READWRITE = 0x40
+PAGE_NOACCESS = 0x01
+PAGE_READONLY = 0x02
 PAGE_READWRITE = 0x04
+PAGE_WRITECOPY = 0x08
+PAGE_EXECUTE = 0x10
+PAGE_EXECUTE_READ = 0x20
+PAGE_EXECUTE_READWRITE = 0x40
+PAGE_EXECUTE_WRITECOPY = 0x80
+PAGE_GUARD = 0x100
 MEM_COMMIT = 0x1000
 MEM_RESERVE = 0x2000
 
+# Memory region types
+MEM_PRIVATE = 0x20000
+MEM_MAPPED = 0x40000
+MEM_IMAGE = 0x1000000
+
+PAGE_SIZE = 0x1000
+
+# Bulk scan reads
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Highest user-mode address for 32-bit and 64-bit targets
+USER_SPACE_END_32 = 0x7FFFFFFF
+USER_SPACE_END_64 = 0x7FFFFFFFFFFF
+
+_READABLE_PROTECT = (PAGE_READONLY | PAGE_READWRITE | PAGE_WRITECOPY |
+                     PAGE_EXECUTE_READ | PAGE_EXECUTE_READWRITE | PAGE_EXECUTE_WRITECOPY)
+_WRITABLE_PROTECT = (PAGE_READWRITE | PAGE_WRITECOPY |
+                     PAGE_EXECUTE_READWRITE | PAGE_EXECUTE_WRITECOPY)
+_EXECUTABLE_PROTECT = (PAGE_EXECUTE | PAGE_EXECUTE_READ |
+                       PAGE_EXECUTE_READWRITE | PAGE_EXECUTE_WRITECOPY)
+
+# Most iovecs a single process_vm_readv call accepts
+IOV_MAX = 1024
+
+
+class MEMORY_BASIC_INFORMATION(ctypes.Structure):
+    """VirtualQueryEx result (field alignment matches both 32 and 64-bit layouts)"""
+    _fields_ = [
+        ('BaseAddress', ctypes.c_void_p),
+        ('AllocationBase', ctypes.c_void_p),
+        ('AllocationProtect', wintypes.DWORD),
+        ('RegionSize', ctypes.c_size_t),
+        ('State', wintypes.DWORD),
+        ('Protect', wintypes.DWORD),
+        ('Type', wintypes.DWORD),
+    ]
+
+
+class IOVEC(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+
+# Linux: read many remote ranges with one syscall
+_process_vm_readv = None
+if not IS_WINDOWS:
+    try:
+        _process_vm_readv = ctypes.CDLL(None, use_errno=True).process_vm_readv
+        _process_vm_readv.argtypes = [ctypes.c_int, ctypes.POINTER(IOVEC), ctypes.c_ulong,
+                                      ctypes.POINTER(IOVEC), ctypes.c_ulong, ctypes.c_ulong]
+        _process_vm_readv.restype = ctypes.c_ssize_t
+    except (OSError, AttributeError):
+        _process_vm_readv = None
+
+
+class MemoryRegion:
+    """A committed, contiguous range of the target's address space"""
+
+    __slots__ = ('base', 'size', 'protect', 'region_type', 'path')
+
+    def __init__(self, base, size, protect, region_type, path=''):
+        self.base = base
+        self.size = size
+        self.protect = protect          # 'rwx' style string, '-' for missing rights
+        self.region_type = region_type  # 'private', 'image' or 'mapped'
+        self.path = path
+
+    @property
+    def end(self):
+        return self.base + self.size
+
+    @property
+    def readable(self):
+        return self.protect[0] == 'r'
+
+    @property
+    def writable(self):
+        return self.protect[1] == 'w'
+
+    @property
+    def executable(self):
+        return self.protect[2] == 'x'
+
+    @property
+    def module_name(self):
+        """Lower-case file name of the mapped file, '' for anonymous memory"""
+        if not self.path or self.path.startswith('['):
+            return ''
+        return self.path.replace('\\', '/').rsplit('/', 1)[-1].lower()
+
+    def __repr__(self):
+        return (f"MemoryRegion(0x{self.base:X}-0x{self.end:X}, {self.protect}, "
+                f"{self.region_type}{', ' + self.path if self.path else ''})")
+
+
+class BufferPool:
+    """Pre-allocated read buffers reused across scans instead of allocating per page"""
+
+    def __init__(self, buffer_size=DEFAULT_BLOCK_SIZE, max_buffers=4):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Get a buffer of buffer_size bytes"""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return bytearray(self.buffer_size)
+
+    def release(self, buffer):
+        """Return a buffer to the pool"""
+        with self._lock:
+            if len(buffer) == self.buffer_size and len(self._free) < self.max_buffers:
+                self._free.append(buffer)
+
+
+class ReadPlan:
+    """
+    A batch of (address, value_type) reads compiled for repeated use
+    Requests are sorted and merged into spans wherever they are less than a
+    page apart; the spans are read back to back into one buffer and decoded
+    with a single struct.
+    """
+
+    def __init__(self, requests):
+        self.requests = requests
+        order = sorted(range(len(requests)), key=lambda i: requests[i][0])
+
+        spans = []   # [start, end, first field]
+        fields = []  # (address, value_type, request index) in address order
+        for i in order:
+            address, value_type = requests[i]
+            end = address + VALUE_TYPES[value_type][1].itemsize
+            if spans and address - spans[-1][1] < PAGE_SIZE:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([address, end, len(fields)])
+            fields.append((address, value_type, i))
+
+        self.spans = []        # (start, length, buffer offset)
+        self.field_spans = []  # span index of each field
+        self.offsets = []      # buffer offset of each field
+        buffer_offset = 0
+        for index, (start, end, first) in enumerate(spans):
+            last = spans[index + 1][2] if index + 1 < len(spans) else len(fields)
+            for address, _, _ in fields[first:last]:
+                self.field_spans.append(index)
+                self.offsets.append(buffer_offset + address - start)
+            self.spans.append((start, end - start, buffer_offset))
+            buffer_offset += end - start
+        self.fields = fields
+        self.buffer = bytearray(max(buffer_offset, 1))
+
+        # One struct over the whole buffer, unless fields overlap
+        fmt = ['<']
+        position = 0
+        self.struct = None
+        for (address, value_type, _), offset in zip(fields, self.offsets):
+            if offset < position:
+                break
+            if offset > position:
+                fmt.append(f'{offset - position}x')
+            fmt.append(VALUE_TYPES[value_type][0][1:])
+            position = offset + VALUE_TYPES[value_type][1].itemsize
+        else:
+            self.struct = struct.Struct(''.join(fmt))
+
+        # Pre-built iovec arrays for vectored reads, IOV_MAX spans per call
+        self.batches = []
+        if _process_vm_readv is not None:
+            base = ctypes.addressof(ctypes.c_char.from_buffer(self.buffer))
+            for first in range(0, len(self.spans), IOV_MAX):
+                chunk = self.spans[first:first + IOV_MAX]
+                local = (IOVEC * len(chunk))(*[(base + offset, length) for _, length, offset in chunk])
+                remote = (IOVEC * len(chunk))(*[(start, length) for start, length, _ in chunk])
+                self.batches.append((first, len(chunk), local, remote))
+
+    def decode(self, span_ok):
+        """Values in request order; fields in unreadable spans are None"""
+        values = [None] * len(self.requests)
+        if self.struct is not None:
+            decoded = self.struct.unpack_from(self.buffer)
+        else:
+            decoded = [struct.unpack_from(VALUE_TYPES[value_type][0], self.buffer, offset)[0]
+                       for (_, value_type, _), offset in zip(self.fields, self.offsets)]
+        for (_, _, index), span, value in zip(self.fields, self.field_spans, decoded):
+            if span_ok[span]:
+                values[index] = value
+        return values
+
+
 class MemoryEditor:
     """Handles process memory reading and writing"""
     
     def __init__(self, pid=None):
         self.pid = pid
         self.process_handle = None
+        self.is_64bit = True
+        self.buffer_pool = BufferPool()
+        self.module_map = None
+        self._read_plan = None
         
-        # Windows API functions
-        self.kernel32 = ctypes.windll.kernel32
-        self.OpenProcess = self.kernel32.OpenProcess
-        self.ReadProcessMemory = self.kernel32.ReadProcessMemory
-        self.WriteProcessMemory = self.kernel32.WriteProcessMemory
-        self.VirtualProtectEx = self.kernel32.VirtualProtectEx
-        self.CloseHandle = self.kernel32.CloseHandle
+        if IS_WINDOWS:
+            # Windows API functions
+            self.kernel32 = ctypes.windll.kernel32
+            self.OpenProcess = self.kernel32.OpenProcess
+            self.ReadProcessMemory = self.kernel32.ReadProcessMemory
+            self.WriteProcessMemory = self.kernel32.WriteProcessMemory
+            self.VirtualProtectEx = self.kernel32.VirtualProtectEx
+            self.VirtualQueryEx = self.kernel32.VirtualQueryEx
+            self.VirtualQueryEx.argtypes = [wintypes.HANDLE, ctypes.c_void_p,
+                                            ctypes.POINTER(MEMORY_BASIC_INFORMATION), ctypes.c_size_t]
+            self.VirtualQueryEx.restype = ctypes.c_size_t
+            self.IsWow64Process = self.kernel32.IsWow64Process
+            self.GetMappedFileNameW = ctypes.windll.psapi.GetMappedFileNameW
+            self.GetMappedFileNameW.argtypes = [wintypes.HANDLE, ctypes.c_void_p,
+                                                wintypes.LPWSTR, wintypes.DWORD]
+            self.GetMappedFileNameW.restype = wintypes.DWORD
+            self.CloseHandle = self.kernel32.CloseHandle
         
     def open_process(self, pid):
         """Open process for memory access"""
         self.pid = pid
+        self.module_map = None
+        if not IS_WINDOWS:
+            # /proc/<pid>/mem gives ptrace-checked random access to the target
+            try:
+                self.process_handle = os.open(f"/proc/{pid}/mem", os.O_RDWR)
+            except OSError:
+                try:
+                    self.process_handle = os.open(f"/proc/{pid}/mem", os.O_RDONLY)
+                except OSError:
+                    self.process_handle = None
+                    return False
+            self.is_64bit = struct.calcsize('P') == 8
+            return True
+            
         self.process_handle = self.OpenProcess(PROCESS_ALL_ACCESS, False, pid)
-        return self.process_handle is not None and self.process_handle != 0
+        if not self.process_handle:
+            return False
+            
+        # A WOW64 target only has the low 2 GiB of user space
+        wow64 = wintypes.BOOL(False)
+        self.IsWow64Process(self.process_handle, ctypes.byref(wow64))
+        self.is_64bit = struct.calcsize('P') == 8 and not wow64.value
+        return True
         
     def close_process(self):
         """Close process handle"""
         if self.process_handle:
-            self.CloseHandle(self.process_handle)
+            if IS_WINDOWS:
+                self.CloseHandle(self.process_handle)
+            else:
+                os.close(self.process_handle)
             self.process_handle = None
             
     def read_memory(self, address, size):
@@ -54,6 +305,13 @@ class MemoryEditor:
         if not self.process_handle:
             return None
             
+        if not IS_WINDOWS:
+            try:
+                data = os.pread(self.process_handle, size, address)
+            except (OSError, OverflowError):
+                return None
+            return data if len(data) == size else None
+            
         buffer = ctypes.create_string_buffer(size)
         bytes_read = ctypes.c_size_t(0)
         
@@ -69,11 +327,93 @@ class MemoryEditor:
             return buffer.raw
         return None
         
+    def read_into(self, address, buffer, size=None):
+        """
+        Read memory straight into a writable buffer (bytearray/memoryview)
+        Returns the number of bytes read; a short count means the rest is unreadable
+        """
+        if not self.process_handle:
+            return 0
+        if size is None:
+            size = len(buffer)
+        if size <= 0:
+            return 0
+            
+        if not IS_WINDOWS:
+            try:
+                return os.preadv(self.process_handle, [memoryview(buffer)[:size]], address)
+            except (OSError, OverflowError):
+                return 0
+                
+        bytes_read = ctypes.c_size_t(0)
+        self.ReadProcessMemory(
+            self.process_handle,
+            ctypes.c_void_p(address),
+            ctypes.byref(ctypes.c_char.from_buffer(buffer)),
+            size,
+            ctypes.byref(bytes_read)
+        )
+        # A partial copy still reports how much was transferred
+        return bytes_read.value
+        
+    def iter_memory_blocks(self, regions, overlap=0):
+        """
+        Read regions in large blocks through a pooled buffer
+        Yields (address, view, owned): view is a memoryview of the block and
+        owned is how many leading offsets belong to this block. Each block
+        carries `overlap` extra bytes so values straddling the boundary are
+        still seen, and the next block starts at address + owned.
+        The view is only valid until the next iteration.
+        """
+        buffer = self.buffer_pool.acquire()
+        block_size = len(buffer)
+        if overlap >= block_size:
+            raise ValueError("overlap must be smaller than the block size")
+        step = block_size - overlap
+        
+        # Merge adjacent regions so matches across their border are found
+        runs = []
+        for region in regions:
+            if runs and runs[-1][1] == region.base:
+                runs[-1][1] = region.end
+            else:
+                runs.append([region.base, region.end])
+                
+        try:
+            view = memoryview(buffer)
+            for run_start, run_end in runs:
+                address = run_start
+                while address < run_end:
+                    length = min(block_size, run_end - address)
+                    count = self.read_into(address, buffer, length)
+                    if count <= 0:
+                        # Unreadable page, skip to the next one
+                        address = (address & ~(PAGE_SIZE - 1)) + PAGE_SIZE
+                        continue
+                    if count < length:
+                        # Nothing can straddle the unreadable page that follows
+                        owned = count
+                    elif address + length < run_end:
+                        owned = step
+                    else:
+                        owned = length
+                    yield address, view[:count], owned
+                    address += owned
+        finally:
+            view.release()
+            self.buffer_pool.release(buffer)
+        
     def write_memory(self, address, data):
         """Write memory to process"""
         if not self.process_handle:
             return False
             
+        if not IS_WINDOWS:
+            try:
+                return os.pwrite(self.process_handle, data, address) == len(data)
+            except (OSError, OverflowError):
+                return False
+            
         bytes_written = ctypes.c_size_t(0)
         buffer = ctypes.create_string_buffer(data)
         
@@ -143,55 +483,250 @@ class MemoryEditor:
         """Write arbitrary bytes"""
         return self.write_memory(address, data)
         
-    def scan_memory(self, value, value_type='int', start_address=0x10000, end_address=0x7FFFFFFF):
+    def read_batch(self, requests):
         """
-        Scan memory for a specific value
-        value_type: 'int', 'float', 'long', 'double', 'bytes'
-        Returns list of addresses
+        Read many values in as few syscalls as possible
+        requests: sequence of (address, value_type) with value_type in VALUE_TYPES
+        Returns the values in request order, None where a value can't be read
+        """
+        requests = tuple((address, value_type) for address, value_type in requests)
+        if not requests:
+            return []
+        plan = self._read_plan
+        if plan is None or plan.requests != requests:
+            plan = self._read_plan = ReadPlan(requests)
+        if not self.process_handle:
+            return [None] * len(requests)
+
+        span_ok = self._read_spans(plan)
+        values = plan.decode(span_ok)
+        if not all(span_ok):
+            # A failed span may straddle an unmapped page; retry its fields one by one
+            for (address, value_type, index), span in zip(plan.fields, plan.field_spans):
+                if not span_ok[span]:
+                    data = self.read_memory(address, VALUE_TYPES[value_type][1].itemsize)
+                    if data:
+                        values[index] = struct.unpack(VALUE_TYPES[value_type][0], data)[0]
+        return values
+
+    def _read_spans(self, plan):
+        """Fill plan.buffer; returns per-span success flags"""
+        span_ok = [False] * len(plan.spans)
+        if plan.batches and self.pid and self._read_spans_vectored(plan, span_ok):
+            return span_ok
+            
+        # One read per span (Windows, or process_vm_readv unavailable)
+        view = memoryview(plan.buffer)
+        try:
+            for index, (start, length, offset) in enumerate(plan.spans):
+                span_ok[index] = self.read_into(start, view[offset:offset + length], length) == length
+        finally:
+            view.release()
+        return span_ok
+        
+    def _read_spans_vectored(self, plan, span_ok):
+        """process_vm_readv path; False if the syscall can't be used on this target"""
+        iovec_size = ctypes.sizeof(IOVEC)
+        for first, count, local, remote in plan.batches:
+            skip = 0
+            while skip < count:
+                read = _process_vm_readv(
+                    self.pid,
+                    ctypes.cast(ctypes.byref(local, skip * iovec_size), ctypes.POINTER(IOVEC)), count - skip,
+                    ctypes.cast(ctypes.byref(remote, skip * iovec_size), ctypes.POINTER(IOVEC)), count - skip,
+                    0)
+                if read < 0:
+                    if ctypes.get_errno() != errno.EFAULT:
+                        return False
+                    read = 0
+                # The transfer stops at the first span it can't read in full
+                index = first + skip
+                while index < first + count and read >= plan.spans[index][1]:
+                    read -= plan.spans[index][1]
+                    span_ok[index] = True
+                    index += 1
+                skip = index - first + 1
+        return True
+        
+    def get_module_map(self):
+        """Cached ModuleMap of the opened process"""
+        if self.module_map is None or self.module_map.pid != self.pid:
+            self.module_map = ModuleMap(self.pid, self.process_handle if IS_WINDOWS else None)
+            self.module_map.refresh(force=True)
+        return self.module_map
+        
+    def read_pointer(self, address):
+        """Read a pointer-sized value of the target"""
+        if self.is_64bit:
+            data = self.read_memory(address, 8)
+            return struct.unpack('<Q', data)[0] if data else None
+        data = self.read_memory(address, 4)
+        return struct.unpack('<I', data)[0] if data else None
+        
+    def get_user_space_end(self):
+        """Highest user-mode address of the opened process"""
+        return USER_SPACE_END_64 if self.is_64bit else USER_SPACE_END_32
+        
+    def get_memory_regions(self, start_address=0, end_address=None, writable=None,
+                           private=True, image=True, mapped=False):
+        """
+        List the committed, readable regions of the target
+        writable: True = writable only, False = read-only only, None = either
+        private/image/mapped: include regions of that type
+        Returns list of MemoryRegion, sorted by address
         """
-        results = []
-        current_address = start_address
-        
-        # Determine scan parameters based on type
-        if value_type == 'int':
-            search_bytes = struct.pack('<i', value)
-            step = 4
-        elif value_type == 'float':
-            search_bytes = struct.pack('<f', value)
-            step = 4
-        elif value_type == 'long':
-            search_bytes = struct.pack('<q', value)
-            step = 8
-        elif value_type == 'double':
-            search_bytes = struct.pack('<d', value)
-            step = 8
-        elif value_type == 'bytes':
-            search_bytes = value
-            step = len(value)
+        if not self.process_handle:
+            return []
+        if end_address is None:
+            end_address = self.get_user_space_end()
+            
+        wanted_types = set()
+        if private:
+            wanted_types.add('private')
+        if image:
+            wanted_types.add('image')
+        if mapped:
+            wanted_types.add('mapped')
+            
+        if IS_WINDOWS:
+            all_regions = self._query_regions_windows(start_address, end_address)
         else:
-            return results
+            all_regions = self._query_regions_linux(start_address, end_address)
             
-        # Scan in chunks for performance
-        chunk_size = 4096
+        regions = []
+        for region in all_regions:
+            if not region.readable or region.region_type not in wanted_types:
+                continue
+            if writable is not None and region.writable != writable:
+                continue
+            # Clip to the requested range
+            base = max(region.base, start_address)
+            end = min(region.end, end_address)
+            if base >= end:
+                continue
+            if base != region.base or end != region.end:
+                region = MemoryRegion(base, end - base, region.protect, region.region_type, region.path)
+            regions.append(region)
+        return regions
         
-        while current_address < end_address:
-            try:
-                data = self.read_memory(current_address, chunk_size)
-                if data:
-                    # Search for value in chunk
-                    offset = 0
-                    while True:
-                        offset = data.find(search_bytes, offset)
-                        if offset == -1:
-                            break
-                        results.append(current_address + offset)
-                        offset += step
-                        
-                current_address += chunk_size
-            except:
-                current_address += chunk_size
+    def _query_regions_windows(self, start_address, end_address):
+        """Walk the address space with VirtualQueryEx"""
+        regions = []
+        mbi = MEMORY_BASIC_INFORMATION()
+        mbi_size = ctypes.sizeof(mbi)
+        name_buffer = ctypes.create_unicode_buffer(1024)
+        address = start_address
+        
+        while address < end_address:
+            if not self.VirtualQueryEx(self.process_handle, ctypes.c_void_p(address),
+                                       ctypes.byref(mbi), mbi_size):
+                break
+            base = mbi.BaseAddress or 0
+            size = mbi.RegionSize
+            if size == 0:
+                break
+                
+            protect = mbi.Protect
+            if (mbi.State == MEM_COMMIT and protect & _READABLE_PROTECT
+                    and not protect & PAGE_GUARD):
+                rights = ('r' +
+                          ('w' if protect & _WRITABLE_PROTECT else '-') +
+                          ('x' if protect & _EXECUTABLE_PROTECT else '-'))
+                path = ''
+                if mbi.Type == MEM_IMAGE:
+                    region_type = 'image'
+                    # Device path of the module, e.g. \Device\HarddiskVolume3\...\game.exe
+                    if self.GetMappedFileNameW(self.process_handle, ctypes.c_void_p(base),
+                                               name_buffer, len(name_buffer)):
+                        path = name_buffer.value
+                elif mbi.Type == MEM_MAPPED:
+                    region_type = 'mapped'
+                else:
+                    region_type = 'private'
+                regions.append(MemoryRegion(base, size, rights, region_type, path))
+                
+            address = base + size
+        return regions
+        
+    def _query_regions_linux(self, start_address, end_address):
+        """Parse /proc/<pid>/maps"""
+        try:
+            exe_path = os.readlink(f"/proc/{self.pid}/exe")
+        except OSError:
+            exe_path = None
+            
+        regions = []
+        try:
+            with open(f"/proc/{self.pid}/maps", 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            return regions
+            
+        for line in lines:
+            parts = line.split(None, 5)
+            if len(parts) < 5:
+                continue
+            start_str, end_str = parts[0].split('-')
+            base = int(start_str, 16)
+            end = int(end_str, 16)
+            if end <= start_address or base >= end_address:
+                continue
+                
+            perms = parts[1]
+            path = parts[5].strip() if len(parts) > 5 else ''
+            # Kernel-provided pages can't be read through /proc/<pid>/mem
+            if path in ('[vvar]', '[vvar_vclock]', '[vsyscall]'):
                 continue
                 
+            if parts[4] != '0' and path and not path.startswith('['):
+                name = os.path.basename(path)
+                if path == exe_path or '.so' in name:
+                    region_type = 'image'
+                else:
+                    region_type = 'mapped'
+            else:
+                # Anonymous memory, heap and stack
+                region_type = 'mapped' if perms[3] == 's' else 'private'
+            regions.append(MemoryRegion(base, end - base, perms[:3], region_type, path))
+        return regions
+        
+    def scan_memory(self, value, value_type='int', start_address=0x10000, end_address=None,
+                    writable=None, private=True, image=True, mapped=False,
+                    alignment=None, stride=None):
+        """
+        Scan memory for a specific value
+        value_type: 'int', 'float', 'long', 'double', 'bytes', 'aob'
+        ('aob' takes a pattern string like "48 8B 05 ?? ?? ?? ??")
+        end_address: defaults to the end of the target's user address space
+        writable/private/image/mapped: region filters, see get_memory_regions
+        alignment/stride: candidate addresses for numeric types, see
+        scan_kernels.strided_view (default: aligned to the value width)
+        Returns a ScanResultStore of addresses
+        """
+        results = ScanResultStore()
+        
+        if value_type in VALUE_TYPES:
+            overlap = VALUE_TYPES[value_type][1].itemsize - 1
+        elif value_type in ('bytes', 'aob'):
+            if value_type == 'bytes':
+                value = ' '.join(f"{byte:02X}" for byte in value)
+            pattern = AobPattern(value)
+            overlap = pattern.length - 1
+        else:
+            return results
+            
+        regions = self.get_memory_regions(start_address, end_address, writable=writable,
+                                          private=private, image=image, mapped=mapped)
+            
+        for address, view, owned in self.iter_memory_blocks(regions, overlap=overlap):
+            if value_type in VALUE_TYPES:
+                offsets = find_value(view, value, value_type, address, alignment, stride, owned)
+            else:
+                # view starts at offset 0 of the pooled bytearray, search it in place
+                offsets = pattern.find_all(view.obj, len(view), owned)
+            if len(offsets):
+                results.append(offsets.astype(np.uint64) + np.uint64(address))
+                
         return results
         
     def read_pointer_chain(self, base_address, offsets):
@@ -255,50 +790,3 @@ class CheatTable:
         if 0 <= index < len(self.entries):
             return self.entries[index]
         return None
-
-
-class MemoryFreezer:
-    """Keeps memory values frozen at specified values"""
-    
-    def __init__(self, memory_editor):
-        self.memory_editor = memory_editor
-        self.frozen_addresses = {}  # address: (value, type)
-        self.running = False
-        
-    def add_frozen_address(self, address, value, value_type):
-        """Add an address to freeze"""
-        self.frozen_addresses[address] = (value, value_type)
-        
-    def remove_frozen_address(self, address):
-        """Remove frozen address"""
-        if address in self.frozen_addresses:
-            del self.frozen_addresses[address]
-            
-    def freeze_loop(self):
-        """Keep writing frozen values (run in thread)"""
-        while self.running:
-            for address, (value, value_type) in self.frozen_addresses.items():
-                try:
-                    if value_type == 'int':
-                        self.memory_editor.write_int(address, value)
-                    elif value_type == 'float':
-                        self.memory_editor.write_float(address, value)
-                    elif value_type == 'long':
-                        self.memory_editor.write_long(address, value)
-                    elif value_type == 'double':
-                        self.memory_editor.write_double(address, value)
-                except:
-                    pass
-            import time
-            time.sleep(0.05)  # Update 20 times per second
-            
-    def start(self):
-        """Start freezing"""
-        if not self.running:
-            self.running = True
-            import threading
-            threading.Thread(target=self.freeze_loop, daemon=True).start()
-            
-    def stop(self):
-        """Stop freezing"""
-        self.running = False
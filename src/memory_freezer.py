@@ -0,0 +1,333 @@
+"""
+Memory Freezer Module - keeps frozen values written back on a schedule
+Every frozen address has its own interval and sits in a heap ordered by its
+next deadline; the freezer thread sleeps until the earliest one is due.
+Values are packed once when frozen, due writes to contiguous addresses are
+merged into one write, and read-compare entries are only written when the
+target has changed them. The registry is copy-on-write, so the freezer
+thread reads it without locking. Entries frozen through a pointer chain
+re-resolve it before each write (cached levels, re-read on TTL expiry)
+and follow the value when the chain moves.
+"""
+
+from array import array
+import ctypes
+import heapq
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from scan_kernels import pack_value
+
+logger = logging.getLogger(__name__)
+
+IS_WINDOWS = os.name == 'nt'
+
+# Rewrite interval used when none is given (20 times per second)
+DEFAULT_FREEZE_INTERVAL = 0.05
+
+# Shortest supported interval
+MIN_FREEZE_INTERVAL = 0.001
+
+# Entries due within this many seconds of each other are written together
+COALESCE_WINDOW = 0.0005
+
+# Below this interval Windows needs a 1 ms system timer to sleep accurately
+FINE_TIMER_INTERVAL = 0.016
+
+# Jitter samples kept per entry (a power of two)
+JITTER_SAMPLES = 1024
+_JITTER_MASK = JITTER_SAMPLES - 1
+
+
+class FreezeStats:
+    """
+    Counters and a jitter ring buffer for one frozen entry
+    races counts ticks where the value had been changed by the target before
+    our write; it is only observed for read-compare entries.
+    Jitter is how late a tick ran versus its deadline, in seconds; slightly
+    negative when the tick was pulled forward to share a coalesced pass.
+    """
+
+    __slots__ = ('ticks', 'writes', 'failures', 'races', 'jitter')
+
+    def __init__(self):
+        self.ticks = 0
+        self.writes = 0
+        self.failures = 0
+        self.races = 0
+        self.jitter = array('d', bytes(8 * JITTER_SAMPLES))
+
+    def samples(self):
+        """The jitter samples currently held"""
+        return self.jitter[:min(self.ticks, JITTER_SAMPLES)]
+
+    def summary(self):
+        return summarize_stats([self])
+
+
+def summarize_stats(stats):
+    """Combined counters and jitter min/avg/p99 (seconds) for several FreezeStats"""
+    samples = sorted(sample for entry in stats for sample in entry.samples())
+    summary = {
+        'ticks': sum(entry.ticks for entry in stats),
+        'writes': sum(entry.writes for entry in stats),
+        'failures': sum(entry.failures for entry in stats),
+        'races': sum(entry.races for entry in stats),
+        'jitter_min': None,
+        'jitter_avg': None,
+        'jitter_p99': None,
+    }
+    if samples:
+        summary['jitter_min'] = samples[0]
+        summary['jitter_avg'] = sum(samples) / len(samples)
+        summary['jitter_p99'] = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return summary
+
+
+class FrozenEntry:
+    """A frozen address and its schedule"""
+
+    __slots__ = ('key', 'address', 'value', 'value_type', 'data', 'interval', 'read_compare', 'chain',
+                 'deadline', 'stats')
+
+    def __init__(self, address, value, value_type, interval, read_compare, chain=None):
+        self.key = address          # registry key: the address it was frozen at
+        self.address = address      # where it is written now
+        self.value = value
+        self.value_type = value_type
+        self.data = pack_value(value, value_type)
+        self.interval = max(MIN_FREEZE_INTERVAL, interval)
+        self.read_compare = read_compare
+        self.chain = chain          # PointerChain to follow, or None for a fixed address
+        self.deadline = 0.0
+        self.stats = FreezeStats()
+
+    @property
+    def end(self):
+        return self.address + len(self.data)
+
+
+def coalesce_writes(entries):
+    """
+    Merge entries into (address, bytes, entries) writes
+    Only exactly adjacent ranges are joined; bytes between two entries belong
+    to the game and must not be overwritten.
+    """
+    writes = []
+    members = []
+    run_end = None
+    for entry in sorted(entries, key=lambda entry: entry.address):
+        if members and entry.address != run_end:
+            writes.append((members[0].address, b''.join(m.data for m in members), members))
+            members = []
+        members.append(entry)
+        run_end = entry.end
+    if members:
+        writes.append((members[0].address, b''.join(m.data for m in members), members))
+    return writes
+
+
+class MemoryFreezer:
+    """
+    Keeps memory values frozen at specified values
+    The registry of frozen entries is an immutable mapping. Writers build a
+    new one under a writer-only lock and publish it with a single attribute
+    store; the freezer thread just loads the current mapping each pass and
+    never locks or copies it.
+    """
+
+    def __init__(self, memory_editor):
+        self.memory_editor = memory_editor
+        self.running = False
+        self._registry = MappingProxyType({})  # address: FrozenEntry, replaced on every change
+        self._write_lock = threading.Lock()     # serialises writers only
+        self._wakeup = threading.Event()
+        self._heap = []                         # (deadline, sequence, FrozenEntry), freezer thread only
+        self._sequence = 0
+        self._thread = None
+        self._fine_timer = False
+
+    @property
+    def frozen_addresses(self):
+        """Read-only snapshot of the frozen entries by address"""
+        return self._registry
+
+    def add_frozen_address(self, address, value, value_type, interval=DEFAULT_FREEZE_INTERVAL,
+                           read_compare=False, chain=None):
+        """
+        Add an address to freeze
+        interval: seconds between rewrites (1 ms and up)
+        read_compare: read the value first and only write it if it changed
+        chain: PointerChain that resolved to address; the freeze follows it
+        when it moves, but stays registered (and removable) under address
+        """
+        entry = FrozenEntry(address, value, value_type, interval, read_compare, chain)
+        self._publish(lambda entries: entries.__setitem__(address, entry))
+
+    def add_frozen_entries(self, entries):
+        """Add several FrozenEntry objects with a single registry update"""
+        self._publish(lambda registry: registry.update((entry.key, entry) for entry in entries))
+
+    def remove_frozen_address(self, address):
+        """Remove frozen address"""
+        self._publish(lambda entries: entries.pop(address, None))
+
+    def remove_frozen_addresses(self, addresses):
+        """Remove several frozen addresses with a single registry update"""
+        def remove(registry):
+            for address in addresses:
+                registry.pop(address, None)
+        self._publish(remove)
+
+    def get_stats(self):
+        """Per-address stats summaries of the frozen entries"""
+        return {address: entry.stats.summary() for address, entry in self._registry.items()}
+
+    def get_total_stats(self):
+        """Stats summary over every frozen entry"""
+        return summarize_stats([entry.stats for entry in self._registry.values()])
+
+    def freeze_loop(self):
+        """Write values back as their deadlines come up (run in thread)"""
+        self._heap = []
+        known = MappingProxyType({})
+        while self.running:
+            try:
+                # Clear before loading so a publish during this pass wakes the wait below
+                self._wakeup.clear()
+                registry = self._registry
+                if registry is not known:
+                    # New or replaced entries are written on this pass; removed ones
+                    # drop out of the heap when they come up
+                    now = time.monotonic()
+                    for address, entry in registry.items():
+                        if known.get(address) is not entry:
+                            self._schedule(entry, now)
+                    known = registry
+
+                now = time.monotonic()
+                due = self._pop_due(registry, now)
+                if due:
+                    self._write_entries(self._follow_chains(due, now))
+                    continue
+                self._wakeup.wait(self._heap[0][0] - now if self._heap else None)
+            except Exception:
+                # A bad entry or chain must not end every freeze with the thread
+                logger.exception("Freeze pass failed")
+                self._wakeup.wait(MIN_FREEZE_INTERVAL)
+
+    def start(self):
+        """Start freezing"""
+        if not self.running:
+            if self._thread is not None:
+                # Let a previous loop notice the stop before starting another
+                self._thread.join(1.0)
+            self.running = True
+            with self._write_lock:
+                self._update_timer_resolution(self._registry)
+            self._thread = threading.Thread(target=self.freeze_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop freezing"""
+        self.running = False
+        self._wakeup.set()
+        with self._write_lock:
+            self._set_fine_timer(False)
+
+    def _publish(self, change):
+        """Apply change() to a copy of the registry and swap it in"""
+        with self._write_lock:
+            entries = dict(self._registry)
+            change(entries)
+            self._registry = MappingProxyType(entries)
+            self._update_timer_resolution(entries)
+        self._wakeup.set()
+
+    def _schedule(self, entry, deadline):
+        entry.deadline = deadline
+        self._sequence += 1
+        heapq.heappush(self._heap, (deadline, self._sequence, entry))
+
+    def _pop_due(self, registry, now):
+        """Take every live entry due by now (plus the coalescing window) and reschedule it"""
+        due = []
+        horizon = now + COALESCE_WINDOW
+        heap = self._heap
+        while heap and heap[0][0] <= horizon:
+            _, _, entry = heapq.heappop(heap)
+            if registry.get(entry.key) is not entry:
+                # Removed or replaced since it was scheduled
+                continue
+            due.append(entry)
+            stats = entry.stats
+            stats.jitter[stats.ticks & _JITTER_MASK] = now - entry.deadline
+            stats.ticks += 1
+            deadline = entry.deadline + entry.interval
+            if deadline < now:
+                # Fell behind (suspended, slow write); don't burst to catch up
+                deadline = now + entry.interval
+            self._schedule(entry, deadline)
+        return due
+
+    def _follow_chains(self, entries, now):
+        """Move chained entries to where their chain points now; drops those that don't resolve"""
+        followed = []
+        for entry in entries:
+            if entry.chain is not None:
+                address = entry.chain.resolve(now)
+                if address is None:
+                    entry.stats.failures += 1
+                    continue
+                entry.address = address
+            followed.append(entry)
+        return followed
+
+    def _write_entries(self, entries):
+        """Write due entries, skipping read-compare ones that still hold their value"""
+        compare = [entry for entry in entries if entry.read_compare]
+        if compare:
+            entries = [entry for entry in entries if not entry.read_compare]
+            for address, data, members in coalesce_writes(compare):
+                current = self.memory_editor.read_memory(address, len(data))
+                if current == data:
+                    continue
+                for entry in members:
+                    offset = entry.address - address
+                    if current is None:
+                        entries.append(entry)
+                    elif current[offset:offset + len(entry.data)] != entry.data:
+                        entry.stats.races += 1
+                        entries.append(entry)
+
+        for address, data, members in coalesce_writes(entries):
+            try:
+                written = self.memory_editor.write_memory(address, data)
+            except (OSError, ValueError, ctypes.ArgumentError):
+                written = False
+            for entry in members:
+                if written:
+                    entry.stats.writes += 1
+                else:
+                    entry.stats.failures += 1
+                    if entry.chain is not None:
+                        # Re-walk the whole chain next tick instead of waiting for the TTL
+                        entry.chain.invalidate()
+
+    def _update_timer_resolution(self, entries):
+        """Use a 1 ms Windows timer only while a short interval is frozen (writer lock held)"""
+        fine = self.running and any(entry.interval < FINE_TIMER_INTERVAL for entry in entries.values())
+        self._set_fine_timer(fine)
+
+    def _set_fine_timer(self, enabled):
+        if not IS_WINDOWS or enabled == self._fine_timer:
+            return
+        winmm = ctypes.windll.winmm
+        if enabled:
+            winmm.timeBeginPeriod(1)
+        else:
+            winmm.timeEndPeriod(1)
+        self._fine_timer = enabled
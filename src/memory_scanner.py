@@ -0,0 +1,294 @@
+"""
+Memory Scanner Module - First Scan / Next Scan sessions
+Keeps the candidate address set between scans so each pass only re-reads
+the addresses that are still in play. Unknown initial value scans start
+from an on-disk snapshot instead of a candidate set.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from memory_snapshot import MemorySnapshot
+from parallel_scan import parallel_scan
+from scan_kernels import VALUE_TYPES, find_value, strided_view
+from scan_results import DEFAULT_MEMORY_LIMIT, ScanResultStore
+
+# Candidates closer than this are fetched with a single read
+MAX_READ_GAP = 64 * 1024
+
+# Next Scan predicates and how many operands they take
+SCAN_PREDICATES = {
+    'exact': 1,
+    'changed': 0,
+    'unchanged': 0,
+    'increased': 0,
+    'decreased': 0,
+    'increased_by': 1,
+    'decreased_by': 1,
+    'between': 2,
+}
+
+
+class ScanSession:
+    """Candidate addresses and their last seen values, narrowed by successive scans"""
+
+    def __init__(self, memory_editor, value_type='int', memory_limit=DEFAULT_MEMORY_LIMIT):
+        if value_type not in VALUE_TYPES:
+            raise ValueError(f"Unsupported scan type: {value_type}")
+        self.memory_editor = memory_editor
+        self.value_type = value_type
+        self.dtype = VALUE_TYPES[value_type][1]
+        self.memory_limit = memory_limit
+        self.results = ScanResultStore(self.dtype, memory_limit)
+        self.scan_count = 0
+        self.snapshot = None
+        self._owns_snapshot = False
+        self.alignment = None
+        self.stride = None
+
+    def __len__(self):
+        if self.snapshot is not None:
+            return self.snapshot_candidates()
+        return len(self.results)
+
+    def reset(self):
+        """Forget all candidates"""
+        self._drop_snapshot()
+        self.results.clear()
+        self.scan_count = 0
+
+    def first_scan(self, value, start_address=0x10000, end_address=None, alignment=None,
+                   stride=None, workers=None, avoid_cpus=None, **region_filters):
+        """
+        Scan the target for an exact value and keep every hit as a candidate
+        region_filters: writable/private/image/mapped, see MemoryEditor.get_memory_regions
+        workers: scan in a pool of this many processes (see parallel_scan);
+        avoid_cpus keeps those workers off the game's cores
+        Returns the number of candidates
+        """
+        editor = self.memory_editor
+        regions = editor.get_memory_regions(start_address, end_address, **region_filters)
+
+        self.reset()
+        typed_value = self.dtype.type(value)
+        if workers and workers > 1:
+            chunks = parallel_scan(editor.pid, value, self.value_type, regions, workers,
+                                   avoid_cpus, alignment, stride)
+            try:
+                self._store_hits(chunks, typed_value)
+            except PermissionError:
+                # The workers couldn't open the target; our own handle still can
+                self.results.clear()
+                self._store_hits(self._scan_blocks(regions, value, alignment, stride), typed_value)
+        else:
+            self._store_hits(self._scan_blocks(regions, value, alignment, stride), typed_value)
+
+        self.scan_count = 1
+        return len(self.results)
+
+    def _store_hits(self, chunks, typed_value):
+        """Keep every address array from chunks as a candidate holding typed_value"""
+        for addresses in chunks:
+            self.results.append(addresses, np.full(len(addresses), typed_value, dtype=self.dtype))
+
+    def _scan_blocks(self, regions, value, alignment, stride):
+        """Single-process first scan; yields sorted uint64 address arrays"""
+        editor = self.memory_editor
+        for address, view, owned in editor.iter_memory_blocks(regions, overlap=self.dtype.itemsize - 1):
+            offsets = find_value(view, value, self.value_type, address, alignment, stride, owned)
+            if len(offsets):
+                yield offsets.astype(np.uint64) + np.uint64(address)
+
+    def first_scan_unknown(self, snapshot_path=None, start_address=0x10000, end_address=None,
+                           alignment=None, stride=None, **region_filters):
+        """
+        Unknown initial value scan: snapshot every readable region to disk
+        The next scan compares live memory against the snapshot and turns the
+        survivors into a regular candidate set. Without `snapshot_path` the
+        snapshot goes to a temporary file that is removed afterwards.
+        Returns the number of candidate positions
+        """
+        editor = self.memory_editor
+        regions = editor.get_memory_regions(start_address, end_address, **region_filters)
+
+        self.reset()
+        owned = snapshot_path is None
+        if owned:
+            fd, snapshot_path = tempfile.mkstemp(prefix='thalix-', suffix='.snapshot')
+            os.close(fd)
+        try:
+            snapshot = MemorySnapshot.capture(editor, snapshot_path, regions)
+        except Exception:
+            if owned:
+                os.remove(snapshot_path)
+            raise
+        self._use_snapshot(snapshot, owned, alignment, stride)
+        return len(self)
+
+    def load_snapshot(self, snapshot_path, alignment=None, stride=None):
+        """Resume an unknown initial value scan from a saved snapshot file"""
+        self.reset()
+        self._use_snapshot(MemorySnapshot(snapshot_path), False, alignment, stride)
+        return len(self)
+
+    def _use_snapshot(self, snapshot, owned, alignment, stride):
+        self.snapshot = snapshot
+        self._owns_snapshot = owned
+        self.alignment = alignment
+        self.stride = stride
+        self.scan_count = 1
+
+    def _drop_snapshot(self):
+        """Close the snapshot, deleting it if this session created it"""
+        if self.snapshot is None:
+            return
+        self.snapshot.close()
+        if self._owns_snapshot:
+            try:
+                os.remove(self.snapshot.path)
+            except OSError:
+                pass
+        self.snapshot = None
+        self._owns_snapshot = False
+
+    def snapshot_candidates(self):
+        """Number of aligned positions covered by the snapshot"""
+        size = self.dtype.itemsize
+        stride = self.stride or self.alignment or size
+        return sum(max(0, (region.size - size) // stride + 1) for region in self.snapshot.regions)
+
+    def next_scan(self, predicate, value=None, value2=None):
+        """
+        Re-read the candidates and keep those matching the predicate
+        predicate: one of SCAN_PREDICATES; 'between' keeps value <= x <= value2
+        Returns the number of candidates left
+        """
+        if predicate not in SCAN_PREDICATES:
+            raise ValueError(f"Unknown scan predicate: {predicate}")
+        if SCAN_PREDICATES[predicate] >= 1 and value is None:
+            raise ValueError(f"'{predicate}' needs a value")
+        if SCAN_PREDICATES[predicate] == 2 and value2 is None:
+            raise ValueError(f"'{predicate}' needs two values")
+
+        if self.snapshot is not None:
+            return self._next_scan_snapshot(predicate, value, value2)
+
+        def keep(addresses, previous):
+            current, valid = read_values(self.memory_editor, addresses, self.dtype)
+            mask = self._evaluate(predicate, current, previous, value, value2)
+            return mask & valid, current
+
+        # Streams the candidates chunk by chunk, compacting survivors in place
+        count = self.results.filter(keep)
+        self.scan_count += 1
+        return count
+
+    def _next_scan_snapshot(self, predicate, value, value2):
+        """Compare live memory with the snapshot, region by region"""
+        editor = self.memory_editor
+        snapshot = self.snapshot
+        size = self.dtype.itemsize
+        results = ScanResultStore(self.dtype, self.memory_limit)
+
+        for region in snapshot.regions:
+            for address, view, owned in editor.iter_memory_blocks([region], overlap=size - 1):
+                current, first, stride = strided_view(view, self.dtype, address,
+                                                      self.alignment, self.stride, owned)
+                if not len(current):
+                    continue
+                old_view = snapshot.view(region, address, len(view))
+                previous = strided_view(old_view, self.dtype, address,
+                                        self.alignment, self.stride, owned)[0]
+                hits = np.flatnonzero(self._evaluate(predicate, current, previous, value, value2))
+                if len(hits):
+                    results.append((hits * stride + first).astype(np.uint64) + np.uint64(address),
+                                   current[hits])
+                del previous, old_view
+
+        self._drop_snapshot()
+        self.results.clear()
+        self.results = results
+        self.scan_count += 1
+        return len(self.results)
+
+    def _evaluate(self, predicate, current, previous, value, value2):
+        """Vectorized predicate over the current and previous values"""
+        is_float = self.dtype.kind == 'f'
+        if predicate == 'exact':
+            return current == self.dtype.type(value)
+        if predicate == 'changed':
+            return current != previous
+        if predicate == 'unchanged':
+            return current == previous
+        if predicate == 'increased':
+            return current > previous
+        if predicate == 'decreased':
+            return current < previous
+        if predicate in ('increased_by', 'decreased_by'):
+            delta = value if predicate == 'increased_by' else -value
+            if is_float:
+                return np.isclose(current - previous, delta)
+            # Widen so the difference can't wrap around
+            return current.astype(np.int64) - previous.astype(np.int64) == delta
+        low, high = sorted((value, value2))
+        return (current >= low) & (current <= high)
+
+
+def read_values(memory_editor, addresses, dtype):
+    """
+    Read one value per sorted address, fetching neighbouring addresses together
+    Returns (values, valid) where valid marks addresses that could be read
+    """
+    dtype = np.dtype(dtype)
+    size = dtype.itemsize
+    count = len(addresses)
+    values = np.zeros(count, dtype=dtype)
+    valid = np.zeros(count, dtype=bool)
+    if not count:
+        return values, valid
+
+    pool = memory_editor.buffer_pool
+    buffer = pool.acquire()
+    block_size = len(buffer)
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    widths = np.arange(size)
+
+    # Split wherever the gap to the next candidate is too big to read through
+    breaks = np.flatnonzero(np.diff(addresses) > MAX_READ_GAP) + 1
+    span_starts = np.concatenate(([0], breaks))
+    span_ends = np.concatenate((breaks, [count]))
+
+    try:
+        for span_start, span_end in zip(span_starts.tolist(), span_ends.tolist()):
+            i = span_start
+            while i < span_end:
+                base = int(addresses[i])
+                # Candidates that fit into one buffer from here
+                j = i + int(np.searchsorted(addresses[i:span_end], base + block_size - size, 'right'))
+                length = int(addresses[j - 1]) - base + size
+                read = memory_editor.read_into(base, buffer, length)
+
+                offsets = (addresses[i:j] - np.uint64(base)).astype(np.int64)
+                readable = i + int(np.count_nonzero(offsets + size <= read))
+                if readable > i:
+                    gathered = raw[offsets[:readable - i, None] + widths]
+                    values[i:readable] = gathered.view(dtype).ravel()
+                    valid[i:readable] = True
+                if readable == j:
+                    i = j
+                    continue
+                # The block read stopped at or after the candidate at `readable`
+                # (a hole further on, or an all-or-nothing read); only its own
+                # read decides whether it is lost, then block reads resume after it
+                address = int(addresses[readable])
+                if memory_editor.read_into(address, buffer, size) == size:
+                    values[readable] = raw[:size].view(dtype)[0]
+                    valid[readable] = True
+                i = readable + 1
+    finally:
+        del raw
+        pool.release(buffer)
+
+    return values, valid
@@ -0,0 +1,130 @@
+"""
+Memory Snapshot Module - on-disk copies of a process's readable memory
+Used by unknown initial value scans; snapshots are compared through mmap
+so they never have to fit in RAM.
+
+File layout (little endian):
+    header   magic(8) version(u32) region_count(u32) table_offset(u64)
+    data     raw region bytes, each region starting on an 8-byte boundary
+    table    region_count x (base u64, size u64, file_offset u64, protect 4s)
+"""
+
+import mmap
+import struct
+
+SNAPSHOT_MAGIC = b'THXSNAP1'
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<8sIIQ')
+_REGION = struct.Struct('<QQQ4s')
+
+
+class SnapshotRegion:
+    """A contiguous range of captured memory and where it lives in the file"""
+
+    __slots__ = ('base', 'size', 'file_offset', 'protect')
+
+    def __init__(self, base, size, file_offset, protect):
+        self.base = base
+        self.size = size
+        self.file_offset = file_offset
+        self.protect = protect
+
+    @property
+    def end(self):
+        return self.base + self.size
+
+    def __repr__(self):
+        return f"SnapshotRegion(0x{self.base:X}-0x{self.end:X}, {self.protect})"
+
+
+class MemorySnapshot:
+    """Read-only, memory-mapped view of a snapshot file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.regions = []
+        self._file = None
+        self._map = None
+        self._open()
+
+    @classmethod
+    def capture(cls, memory_editor, path, regions):
+        """Stream every readable byte of `regions` to `path` and open the result"""
+        table = []
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, 0))
+            for region in regions:
+                span = None
+                for address, view, owned in memory_editor.iter_memory_blocks([region]):
+                    # Unreadable pages split a region into several spans
+                    if span is None or span.end != address:
+                        padding = -f.tell() % 8
+                        if padding:
+                            f.write(b'\0' * padding)
+                        span = SnapshotRegion(address, 0, f.tell(), region.protect)
+                        table.append(span)
+                    f.write(view[:owned])
+                    span.size += owned
+
+            table_offset = f.tell()
+            for span in table:
+                f.write(_REGION.pack(span.base, span.size, span.file_offset,
+                                     span.protect.encode('ascii')[:4]))
+            f.seek(0)
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(table), table_offset))
+        return cls(path)
+
+    def _open(self):
+        """Map the file and load its region table"""
+        self._file = open(self.path, 'rb')
+        try:
+            header = self._file.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError(f"Not a memory snapshot: {self.path}")
+            magic, version, count, table_offset = _HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"Not a memory snapshot: {self.path}")
+
+            self._file.seek(table_offset)
+            table = self._file.read(count * _REGION.size)
+            for base, size, file_offset, protect in _REGION.iter_unpack(table):
+                self.regions.append(SnapshotRegion(base, size, file_offset,
+                                                   protect.rstrip(b'\0').decode('ascii')))
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+    @property
+    def total_size(self):
+        """Number of captured bytes"""
+        return sum(region.size for region in self.regions)
+
+    def view(self, region, address=None, size=None):
+        """memoryview of captured bytes for a region (or a sub-range of it)"""
+        start = region.file_offset
+        if address is not None:
+            start += address - region.base
+        if size is None:
+            size = region.file_offset + region.size - start
+        return memoryview(self._map)[start:start + size]
+
+    def close(self):
+        """Unmap and close the file"""
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a view; the map goes when it does
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
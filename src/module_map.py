@@ -0,0 +1,196 @@
+"""
+Module Map - name -> base/size of the modules loaded in a target process
+Built once from the OS module list (Windows) or /proc/<pid>/maps (Linux)
+and reused until the process restarts or its module set changes. Lookups
+re-check the module set at most once per MODULE_RECHECK_INTERVAL, so a
+module unloaded and loaded again at another base is picked up.
+"""
+
+import ctypes
+from ctypes import wintypes
+import os
+import time
+
+IS_WINDOWS = os.name == 'nt'
+
+LIST_MODULES_ALL = 0x03
+
+# Seconds a found module's base is trusted before the module set is checked again
+MODULE_RECHECK_INTERVAL = 1.0
+
+
+class MODULEINFO(ctypes.Structure):
+    _fields_ = [
+        ('lpBaseOfDll', ctypes.c_void_p),
+        ('SizeOfImage', wintypes.DWORD),
+        ('EntryPoint', ctypes.c_void_p),
+    ]
+
+
+class ModuleInfo:
+    """A loaded module"""
+
+    __slots__ = ('name', 'base', 'size', 'path')
+
+    def __init__(self, name, base, size, path=''):
+        self.name = name
+        self.base = base
+        self.size = size
+        self.path = path
+
+    @property
+    def end(self):
+        return self.base + self.size
+
+    def __repr__(self):
+        return f"ModuleInfo({self.name}, 0x{self.base:X}, size=0x{self.size:X})"
+
+
+class ModuleMap:
+    """Cached module lookup for one process"""
+
+    def __init__(self, pid, process_handle=None):
+        self.pid = pid
+        self.process_handle = process_handle
+        self.modules = {}      # lower-case name -> ModuleInfo
+        self._signature = None
+        self._start_time = None
+        self._checked_at = float('-inf')
+        if IS_WINDOWS:
+            self.psapi = ctypes.windll.psapi
+            self.psapi.EnumProcessModulesEx.argtypes = [
+                wintypes.HANDLE, ctypes.POINTER(wintypes.HMODULE), wintypes.DWORD,
+                ctypes.POINTER(wintypes.DWORD), wintypes.DWORD]
+            self.psapi.GetModuleBaseNameW.argtypes = [
+                wintypes.HANDLE, wintypes.HMODULE, wintypes.LPWSTR, wintypes.DWORD]
+            self.psapi.GetModuleFileNameExW.argtypes = [
+                wintypes.HANDLE, wintypes.HMODULE, wintypes.LPWSTR, wintypes.DWORD]
+            self.psapi.GetModuleInformation.argtypes = [
+                wintypes.HANDLE, wintypes.HMODULE, ctypes.POINTER(MODULEINFO), wintypes.DWORD]
+
+    def get(self, name):
+        """ModuleInfo for a module name (case-insensitive), or None"""
+        key = name.lower()
+        module = self.modules.get(key)
+        if module is not None and time.monotonic() - self._checked_at < MODULE_RECHECK_INTERVAL:
+            return module
+        # Unknown name: the module may have been loaded since the last build;
+        # a known one may have been unloaded and loaded again elsewhere
+        self.refresh()
+        return self.modules.get(key)
+
+    def base_of(self, name):
+        """Base address of a module, or None"""
+        module = self.get(name)
+        return module.base if module else None
+
+    def find_address(self, address):
+        """Module containing an address, or None"""
+        for module in self.modules.values():
+            if module.base <= address < module.end:
+                return module
+        return None
+
+    def refresh(self, force=False):
+        """Rebuild the map if the process restarted or its modules changed; True if rebuilt"""
+        start_time = self._process_start_time()
+        signature = self._module_signature()
+        self._checked_at = time.monotonic()
+        if (not force and self.modules and start_time == self._start_time
+                and signature is not None and signature == self._signature):
+            return False
+        self.modules = self._enumerate()
+        self._start_time = start_time
+        self._signature = signature
+        return True
+
+    def _process_start_time(self):
+        """Identifies the process instance behind the pid"""
+        if IS_WINDOWS:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/stat", 'rb') as f:
+                stat = f.read()
+            # Field 22 (starttime), counted after the parenthesised command name
+            return int(stat[stat.rindex(b')') + 2:].split()[19])
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _module_signature(self):
+        """Cheap fingerprint of the loaded module set"""
+        if IS_WINDOWS:
+            handles = self._module_handles()
+            return tuple(handles) if handles else None
+        try:
+            # The maps file changes whenever a module is (un)loaded, also when
+            # one comes back at another base with the same line lengths
+            with open(f"/proc/{self.pid}/maps", 'rb') as f:
+                return hash(f.read())
+        except OSError:
+            return None
+
+    def _module_handles(self):
+        if not self.process_handle:
+            return []
+        needed = wintypes.DWORD(0)
+        count = 256
+        while True:
+            handles = (wintypes.HMODULE * count)()
+            if not self.psapi.EnumProcessModulesEx(self.process_handle, handles, ctypes.sizeof(handles),
+                                                   ctypes.byref(needed), LIST_MODULES_ALL):
+                return []
+            total = needed.value // ctypes.sizeof(wintypes.HMODULE)
+            if total <= count:
+                return [handles[i] for i in range(total)]
+            count = total
+
+    def _enumerate(self):
+        if IS_WINDOWS:
+            return self._enumerate_windows()
+        return self._enumerate_linux()
+
+    def _enumerate_windows(self):
+        modules = {}
+        name_buffer = ctypes.create_unicode_buffer(260)
+        path_buffer = ctypes.create_unicode_buffer(1024)
+        info = MODULEINFO()
+        for handle in self._module_handles():
+            if not self.psapi.GetModuleBaseNameW(self.process_handle, handle, name_buffer, len(name_buffer)):
+                continue
+            if not self.psapi.GetModuleInformation(self.process_handle, handle, ctypes.byref(info),
+                                                   ctypes.sizeof(info)):
+                continue
+            self.psapi.GetModuleFileNameExW(self.process_handle, handle, path_buffer, len(path_buffer))
+            name = name_buffer.value
+            modules.setdefault(name.lower(), ModuleInfo(name, info.lpBaseOfDll or 0, info.SizeOfImage,
+                                                        path_buffer.value))
+        return modules
+
+    def _enumerate_linux(self):
+        """Group file-backed mappings by file; the lowest mapping is the base"""
+        modules = {}
+        try:
+            with open(f"/proc/{self.pid}/maps", 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            return modules
+
+        for line in lines:
+            parts = line.split(None, 5)
+            if len(parts) < 6 or parts[4] == '0':
+                continue
+            path = parts[5].strip()
+            if not path.startswith('/'):
+                continue
+            start_str, end_str = parts[0].split('-')
+            start = int(start_str, 16)
+            end = int(end_str, 16)
+            name = os.path.basename(path)
+            module = modules.get(name.lower())
+            if module is None:
+                modules[name.lower()] = ModuleInfo(name, start, end - start, path)
+            elif module.path == path:
+                base = min(module.base, start)
+                module.size = max(module.end, end) - base
+                module.base = base
+        return modules
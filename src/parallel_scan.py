@@ -0,0 +1,131 @@
+"""
+Parallel Scan Module - multi-process first scans
+Splits the target's regions into work units and scans them in a process
+pool; every worker opens its own handle (or /proc mem fd) to the target.
+A worker that can't open it fails its units with PermissionError instead
+of reporting them as empty.
+"""
+
+import concurrent.futures
+
+import numpy as np
+import psutil
+
+from memory_editor import MemoryEditor, MemoryRegion
+from scan_kernels import find_value, value_size
+
+# Bytes of target memory per work unit
+DEFAULT_UNIT_SIZE = 64 * 1024 * 1024
+
+_worker_editor = None
+_worker_pid = None
+
+
+def _init_worker(pid, cpus):
+    """Open the target once per worker and optionally pin the worker"""
+    global _worker_editor, _worker_pid
+    _worker_pid = pid
+    if cpus:
+        try:
+            psutil.Process().cpu_affinity(cpus)
+        except (psutil.AccessDenied, ValueError, AttributeError):
+            pass
+    _worker_editor = MemoryEditor()
+    if not _worker_editor.open_process(pid):
+        _worker_editor = None
+
+
+def _scan_unit(unit, value, value_type, alignment, stride):
+    """Scan one work unit; returns (unit index, sorted uint64 addresses)"""
+    index, start, owned_end, read_end = unit
+    if _worker_editor is None:
+        # An empty result here would read as "no hits" to the caller
+        raise PermissionError(f"Scan worker could not open process {_worker_pid}")
+
+    region = MemoryRegion(start, read_end - start, 'r--', 'private')
+    chunks = []
+    overlap = value_size(value_type) - 1
+    for address, view, owned in _worker_editor.iter_memory_blocks([region], overlap=overlap):
+        # Starts past owned_end belong to the next unit
+        owned = min(owned, owned_end - address)
+        if owned <= 0:
+            break
+        offsets = find_value(view, value, value_type, address, alignment, stride, owned)
+        if len(offsets):
+            chunks.append(offsets.astype(np.uint64) + np.uint64(address))
+    if not chunks:
+        return index, np.empty(0, dtype=np.uint64)
+    return index, np.concatenate(chunks)
+
+
+def split_work_units(regions, overlap, unit_size=DEFAULT_UNIT_SIZE):
+    """
+    Cut regions into (index, start, owned_end, read_end) units
+    Adjacent regions are merged first; a unit owns match starts in
+    [start, owned_end) and reads `overlap` bytes past it to catch values
+    straddling the cut.
+    """
+    runs = []
+    for region in regions:
+        if runs and runs[-1][1] == region.base:
+            runs[-1][1] = region.end
+        else:
+            runs.append([region.base, region.end])
+
+    units = []
+    for run_start, run_end in runs:
+        start = run_start
+        while start < run_end:
+            owned_end = min(run_end, start + unit_size)
+            units.append((len(units), start, owned_end, min(run_end, owned_end + overlap)))
+            start = owned_end
+    return units
+
+
+def worker_cpus(avoid_cpus=None):
+    """CPUs scan workers may use: everything except `avoid_cpus`, if that leaves any"""
+    try:
+        cpus = psutil.Process().cpu_affinity()
+    except (psutil.AccessDenied, AttributeError):
+        cpus = list(range(psutil.cpu_count() or 1))
+    if avoid_cpus:
+        avoid = set(avoid_cpus)
+        remaining = [cpu for cpu in cpus if cpu not in avoid]
+        if remaining:
+            return remaining
+    return cpus
+
+
+def parallel_scan(pid, value, value_type, regions, workers=None, avoid_cpus=None,
+                  alignment=None, stride=None, unit_size=DEFAULT_UNIT_SIZE):
+    """
+    Scan regions of process `pid` for an exact value across a process pool
+    workers: pool size (default: one per usable CPU)
+    avoid_cpus: CPUs reserved for the game; workers are pinned to the others
+    Yields sorted uint64 address arrays in address order
+    Raises PermissionError if the workers can't open the target
+    """
+    cpus = worker_cpus(avoid_cpus)
+    if workers is None:
+        workers = len(cpus)
+    workers = max(1, workers)
+    units = split_work_units(regions, value_size(value_type) - 1, unit_size)
+    if not units:
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(pid, cpus)) as pool:
+        futures = [pool.submit(_scan_unit, unit, value, value_type, alignment, stride)
+                   for unit in units]
+        # Hand results back in unit order as soon as each prefix is complete
+        pending = {}
+        next_index = 0
+        for future in concurrent.futures.as_completed(futures):
+            index, addresses = future.result()
+            pending[index] = addresses
+            while next_index in pending:
+                addresses = pending.pop(next_index)
+                next_index += 1
+                if len(addresses):
+                    yield addresses
+
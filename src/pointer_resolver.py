@@ -0,0 +1,152 @@
+"""
+Pointer Resolver - compiled multi-level pointer chains with cached levels
+Chains are compiled into a shared tree, so entries with a common base and
+leading offsets read those levels once. Intermediate pointers are cached
+and only re-read when they expire; if one changed, the levels below it
+are re-walked and everything above is kept. The tree is shared between
+threads (the GUI compiles chains while the freezer resolves them), so every
+public method holds the resolver's lock.
+"""
+
+import threading
+import time
+
+# Seconds an intermediate pointer is trusted before it is re-read
+DEFAULT_POINTER_TTL = 2.0
+
+
+class PointerNode:
+    """One dereference level: the pointer stored at parent + offset"""
+
+    __slots__ = ('parent', 'offset', 'value', 'checked_at', 'children')
+
+    def __init__(self, parent, offset):
+        self.parent = parent
+        self.offset = offset
+        self.value = None
+        self.checked_at = float('-inf')
+        self.children = {}
+
+
+class PointerChain:
+    """A compiled chain; resolve() returns the final address"""
+
+    __slots__ = ('resolver', 'base', 'offsets', 'nodes', 'final_offset')
+
+    def __init__(self, resolver, base, offsets, nodes):
+        self.resolver = resolver
+        self.base = base
+        self.offsets = offsets
+        self.nodes = nodes
+        self.final_offset = offsets[-1] if offsets else 0
+
+    def resolve(self, now=None):
+        return self.resolver.resolve(self, now)
+
+    def invalidate(self):
+        self.resolver.invalidate(self)
+
+
+class PointerResolver:
+    """Compiles chains into a shared tree and resolves them with cached levels"""
+
+    def __init__(self, memory_editor, ttl=DEFAULT_POINTER_TTL):
+        self.memory_editor = memory_editor
+        self.ttl = ttl
+        self.roots = {}   # base address -> root node (value is the base itself)
+        self.chains = {}  # (base, offsets) -> PointerChain
+        self.reads = 0    # pointer reads issued, for diagnostics
+        self._lock = threading.Lock()
+
+    def compile(self, base, offsets):
+        """
+        Get the compiled chain for base + offsets
+        Same semantics as MemoryEditor.read_pointer_chain: every offset but the
+        last selects a pointer to follow, the last is added to the result.
+        """
+        offsets = tuple(offsets)
+        key = (base, offsets)
+        with self._lock:
+            chain = self.chains.get(key)
+            if chain is None:
+                chain = self._compile(base, offsets)
+                self.chains[key] = chain
+            return chain
+
+    def _compile(self, base, offsets):
+        """Add the chain's levels to the tree (lock held)"""
+        root = self.roots.get(base)
+        if root is None:
+            root = PointerNode(None, 0)
+            root.value = base
+            root.checked_at = float('inf')
+            self.roots[base] = root
+
+        nodes = []
+        node = root
+        for offset in offsets[:-1]:
+            child = node.children.get(offset)
+            if child is None:
+                child = PointerNode(node, offset)
+                node.children[offset] = child
+            nodes.append(child)
+            node = child
+        return PointerChain(self, base, offsets, nodes)
+
+    def resolve(self, chain, now=None):
+        """Final address of a chain, or None if a level can't be read"""
+        with self._lock:
+            return self._resolve(chain, now)
+
+    def _resolve(self, chain, now):
+        if not chain.nodes:
+            return chain.base + chain.final_offset
+        if now is None:
+            now = time.monotonic()
+        for node in chain.nodes:
+            if now - node.checked_at > self.ttl:
+                self._refresh(node, now)
+            if node.value is None:
+                return None
+        return chain.nodes[-1].value + chain.final_offset
+
+    def resolve_many(self, chains):
+        """Resolve several chains in one pass; shared levels are read at most once"""
+        now = time.monotonic()
+        with self._lock:
+            return [self._resolve(chain, now) for chain in chains]
+
+    def invalidate(self, chain=None):
+        """Force a re-walk of one chain (e.g. after a failed value read), or of all chains"""
+        with self._lock:
+            if chain is None:
+                for root in self.roots.values():
+                    self._expire(root, include_self=False)
+                return
+            for node in chain.nodes:
+                node.checked_at = float('-inf')
+
+    def clear(self):
+        """Drop every compiled chain (e.g. when the target restarts)"""
+        with self._lock:
+            self.roots.clear()
+            self.chains.clear()
+
+    def _refresh(self, node, now):
+        """Re-read one level; descendants are re-walked if it moved"""
+        parent = node.parent
+        value = None
+        if parent.value is not None:
+            self.reads += 1
+            value = self.memory_editor.read_pointer(parent.value + node.offset)
+        if value != node.value:
+            for child in node.children.values():
+                self._expire(child)
+        node.value = value
+        node.checked_at = now
+
+    def _expire(self, node, include_self=True):
+        if include_self:
+            node.checked_at = float('-inf')
+        for child in node.children.values():
+            self._expire(child)
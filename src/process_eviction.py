@@ -0,0 +1,310 @@
+"""
+Process Eviction - moves every other process off the game's cores
+The game keeps its CPUs to itself: all other processes we are allowed to
+change get their affinity reduced to the remaining CPUs. Original
+affinities are written to a journal before anything is changed, so they
+are put back on stop, at exit, or on the next start after a crash.
+On Linux processes are read straight from /proc (one stat read and one
+affinity call per new PID), so a sweep over hundreds of processes only
+does work for the ones that started since the last sweep.
+"""
+
+import atexit
+import ctypes
+from ctypes import wintypes
+import json
+import os
+import threading
+
+import psutil
+
+from journal import write_journal
+from process_watcher import ProcessWatcher
+
+IS_WINDOWS = os.name == 'nt'
+
+# Seconds between sweeps for new processes (the watcher, when given, is faster)
+DEFAULT_SWEEP_INTERVAL = 1.0
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.thalix', 'eviction.json')
+
+# /proc/<pid>/stat flag of kernel threads
+PF_KTHREAD = 0x00200000
+
+PROCESS_SET_INFORMATION = 0x0200
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+if IS_WINDOWS:
+    _kernel32 = ctypes.windll.kernel32
+    _kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.GetProcessAffinityMask.argtypes = [wintypes.HANDLE, ctypes.POINTER(ctypes.c_size_t),
+                                                 ctypes.POINTER(ctypes.c_size_t)]
+    _kernel32.SetProcessAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+    _kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE] + [ctypes.POINTER(wintypes.FILETIME)] * 4
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+
+def _mask_to_cpus(mask):
+    return [cpu for cpu in range(mask.bit_length()) if mask >> cpu & 1]
+
+
+def read_process_state(pid):
+    """
+    (start time, parent PID, CPUs) of a process we may change, or None
+    None for kernel threads, exited processes and processes we can't open.
+    The start time only identifies the process (PID reuse); its unit is
+    platform specific.
+    """
+    if IS_WINDOWS:
+        return _read_process_state_windows(pid)
+    try:
+        with open(f"/proc/{pid}/stat", 'rb') as f:
+            stat = f.read()
+        # Fields after the parenthesised name, which may itself contain spaces
+        fields = stat[stat.rindex(b')') + 2:].split()
+        if int(fields[6]) & PF_KTHREAD:
+            return None
+        return int(fields[19]), int(fields[1]), sorted(os.sched_getaffinity(pid))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _read_process_state_windows(pid):
+    handle = _kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_SET_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        process_mask = ctypes.c_size_t()
+        system_mask = ctypes.c_size_t()
+        if not _kernel32.GetProcessAffinityMask(handle, ctypes.byref(process_mask), ctypes.byref(system_mask)):
+            return None
+        created, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        if not _kernel32.GetProcessTimes(handle, ctypes.byref(created), ctypes.byref(exited),
+                                         ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        start = created.dwHighDateTime << 32 | created.dwLowDateTime
+    finally:
+        _kernel32.CloseHandle(handle)
+    try:
+        # Only asked once per new process
+        parent = psutil.Process(pid).ppid()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        parent = 0
+    return start, parent, _mask_to_cpus(process_mask.value)
+
+
+def list_pids():
+    """Every PID on the system"""
+    if IS_WINDOWS:
+        return set(psutil.pids())
+    return {int(name) for name in os.listdir('/proc') if name.isdigit()}
+
+
+def set_process_cpus(pid, cpus):
+    """Set the affinity of a whole process; False if it is gone or access was denied"""
+    if IS_WINDOWS:
+        handle = _kernel32.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            return bool(_kernel32.SetProcessAffinityMask(handle, sum(1 << cpu for cpu in cpus)))
+        finally:
+            _kernel32.CloseHandle(handle)
+    # Linux affinity is per thread; threads started later inherit it from the caller
+    try:
+        tids = [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        return False
+    changed = False
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, cpus)
+            changed = True
+        except OSError:
+            pass
+    return changed
+
+
+def restore_journal(path=DEFAULT_JOURNAL_PATH):
+    """
+    Put back the affinities recorded in a journal and delete it
+    Processes that exited, or whose PID now belongs to another process, are
+    skipped. Returns the number of processes restored.
+    """
+    try:
+        with open(path, 'r') as f:
+            journal = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError):
+        journal = {}
+    restored = 0
+    for pid_text, record in journal.get('processes', {}).items():
+        pid = int(pid_text)
+        state = read_process_state(pid)
+        if state is None or state[0] != record['start']:
+            continue
+        if set_process_cpus(pid, record['cpus']):
+            restored += 1
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return restored
+
+
+class ProcessEvictor:
+    """Keeps every other process off a reserved set of CPUs"""
+
+    def __init__(self, reserved_cpus, exclude_pids=(), journal_path=DEFAULT_JOURNAL_PATH,
+                 interval=DEFAULT_SWEEP_INTERVAL):
+        self.reserved = sorted(reserved_cpus)
+        self.exclude_pids = set(exclude_pids) | {os.getpid()}
+        self.journal_path = journal_path
+        self.interval = interval
+        self.evicted = {}   # pid -> {'start': ..., 'cpus': original CPUs, 'applied': CPUs we set}
+        self.failures = 0
+        self.running = False
+        self._seen = set()  # PIDs already looked at
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._watcher = None
+
+    def sweep(self):
+        """Evict processes that started since the last sweep; returns how many were moved"""
+        with self._lock:
+            pids = list_pids()
+            gone = self._seen - pids
+            self._seen -= gone
+            dirty = False
+            for pid in gone:
+                dirty |= self.evicted.pop(pid, None) is not None
+            return self._evict_new(pids - self._seen, dirty)
+
+    def evict_pid(self, pid):
+        """Evict one process right away (watcher callback)"""
+        with self._lock:
+            if pid not in self._seen:
+                self._evict_new([pid])
+
+    def _evict_new(self, pids, dirty=False):
+        """Journal, then move, the given PIDs; caller holds the lock"""
+        states = {}
+        for pid in pids:
+            self._seen.add(pid)
+            if pid not in self.exclude_pids:
+                state = read_process_state(pid)
+                if state is not None:
+                    states[pid] = state
+
+        reserved = set(self.reserved)
+        changes = []
+        # Parents first, so game helpers and inherited masks are recognised
+        # whatever order the PIDs came in
+        for pid in self._parents_first(states):
+            start, parent, cpus = states[pid]
+            if parent in self.exclude_pids:
+                # Helpers started by the game stay with it
+                self.exclude_pids.add(pid)
+                continue
+            parent_record = self.evicted.get(parent)
+            if parent_record is not None and cpus == parent_record['applied']:
+                # Inherited our mask from an evicted parent; restore it to the parent's original
+                original = parent_record['cpus']
+            else:
+                original = cpus
+            remaining = [cpu for cpu in cpus if cpu not in reserved]
+            if remaining == cpus or not remaining:
+                # Already off the reserved CPUs, or pinned to them on purpose
+                if original is not cpus:
+                    self.evicted[pid] = {'start': start, 'cpus': original, 'applied': cpus}
+                    dirty = True
+                continue
+            self.evicted[pid] = {'start': start, 'cpus': original, 'applied': remaining}
+            changes.append(pid)
+
+        if changes or dirty:
+            # Write-ahead: the journal is on disk before any affinity changes
+            self._save()
+        moved = 0
+        for pid in changes:
+            if set_process_cpus(pid, self.evicted[pid]['applied']):
+                moved += 1
+            else:
+                self.failures += 1
+                del self.evicted[pid]
+        if moved < len(changes):
+            self._save()
+        return moved
+
+    @staticmethod
+    def _parents_first(states):
+        """PIDs of states ordered so a parent in the batch comes before its children"""
+        order = []
+        done = set()
+        for pid in states:
+            chain = []
+            while pid in states and pid not in done:
+                done.add(pid)
+                chain.append(pid)
+                pid = states[pid][1]
+            order.extend(reversed(chain))
+        return order
+
+    def _save(self):
+        journal = {
+            'reserved': self.reserved,
+            'processes': {str(pid): {'start': record['start'], 'cpus': record['cpus']}
+                          for pid, record in self.evicted.items()},
+        }
+        write_journal(self.journal_path, journal)
+
+    def start(self, watch=True):
+        """
+        Evict everything now and keep evicting new processes
+        watch: also handle starts the moment they happen through a
+        ProcessWatcher; the periodic sweep runs either way as a backstop
+        """
+        if self.running:
+            return
+        # A journal left by a crash holds the true originals; undo it first
+        restore_journal(self.journal_path)
+        self.running = True
+        self._stop.clear()
+        atexit.register(self.stop)
+        self.sweep()
+        if watch:
+            self._watcher = ProcessWatcher()
+            try:
+                self._watcher.watch_all(lambda process: self.evict_pid(process.pid))
+            except OSError:
+                self._watcher = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop evicting and restore every original affinity; returns the number restored"""
+        if not self.running:
+            return 0
+        self.running = False
+        self._stop.set()
+        atexit.unregister(self.stop)
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        with self._lock:
+            self.evicted = {}
+            self._seen = set()
+            return restore_journal(self.journal_path)
+
+    def _run(self):
+        while self.running and not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except OSError:
+                # Journal not writable; keep the processes as they are
+                self.failures += 1
@@ -0,0 +1,179 @@
+"""
+Process Index - shared name -> PID lookup
+Keeps lower-case process name -> PIDs and PID -> cached info, refreshed
+incrementally: each refresh lists the PIDs, queries only the new ones and
+drops the ones that exited. Lookups are dictionary hits instead of a full
+process_iter walk. A PID can be indexed between fork and exec, so the
+names of young processes are re-read until they settle, and PIDs that
+could not be queried are retried with a growing delay.
+"""
+
+import threading
+import time
+
+import psutil
+
+# Lookups refresh the index when it is older than this many seconds
+DEFAULT_MAX_AGE = 1.0
+
+# Names of processes younger than this are re-read on every refresh (exec, renames)
+NAME_SETTLE_TIME = 5.0
+
+# First and longest delay before an unreadable PID is queried again
+UNREADABLE_RETRY = 1.0
+UNREADABLE_MAX_RETRY = 60.0
+
+
+class ProcessInfo:
+    """Cached facts about one process"""
+
+    __slots__ = ('pid', 'name', 'process', 'settled')
+
+    def __init__(self, pid, name, process):
+        self.pid = pid
+        self.name = name
+        self.process = process  # psutil.Process, reused so PID reuse is detected
+        self.settled = False    # old enough that its name is no longer re-read
+
+    def __repr__(self):
+        return f"ProcessInfo({self.name}, pid={self.pid})"
+
+
+class ProcessIndex:
+    """Incrementally refreshed name -> PIDs index of running processes"""
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE):
+        self.max_age = max_age
+        self.by_pid = {}   # pid -> ProcessInfo
+        self.by_name = {}  # lower-case name -> set of pids
+        self.refreshed_at = float('-inf')
+        self._unreadable = {}  # pid -> (monotonic time of the next try, delay), pids that couldn't be queried
+        self._lock = threading.RLock()
+
+    def refresh(self, force=False):
+        """Query new PIDs and drop exited ones; skipped if refreshed within max_age"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self.refreshed_at < self.max_age:
+                return
+            self.refreshed_at = now
+            pids = set(psutil.pids())
+            for pid in self.by_pid.keys() - pids:
+                self._remove(pid)
+            for pid in self._unreadable.keys() - pids:
+                del self._unreadable[pid]
+            for pid in pids - self.by_pid.keys():
+                retry = self._unreadable.get(pid)
+                if retry is None or retry[0] <= now:
+                    self._add(pid)
+            for info in [info for info in self.by_pid.values() if not info.settled]:
+                self._check_name(info)
+
+    def find(self, name):
+        """A live psutil.Process with this name (lowest PID first), or None"""
+        processes = self.find_all(name)
+        return processes[0] if processes else None
+
+    def find_all(self, name):
+        """Every live psutil.Process with this name, by PID"""
+        with self._lock:
+            self.refresh()
+            pids = sorted(self.by_name.get(name.lower(), ()))
+            processes = []
+            for pid in pids:
+                info = self._validate(pid)
+                if info is not None and info.name.lower() == name.lower():
+                    processes.append(info.process)
+            return processes
+
+    def pids(self, name):
+        """PIDs of the processes with this name"""
+        with self._lock:
+            self.refresh()
+            return set(self.by_name.get(name.lower(), ()))
+
+    def get(self, pid):
+        """ProcessInfo for a PID, or None"""
+        with self._lock:
+            self.refresh()
+            return self._validate(pid)
+
+    def processes(self):
+        """(name, pid) of every indexed process"""
+        with self._lock:
+            self.refresh()
+            return [(info.name, info.pid) for info in self.by_pid.values()]
+
+    def _validate(self, pid):
+        """The entry for pid, re-queried if the PID was reused since it was indexed"""
+        info = self.by_pid.get(pid)
+        if info is None:
+            return None
+        if not info.process.is_running():
+            # Exited, or the PID now belongs to a different process
+            self._remove(pid)
+            return self._add(pid)
+        if not info.settled:
+            return self._check_name(info)
+        return info
+
+    def _add(self, pid):
+        try:
+            process = psutil.Process(pid)
+            name = process.name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            name = None
+        if not name:
+            previous = self._unreadable.get(pid)
+            delay = UNREADABLE_RETRY if previous is None else min(UNREADABLE_MAX_RETRY, previous[1] * 2)
+            self._unreadable[pid] = (time.monotonic() + delay, delay)
+            return None
+        self._unreadable.pop(pid, None)
+        info = ProcessInfo(pid, name, process)
+        try:
+            info.settled = time.time() - process.create_time() > NAME_SETTLE_TIME
+        except psutil.Error:
+            pass
+        self.by_pid[pid] = info
+        self.by_name.setdefault(name.lower(), set()).add(pid)
+        return info
+
+    def _check_name(self, info):
+        """Re-read the name of a young process and re-index it if it changed; None if it is gone"""
+        try:
+            name = info.process.name()
+            settled = time.time() - info.process.create_time() > NAME_SETTLE_TIME
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            self._remove(info.pid)
+            return None
+        if name and name != info.name:
+            self._remove(info.pid)
+            info.name = name
+            self.by_pid[info.pid] = info
+            self.by_name.setdefault(name.lower(), set()).add(info.pid)
+        info.settled = settled
+        return info
+
+    def _remove(self, pid):
+        info = self.by_pid.pop(pid, None)
+        if info is None:
+            return
+        key = info.name.lower()
+        pids = self.by_name.get(key)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self.by_name[key]
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_process_index():
+    """The process-wide index shared by every lookup path"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = ProcessIndex()
+        return _shared_index
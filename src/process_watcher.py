@@ -0,0 +1,413 @@
+"""
+Process Watcher - reports process starts as they happen
+Backends, best first:
+  Linux:   proc connector (netlink exec events, needs CAP_NET_ADMIN)
+           /proc PID directory diff
+  Windows: WMI Win32_ProcessStartTrace (needs the optional `wmi` package)
+           PID list diff
+Rules match on the process name and fire on the watcher thread the moment
+a matching process shows up.
+"""
+
+import collections
+import os
+import select
+import socket
+import struct
+import threading
+import time
+import traceback
+
+import psutil
+
+from process_index import get_process_index
+
+IS_WINDOWS = os.name == 'nt'
+
+# Poll interval of the diff backends
+DEFAULT_POLL_INTERVAL = 0.05
+
+# New processes that match no rule are re-checked for this long, since
+# launchers like Wine rename the process after it started
+RENAME_GRACE = 2.0
+
+# Proc connector constants (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+PROC_EVENT_EXIT = 0x80000000
+
+_NLMSGHDR = struct.Struct('=IHHII')
+_CN_MSG = struct.Struct('=IIIIHH')
+_PROC_EVENT_HEADER = struct.Struct('=IIQ')
+_EXEC_EVENT = struct.Struct('=II')  # process_pid, process_tgid (also the start of comm and exit events)
+
+# Exec'd PIDs remembered so their later renames are not reported again
+MAX_REPORTED = 4096
+
+
+class WatcherBackend:
+    """
+    Source of newly started PIDs
+    open() raises OSError when the backend can't be used here; wait(timeout)
+    blocks for at most timeout seconds and returns the PIDs that started.
+    """
+
+    name = 'base'
+
+    def open(self):
+        pass
+
+    def wait(self, timeout):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NetlinkBackend(WatcherBackend):
+    """
+    Linux proc connector: the kernel multicasts an event on every exec
+    Main-thread renames (comm events) are reported too for processes whose
+    exec was not seen, so one that started before a dropped burst is still
+    matched; renames after a reported exec are left to the watcher's grace
+    re-check, which keeps a start from firing twice.
+    """
+
+    name = 'netlink'
+
+    def __init__(self):
+        self.sock = None
+        self.reported = collections.OrderedDict()  # pid -> None, exec'd and still running
+
+    def open(self):
+        if IS_WINDOWS or not hasattr(socket, 'AF_NETLINK'):
+            raise OSError("netlink is Linux only")
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            sock.bind((0, CN_IDX_PROC))
+            self._control(sock, PROC_CN_MCAST_LISTEN)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+    def wait(self, timeout):
+        if not select.select([self.sock], [], [], timeout)[0]:
+            return []
+        pids = []
+        # Drain everything queued so a burst of execs costs one wakeup
+        while True:
+            try:
+                data = self.sock.recv(65536, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return pids
+            except OSError:
+                # ENOBUFS: events were dropped; the caller's rules still see later starts
+                return pids
+            pids.extend(self._parse(data))
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self._control(self.sock, PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def _control(self, sock, op):
+        payload = struct.pack('=I', op)
+        cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        sock.send(header + cn_msg)
+
+    def _parse(self, data):
+        pids = []
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length = _NLMSGHDR.unpack_from(data, offset)[0]
+            if length < _NLMSGHDR.size:
+                break
+            event = offset + _NLMSGHDR.size + _CN_MSG.size
+            if event + _PROC_EVENT_HEADER.size + _EXEC_EVENT.size <= offset + length:
+                what = _PROC_EVENT_HEADER.unpack_from(data, event)[0]
+                pid, tgid = _EXEC_EVENT.unpack_from(data, event + _PROC_EVENT_HEADER.size)
+                if pid == tgid:
+                    if what == PROC_EVENT_EXEC:
+                        self._remember(tgid)
+                        pids.append(tgid)
+                    elif what == PROC_EVENT_COMM and tgid not in self.reported:
+                        self._remember(tgid)
+                        pids.append(tgid)
+                    elif what == PROC_EVENT_EXIT:
+                        self.reported.pop(tgid, None)
+            # Messages are 4-byte aligned
+            offset += (length + 3) & ~3
+        return pids
+
+    def _remember(self, pid):
+        self.reported[pid] = None
+        self.reported.move_to_end(pid)
+        if len(self.reported) > MAX_REPORTED:
+            self.reported.popitem(last=False)
+
+
+class PidDiffBackend(WatcherBackend):
+    """Compares the PID list between polls; works everywhere psutil does"""
+
+    name = 'pid-diff'
+
+    def __init__(self, interval=DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+        self.known = set()
+        self._stop = threading.Event()
+
+    def open(self):
+        self._stop.clear()
+        self.known = self._list_pids()
+
+    def wait(self, timeout):
+        if self._stop.wait(min(self.interval, timeout)):
+            return []
+        pids = self._list_pids()
+        started = pids - self.known
+        self.known = pids
+        return sorted(started)
+
+    def close(self):
+        self._stop.set()
+
+    def _list_pids(self):
+        return set(psutil.pids())
+
+
+class ProcDirBackend(PidDiffBackend):
+    """Lists /proc directly, which is cheaper than building psutil objects"""
+
+    name = 'proc-diff'
+
+    def open(self):
+        if not os.path.isdir('/proc/self'):
+            raise OSError("/proc is not mounted")
+        super().open()
+
+    def _list_pids(self):
+        return {int(name) for name in os.listdir('/proc') if name.isdigit()}
+
+
+class WmiBackend(WatcherBackend):
+    """Windows process start trace events through WMI"""
+
+    name = 'wmi'
+
+    def __init__(self):
+        self.watcher = None
+        self.fallback = None
+
+    def open(self):
+        try:
+            import pythoncom  # noqa: F401
+            import wmi  # noqa: F401
+        except ImportError:
+            raise OSError("the wmi package is not installed")
+
+    def wait(self, timeout):
+        import pythoncom
+        import wmi
+        if self.fallback is not None:
+            return self.fallback.wait(timeout)
+        if self.watcher is None:
+            # COM objects belong to the thread that made them, so subscribe
+            # from the watcher thread
+            pythoncom.CoInitialize()
+            try:
+                self.watcher = wmi.WMI().watch_for(raw_wql="SELECT * FROM Win32_ProcessStartTrace")
+            except Exception:
+                # The start trace needs admin rights; diff the PID list instead
+                self.fallback = PidDiffBackend()
+                self.fallback.open()
+                return self.fallback.wait(timeout)
+        try:
+            event = self.watcher(timeout_ms=int(timeout * 1000))
+        except wmi.x_wmi_timed_out:
+            return []
+        return [int(event.ProcessID)]
+
+    def close(self):
+        self.watcher = None
+        if self.fallback is not None:
+            self.fallback.close()
+            self.fallback = None
+
+
+# Tried in order by ProcessWatcher; register_backend() adds to these
+BACKENDS = [WmiBackend, PidDiffBackend] if IS_WINDOWS else [NetlinkBackend, ProcDirBackend, PidDiffBackend]
+
+
+def register_backend(backend_class, first=True):
+    """Add a WatcherBackend class to the candidates tried by new watchers"""
+    if first:
+        BACKENDS.insert(0, backend_class)
+    else:
+        BACKENDS.append(backend_class)
+
+
+def open_backend(candidates=None):
+    """The first backend that opens on this system"""
+    for backend_class in candidates or BACKENDS:
+        backend = backend_class()
+        try:
+            backend.open()
+            return backend
+        except OSError:
+            continue
+    raise OSError("no process watcher backend available")
+
+
+class WatchRule:
+    """Calls callback(process) for every started process with this name (None: any name)"""
+
+    __slots__ = ('name', 'callback', 'once', 'renames')
+
+    def __init__(self, name, callback, once=False, renames=False):
+        self.name = name.lower() if name is not None else None
+        self.callback = callback
+        self.once = once
+        self.renames = renames  # any-name rules: fire again when a young process renames itself
+
+
+class ProcessWatcher:
+    """Runs a backend in a thread and fires matching rules for new processes"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.rules = []
+        self.running = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = {}  # pid -> (psutil.Process, name), young processes re-checked for a rename
+
+    def watch(self, name, callback, once=False, existing=True):
+        """
+        Fire callback(psutil.Process) whenever a process called `name` starts
+        once: remove the rule after it fired
+        existing: also fire right away for matching processes already running
+        Returns the rule, for unwatch()
+        """
+        rule = WatchRule(name, callback, once)
+        with self._lock:
+            self.rules = self.rules + [rule]
+        if existing:
+            for process in get_process_index().find_all(name):
+                self._fire(rule, process)
+                if once:
+                    break
+        self.start()
+        return rule
+
+    def watch_all(self, callback, renames=False):
+        """
+        Fire callback(psutil.Process) for every process that starts; returns the rule
+        renames: fire again when a process renames itself within RENAME_GRACE
+        of its start (Wine and Proton games exec as the loader, then rename)
+        """
+        rule = WatchRule(None, callback, renames=renames)
+        with self._lock:
+            self.rules = self.rules + [rule]
+        self.start()
+        return rule
+
+    def unwatch(self, rule):
+        with self._lock:
+            self.rules = [r for r in self.rules if r is not rule]
+
+    def start(self):
+        if self.running:
+            return
+        if self.backend is None:
+            self.backend = open_backend()
+        else:
+            self.backend.open()
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        self._thread = None
+
+    def _run(self):
+        backend = self.backend
+        try:
+            while self.running:
+                started = backend.wait(0.1 if self._pending else 0.25)
+                if not self.rules:
+                    self._pending.clear()
+                    continue
+                for pid in started:
+                    self._pending.pop(pid, None)
+                    self._dispatch(pid)
+                if self._pending:
+                    self._recheck_pending()
+        finally:
+            backend.close()
+
+    def _dispatch(self, pid, process=None, previous_name=None):
+        """
+        Fire the rules matching a new or renamed process
+        Returns True once it needs no more re-checks (matched for good, or gone)
+        """
+        try:
+            if process is None:
+                process = psutil.Process(pid)
+            name = process.name().lower()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return True
+        if name == previous_name:
+            return False
+        settled = False
+        follow_renames = False
+        for rule in self.rules:
+            if rule.name is None:
+                self._fire(rule, process)
+                if rule.renames:
+                    follow_renames = True
+                else:
+                    settled = True
+            elif rule.name == name:
+                settled = True
+                self._fire(rule, process)
+        if settled and not follow_renames:
+            return True
+        self._pending[pid] = (process, name)
+        return False
+
+    def _recheck_pending(self):
+        now = time.time()
+        for pid, (process, name) in list(self._pending.items()):
+            try:
+                expired = now - process.create_time() > RENAME_GRACE
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                expired = True
+            if expired or self._dispatch(pid, process, name):
+                del self._pending[pid]
+
+    def _fire(self, rule, process):
+        if rule.once:
+            with self._lock:
+                if rule not in self.rules:
+                    return
+                self.rules = [r for r in self.rules if r is not rule]
+        try:
+            rule.callback(process)
+        except Exception:
+            # A failing rule must not stop the watcher
+            traceback.print_exc()
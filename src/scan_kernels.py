@@ -0,0 +1,76 @@
+"""
+Scan Kernels - vectorized value search over raw memory blocks
+Blocks come from MemoryEditor.iter_memory_blocks and are searched in place
+"""
+
+import struct
+
+import numpy as np
+
+# value_type: (struct format, NumPy dtype)
+VALUE_TYPES = {
+    'int': ('<i', np.dtype('<i4')),
+    'float': ('<f', np.dtype('<f4')),
+    'long': ('<q', np.dtype('<i8')),
+    'double': ('<d', np.dtype('<f8')),
+}
+
+# Unsigned dtypes used to compare exact bit patterns
+_BIT_DTYPES = {
+    4: np.dtype('<u4'),
+    8: np.dtype('<u8'),
+}
+
+
+def value_size(value_type):
+    """Width in bytes of a scan value type"""
+    return VALUE_TYPES[value_type][1].itemsize
+
+
+def pack_value(value, value_type):
+    """Pack a value the way it is stored in the target's memory"""
+    return struct.pack(VALUE_TYPES[value_type][0], value)
+
+
+def strided_view(block, dtype, base_address=0, alignment=None, stride=None, limit=None):
+    """
+    View a block as an array of candidate values without copying
+    Candidates start at the first address that is a multiple of `alignment`
+    and advance by `stride` bytes. Both default to the dtype width; use
+    alignment=1 to also consider unaligned addresses.
+    Only candidates starting before `limit` are included.
+    Returns (array, first_offset, stride)
+    """
+    dtype = np.dtype(dtype)
+    size = dtype.itemsize
+    alignment = alignment or size
+    stride = stride or alignment
+    length = len(block)
+    if limit is None or limit > length:
+        limit = length
+        
+    first = (-base_address) % alignment
+    if first + size > length or first >= limit:
+        return np.empty(0, dtype=dtype), first, stride
+    count = min((length - size - first) // stride + 1,
+                (limit - 1 - first) // stride + 1)
+    array = np.ndarray(shape=(count,), dtype=dtype, buffer=block, offset=first, strides=(stride,))
+    return array, first, stride
+
+
+def find_value(block, value, value_type, base_address=0, alignment=None, stride=None, limit=None):
+    """
+    Find every occurrence of an exact value in a block
+    Values are compared by bit pattern, matching a byte-for-byte search
+    (so 0.0 does not match -0.0 and NaN matches an identical NaN).
+    Returns an int64 array of offsets into the block.
+    """
+    packed = pack_value(value, value_type)
+    bits_dtype = _BIT_DTYPES[len(packed)]
+    target = np.frombuffer(packed, dtype=bits_dtype)[0]
+    
+    array, first, stride = strided_view(block, bits_dtype, base_address, alignment, stride, limit)
+    if not len(array):
+        return np.empty(0, dtype=np.int64)
+    hits = np.flatnonzero(array == target)
+    return hits * stride + first
@@ -0,0 +1,260 @@
+"""
+Scan Results Module - compact storage for scan hits
+Addresses are kept as sorted uint64 chunks, optionally paired with the
+value seen at each address, and move to memory-mapped files once they
+outgrow a RAM budget. That keeps a hit at 8-16 bytes instead of a Python int
+in a list.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+# Spill to disk above this many bytes of addresses + values
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# Chunk size used when streaming results back out
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_EMPTY_ADDRESSES = np.empty(0, dtype=np.uint64)
+
+
+class ScanResultStore:
+    """Sorted scan hits with optional values, in RAM or spilled to memory-mapped files"""
+
+    def __init__(self, value_dtype=None, memory_limit=DEFAULT_MEMORY_LIMIT, spill_dir=None):
+        self.value_dtype = np.dtype(value_dtype) if value_dtype is not None else None
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self._count = 0
+        # In-memory mode
+        self._address_chunks = []
+        self._value_chunks = []
+        self._chunk_ends = None
+        # Spilled mode
+        self._spill_paths = None
+        self._address_map = None
+        self._value_map = None
+        self._map_writable = False
+
+    @property
+    def bytes_per_hit(self):
+        return 8 + (self.value_dtype.itemsize if self.value_dtype is not None else 0)
+
+    @property
+    def spilled(self):
+        return self._spill_paths is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for addresses, _ in self.iter_chunks():
+            yield from addresses.tolist()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            addresses = self.page(start, max(0, stop - start))[0]
+            return addresses[::step] if step != 1 else addresses
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("scan result index out of range")
+        return int(self.page(index, 1)[0][0])
+
+    def append(self, addresses, values=None):
+        """Add hits; addresses must be sorted and above every stored address"""
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        if not len(addresses):
+            return
+        if self.value_dtype is not None:
+            if values is None:
+                raise ValueError("this store keeps values; pass them with the addresses")
+            values = np.asarray(values, dtype=self.value_dtype)
+
+        if self.spilled:
+            self._write_spill(addresses, values)
+        else:
+            self._address_chunks.append(addresses)
+            if values is not None:
+                self._value_chunks.append(values)
+            self._chunk_ends = None
+            self._count += len(addresses)
+            if self._count * self.bytes_per_hit > self.memory_limit:
+                self._spill()
+            return
+        self._count += len(addresses)
+
+    def page(self, start, count):
+        """Random access for the UI: (addresses, values) for hits [start, start + count)"""
+        stop = min(self._count, start + count)
+        if start >= stop:
+            return _EMPTY_ADDRESSES, self._empty_values()
+
+        if self.spilled:
+            self._map_spill()
+            addresses = np.array(self._address_map[start:stop])
+            values = np.array(self._value_map[start:stop]) if self._value_map is not None else None
+            return addresses, values
+
+        ends = self._ensure_chunk_ends()
+        first = int(np.searchsorted(ends, start, 'right'))
+        last = int(np.searchsorted(ends, stop - 1, 'right'))
+        address_parts = []
+        value_parts = []
+        for chunk in range(first, last + 1):
+            chunk_start = int(ends[chunk - 1]) if chunk else 0
+            lo = max(start, chunk_start) - chunk_start
+            hi = min(stop, int(ends[chunk])) - chunk_start
+            address_parts.append(self._address_chunks[chunk][lo:hi])
+            if self.value_dtype is not None:
+                value_parts.append(self._value_chunks[chunk][lo:hi])
+        addresses = np.concatenate(address_parts)
+        values = np.concatenate(value_parts) if value_parts else None
+        return addresses, values
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Stream (addresses, values) arrays in address order"""
+        for start in range(0, self._count, chunk_size):
+            yield self.page(start, chunk_size)
+
+    def filter(self, keep, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Narrow the store in place
+        keep(addresses, values) returns (mask, new_values); survivors are
+        compacted to the front of the store and paired with new_values.
+        Returns the number of hits left
+        """
+        written = 0
+        if self.spilled:
+            self._map_spill(writable=True)
+            for start in range(0, self._count, chunk_size):
+                addresses, values = self.page(start, chunk_size)
+                mask, new_values = keep(addresses, values)
+                survivors = np.flatnonzero(mask)
+                end = written + len(survivors)
+                self._address_map[written:end] = addresses[survivors]
+                if self._value_map is not None:
+                    self._value_map[written:end] = new_values[survivors]
+                written = end
+            self._truncate_spill(written)
+            return written
+
+        address_chunks = []
+        value_chunks = []
+        for addresses, values in zip(self._address_chunks,
+                                     self._value_chunks or [None] * len(self._address_chunks)):
+            mask, new_values = keep(addresses, values)
+            survivors = np.flatnonzero(mask)
+            if len(survivors):
+                address_chunks.append(addresses[survivors])
+                if self.value_dtype is not None:
+                    value_chunks.append(np.asarray(new_values, dtype=self.value_dtype)[survivors])
+                written += len(survivors)
+        self._address_chunks = address_chunks
+        self._value_chunks = value_chunks
+        self._chunk_ends = None
+        self._count = written
+        return written
+
+    def clear(self):
+        """Drop every hit and any spill files"""
+        self._address_chunks = []
+        self._value_chunks = []
+        self._chunk_ends = None
+        self._count = 0
+        self._remove_spill()
+
+    def close(self):
+        self.clear()
+
+    def __del__(self):
+        try:
+            self._remove_spill()
+        except Exception:
+            pass
+
+    def _empty_values(self):
+        if self.value_dtype is None:
+            return None
+        return np.empty(0, dtype=self.value_dtype)
+
+    def _ensure_chunk_ends(self):
+        if self._chunk_ends is None:
+            self._chunk_ends = np.cumsum([len(chunk) for chunk in self._address_chunks])
+        return self._chunk_ends
+
+    def _spill(self):
+        """Move the in-memory chunks into files"""
+        paths = []
+        for suffix in ('.addresses', '.values') if self.value_dtype is not None else ('.addresses',):
+            fd, path = tempfile.mkstemp(prefix='thalix-', suffix=suffix, dir=self.spill_dir)
+            os.close(fd)
+            paths.append(path)
+        self._spill_paths = paths
+
+        with open(paths[0], 'ab') as f:
+            for chunk in self._address_chunks:
+                chunk.tofile(f)
+        if self.value_dtype is not None:
+            with open(paths[1], 'ab') as f:
+                for chunk in self._value_chunks:
+                    chunk.tofile(f)
+        self._address_chunks = []
+        self._value_chunks = []
+        self._chunk_ends = None
+
+    def _write_spill(self, addresses, values):
+        self._unmap_spill()
+        with open(self._spill_paths[0], 'ab') as f:
+            addresses.tofile(f)
+        if values is not None:
+            with open(self._spill_paths[1], 'ab') as f:
+                values.tofile(f)
+
+    def _map_spill(self, writable=False):
+        """(Re)create the memory maps over the spill files"""
+        if self._address_map is not None and (self._map_writable or not writable):
+            return
+        self._unmap_spill()
+        mode = 'r+' if writable else 'r'
+        self._map_writable = writable
+        if not self._count:
+            self._address_map = _EMPTY_ADDRESSES
+            self._value_map = self._empty_values()
+            return
+        self._address_map = np.memmap(self._spill_paths[0], dtype=np.uint64, mode=mode,
+                                      shape=(self._count,))
+        if self.value_dtype is not None:
+            self._value_map = np.memmap(self._spill_paths[1], dtype=self.value_dtype, mode=mode,
+                                        shape=(self._count,))
+
+    def _unmap_spill(self):
+        for memmap in (self._address_map, self._value_map):
+            if isinstance(memmap, np.memmap):
+                memmap.flush()
+        self._address_map = None
+        self._value_map = None
+        self._map_writable = False
+
+    def _truncate_spill(self, count):
+        self._unmap_spill()
+        self._count = count
+        with open(self._spill_paths[0], 'r+b') as f:
+            f.truncate(count * 8)
+        if self.value_dtype is not None:
+            with open(self._spill_paths[1], 'r+b') as f:
+                f.truncate(count * self.value_dtype.itemsize)
+
+    def _remove_spill(self):
+        if self._spill_paths is None:
+            return
+        self._unmap_spill()
+        for path in self._spill_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._spill_paths = None
@@ -0,0 +1,546 @@
+"""
+Scheduling - CPU scheduler policy and I/O priority control
+Portable priority classes (Windows classes, nice values on Linux), Linux
+scheduler policies (SCHED_FIFO/RR with a priority, SCHED_BATCH/IDLE),
+I/O priority classes, and per-thread policies picked by thread name or by
+CPU usage. Real-time policies run under a guard that reverts everything
+when a real-time thread overruns its CPU budget or stops yielding, or when
+the game stops responding.
+"""
+
+import ctypes
+from ctypes import wintypes
+import fnmatch
+import os
+import threading
+import time
+
+import psutil
+
+from thread_affinity import VERIFY_EVERY, get_thread_name, list_thread_ids
+
+IS_WINDOWS = os.name == 'nt'
+
+# Seconds between guard checks
+DEFAULT_GUARD_INTERVAL = 0.25
+
+# Share of one CPU a real-time thread may use over the budget window
+DEFAULT_RT_BUDGET = 0.9
+BUDGET_WINDOW = 1.0
+
+# A real-time thread that hasn't blocked, or a window that hasn't answered, for this many seconds is hung
+DEFAULT_HANG_TIMEOUT = 2.0
+
+POLICY_NAMES = ('other', 'batch', 'idle', 'fifo', 'rr')
+REALTIME_POLICIES = ('fifo', 'rr')
+
+# Priority class name -> Windows class, or nice value on other systems
+if IS_WINDOWS:
+    PRIORITY_CLASSES = {
+        "REALTIME_PRIORITY_CLASS": psutil.REALTIME_PRIORITY_CLASS,
+        "HIGH_PRIORITY_CLASS": psutil.HIGH_PRIORITY_CLASS,
+        "ABOVE_NORMAL_PRIORITY_CLASS": psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+        "NORMAL_PRIORITY_CLASS": psutil.NORMAL_PRIORITY_CLASS,
+        "BELOW_NORMAL_PRIORITY_CLASS": psutil.BELOW_NORMAL_PRIORITY_CLASS,
+        "IDLE_PRIORITY_CLASS": psutil.IDLE_PRIORITY_CLASS,
+    }
+else:
+    # Real-time scheduling on Linux is a policy, not a class; use fifo/rr thread policies for it
+    PRIORITY_CLASSES = {
+        "REALTIME_PRIORITY_CLASS": -20,
+        "HIGH_PRIORITY_CLASS": -10,
+        "ABOVE_NORMAL_PRIORITY_CLASS": -5,
+        "NORMAL_PRIORITY_CLASS": 0,
+        "BELOW_NORMAL_PRIORITY_CLASS": 10,
+        "IDLE_PRIORITY_CLASS": 19,
+    }
+
+# Windows thread priorities used for the Linux policies
+THREAD_PRIORITY_IDLE = -15
+THREAD_PRIORITY_LOWEST = -2
+THREAD_PRIORITY_NORMAL = 0
+THREAD_PRIORITY_TIME_CRITICAL = 15
+_WINDOWS_THREAD_PRIORITIES = {
+    'other': THREAD_PRIORITY_NORMAL,
+    'batch': THREAD_PRIORITY_LOWEST,
+    'idle': THREAD_PRIORITY_IDLE,
+    'fifo': THREAD_PRIORITY_TIME_CRITICAL,
+    'rr': THREAD_PRIORITY_TIME_CRITICAL,
+}
+THREAD_SET_INFORMATION = 0x0020
+THREAD_QUERY_INFORMATION = 0x0040
+
+if IS_WINDOWS:
+    _kernel32 = ctypes.windll.kernel32
+    _user32 = ctypes.windll.user32
+    _kernel32.OpenThread.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    _kernel32.OpenThread.restype = wintypes.HANDLE
+    _kernel32.SetThreadPriority.argtypes = [wintypes.HANDLE, ctypes.c_int]
+    _kernel32.GetThreadPriority.argtypes = [wintypes.HANDLE]
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    _user32.IsHungAppWindow.argtypes = [wintypes.HWND]
+    _user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+    _user32.IsWindowVisible.argtypes = [wintypes.HWND]
+    _EnumWindowsProc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+else:
+    _LINUX_POLICIES = {
+        'other': os.SCHED_OTHER,
+        'batch': os.SCHED_BATCH,
+        'idle': os.SCHED_IDLE,
+        'fifo': os.SCHED_FIFO,
+        'rr': os.SCHED_RR,
+    }
+    _LINUX_POLICY_NAMES = {value: name for name, value in _LINUX_POLICIES.items()}
+    _CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+class SchedPolicy:
+    """A scheduler policy and its static priority (1-99, real-time policies only)"""
+
+    __slots__ = ('policy', 'priority')
+
+    def __init__(self, policy, priority=0):
+        if policy not in POLICY_NAMES:
+            raise ValueError(f"Unknown scheduler policy: {policy!r}")
+        if policy in REALTIME_POLICIES and not 1 <= priority <= 99:
+            raise ValueError(f"Real-time priority must be 1-99, got {priority}")
+        self.policy = policy
+        self.priority = priority if policy in REALTIME_POLICIES else 0
+
+    @property
+    def realtime(self):
+        return self.policy in REALTIME_POLICIES
+
+    def __eq__(self, other):
+        return isinstance(other, SchedPolicy) and (self.policy, self.priority) == (other.policy, other.priority)
+
+    def __repr__(self):
+        return f"{self.policy}:{self.priority}" if self.realtime else self.policy
+
+
+def parse_policy(text):
+    """SchedPolicy from text like "fifo:50", "rr:10", "batch" or "idle" """
+    name, _, priority = text.strip().lower().partition(':')
+    if name in REALTIME_POLICIES and not priority:
+        raise ValueError(f"Real-time policy needs a priority, e.g. {name}:50")
+    return SchedPolicy(name, int(priority) if priority else 0)
+
+
+class IoPriority:
+    """An I/O priority: class 'rt', 'be' or 'idle' and a level 0-7 (0 is highest)"""
+
+    __slots__ = ('io_class', 'level')
+
+    CLASSES = ('rt', 'be', 'idle')
+
+    def __init__(self, io_class, level=4):
+        if io_class not in self.CLASSES:
+            raise ValueError(f"Unknown I/O class: {io_class!r}")
+        if not 0 <= level <= 7:
+            raise ValueError(f"I/O priority level must be 0-7, got {level}")
+        self.io_class = io_class
+        self.level = level if io_class != 'idle' else 0
+
+    def __repr__(self):
+        return self.io_class if self.io_class == 'idle' else f"{self.io_class}:{self.level}"
+
+
+def parse_ionice(text):
+    """IoPriority from text like "rt:0", "be:4" or "idle" """
+    io_class, _, level = text.strip().lower().partition(':')
+    return IoPriority(io_class, int(level) if level else 4)
+
+
+def set_priority_class(process, class_name):
+    """Set a process's priority class (a nice value outside Windows)"""
+    try:
+        value = PRIORITY_CLASSES[class_name]
+    except KeyError:
+        raise ValueError(f"Unknown priority class: {class_name!r}")
+    process.nice(value)
+
+
+def get_io_priority(process):
+    """Current IoPriority of a process, or None where it can't be expressed"""
+    ionice = process.ionice()
+    if IS_WINDOWS:
+        return {psutil.IOPRIO_HIGH: IoPriority('rt', 0), psutil.IOPRIO_NORMAL: IoPriority('be', 4),
+                psutil.IOPRIO_LOW: IoPriority('be', 7)}.get(ionice, IoPriority('idle'))
+    if ionice.ioclass == psutil.IOPRIO_CLASS_NONE:
+        return None
+    io_class = {psutil.IOPRIO_CLASS_RT: 'rt', psutil.IOPRIO_CLASS_BE: 'be',
+                psutil.IOPRIO_CLASS_IDLE: 'idle'}[ionice.ioclass]
+    return IoPriority(io_class, ionice.value)
+
+
+def set_io_priority(process, io_priority):
+    """Set a process's I/O priority; None resets it to the default"""
+    if IS_WINDOWS:
+        if io_priority is None or io_priority.io_class == 'be':
+            level = psutil.IOPRIO_NORMAL if io_priority is None or io_priority.level < 7 else psutil.IOPRIO_LOW
+        else:
+            level = psutil.IOPRIO_HIGH if io_priority.io_class == 'rt' else psutil.IOPRIO_VERYLOW
+        process.ionice(level)
+    elif io_priority is None:
+        process.ionice(psutil.IOPRIO_CLASS_NONE)
+    elif io_priority.io_class == 'idle':
+        process.ionice(psutil.IOPRIO_CLASS_IDLE)
+    else:
+        io_class = psutil.IOPRIO_CLASS_RT if io_priority.io_class == 'rt' else psutil.IOPRIO_CLASS_BE
+        process.ionice(io_class, io_priority.level)
+
+
+def get_thread_policy(tid):
+    """Current SchedPolicy of a thread, or None if it is gone"""
+    if IS_WINDOWS:
+        handle = _kernel32.OpenThread(THREAD_QUERY_INFORMATION, False, tid)
+        if not handle:
+            return None
+        try:
+            priority = _kernel32.GetThreadPriority(handle)
+        finally:
+            _kernel32.CloseHandle(handle)
+        # Thread priorities don't map back onto policies; keep the raw value for restoring
+        policy = SchedPolicy('other')
+        policy.priority = priority
+        return policy
+    try:
+        policy = os.sched_getscheduler(tid)
+        priority = os.sched_getparam(tid).sched_priority
+    except OSError:
+        return None
+    # SCHED_DEADLINE and friends aren't managed here; treat them as normal
+    return SchedPolicy(_LINUX_POLICY_NAMES.get(policy, 'other'), priority)
+
+
+def set_thread_policy(tid, policy):
+    """Apply a SchedPolicy to one thread; False if it is gone or not permitted"""
+    if IS_WINDOWS:
+        if policy.policy == 'other':
+            # Restoring a saved raw thread priority
+            priority = policy.priority
+        else:
+            priority = _WINDOWS_THREAD_PRIORITIES[policy.policy]
+        handle = _kernel32.OpenThread(THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION, False, tid)
+        if not handle:
+            return False
+        try:
+            return bool(_kernel32.SetThreadPriority(handle, priority))
+        finally:
+            _kernel32.CloseHandle(handle)
+    try:
+        os.sched_setscheduler(tid, _LINUX_POLICIES[policy.policy], os.sched_param(policy.priority))
+        return True
+    except OSError:
+        return False
+
+
+def set_process_policy(pid, policy):
+    """Apply a SchedPolicy to every thread of a process; returns the number of threads changed"""
+    return sum(set_thread_policy(tid, policy) for tid in list_thread_ids(pid) or ())
+
+
+def _read_thread_progress(pid, tid):
+    """(CPU seconds, voluntary context switches, running) of a Linux thread, or None"""
+    try:
+        with open(f"/proc/{pid}/task/{tid}/stat", 'rb') as f:
+            stat = f.read()
+        fields = stat[stat.rindex(b')') + 2:].split()
+        cpu = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+        with open(f"/proc/{pid}/task/{tid}/status", 'rb') as f:
+            for line in f:
+                if line.startswith(b'voluntary_ctxt_switches:'):
+                    return cpu, int(line.split()[1]), fields[0] == b'R'
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def is_window_hung(pid):
+    """True when a visible window of the process stopped answering messages (Windows only)"""
+    if not IS_WINDOWS:
+        return False
+    hung = []
+
+    def check(hwnd, _):
+        owner = wintypes.DWORD()
+        _user32.GetWindowThreadProcessId(hwnd, ctypes.byref(owner))
+        if owner.value == pid and _user32.IsWindowVisible(hwnd) and _user32.IsHungAppWindow(hwnd):
+            hung.append(hwnd)
+            return False
+        return True
+
+    _user32.EnumWindows(_EnumWindowsProc(check), 0)
+    return bool(hung)
+
+
+class ThreadPolicyRule:
+    """Scheduler policy for threads picked by name pattern, or for the N heaviest threads"""
+
+    __slots__ = ('policy', 'pattern', 'heaviest')
+
+    def __init__(self, policy, pattern=None, heaviest=0):
+        self.policy = policy
+        self.pattern = pattern.lower() if pattern else None
+        self.heaviest = heaviest
+
+    def matches_name(self, name):
+        return self.pattern is not None and fnmatch.fnmatchcase(name.lower(), self.pattern)
+
+    def __repr__(self):
+        target = f"heaviest:{self.heaviest}" if self.heaviest else self.pattern
+        return f"ThreadPolicyRule({target} -> {self.policy})"
+
+
+def parse_policy_rules(text):
+    """
+    Rules from text like "RenderThread*=fifo:50; heaviest:1=rr:10; *=batch"
+    Each rule is <name pattern>=<policy> or heaviest:<count>=<policy>;
+    patterns are case-insensitive globs matched against the thread name.
+    """
+    rules = []
+    for item in text.split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        target, sep, policy_text = item.rpartition('=')
+        target = target.strip()
+        if not sep or not target:
+            raise ValueError(f"Invalid policy rule: {item!r}")
+        policy = parse_policy(policy_text)
+        if target.lower().startswith('heaviest:'):
+            rules.append(ThreadPolicyRule(policy, heaviest=int(target.split(':', 1)[1])))
+        else:
+            rules.append(ThreadPolicyRule(policy, pattern=target))
+    return rules
+
+
+class SchedulingManager:
+    """
+    Applies thread policies, nice and I/O priority to a process and guards them
+    New threads get their policy as they appear. While any thread runs a
+    real-time policy, the guard reverts every change when a real-time thread
+    uses more than rt_budget of a CPU over a second, or runs for hang_timeout
+    seconds without blocking once, or when the process's window hangs.
+    """
+
+    def __init__(self, pid, rules=(), nice=None, io_priority=None, rt_budget=DEFAULT_RT_BUDGET,
+                 hang_timeout=DEFAULT_HANG_TIMEOUT, interval=DEFAULT_GUARD_INTERVAL):
+        self.pid = pid
+        self.rules = list(rules)
+        self.nice = nice
+        self.io_priority = io_priority
+        self.rt_budget = rt_budget
+        self.hang_timeout = hang_timeout
+        self.interval = interval
+        self.applied = {}          # tid -> SchedPolicy we set
+        self.originals = {}        # tid -> SchedPolicy before we touched it
+        self.original_nice = None
+        self.original_io = None
+        self.io_changed = False
+        self.revert_reason = None  # why the guard reverted, once it has
+        self.cycles = 0
+        self.running = False
+        self._progress = {}        # tid -> (CPU seconds, voluntary switches, time of last switch, window start, window CPU)
+        self._cpu_times = {}
+        self._hung_since = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def apply(self):
+        """Apply everything now; False if the process is gone"""
+        try:
+            process = psutil.Process(self.pid)
+            if self.nice is not None:
+                if self.original_nice is None:
+                    self.original_nice = process.nice()
+                process.nice(self.nice)
+            if self.io_priority is not None:
+                if not self.io_changed:
+                    self.original_io = get_io_priority(process)
+                    self.io_changed = True
+                set_io_priority(process, self.io_priority)
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return False
+        with self._lock:
+            return self._apply_threads(full=True)
+
+    def _apply_threads(self, full=False):
+        """Give each thread its rule's policy; full also re-ranks the heaviest threads (lock held)"""
+        tids = list_thread_ids(self.pid)
+        if tids is None:
+            return False
+        for tid in self.applied.keys() - tids:
+            del self.applied[tid]
+            self.originals.pop(tid, None)
+            self._progress.pop(tid, None)
+        heavy = self._rank_heaviest() if full else {}
+        for tid in tids:
+            if not full and tid in self.applied:
+                continue
+            policy = self._policy_for(tid, heavy, full)
+            if policy is None:
+                if tid in self.applied:
+                    # No longer among the heaviest
+                    set_thread_policy(tid, self.originals[tid])
+                    del self.applied[tid]
+                continue
+            if self.applied.get(tid) == policy:
+                continue
+            if tid not in self.originals:
+                original = get_thread_policy(tid)
+                if original is None:
+                    continue
+                self.originals[tid] = original
+            if set_thread_policy(tid, policy):
+                self.applied[tid] = policy
+        return True
+
+    def _policy_for(self, tid, heavy, full):
+        """The policy a thread should have; heaviest rules only change on full passes"""
+        name = get_thread_name(self.pid, tid)
+        for rule in self.rules:
+            if rule.matches_name(name):
+                return rule.policy
+        return heavy.get(tid) if full else self.applied.get(tid)
+
+    def _rank_heaviest(self):
+        """{tid: policy} for the threads that used the most CPU since the last ranking"""
+        wanted = [rule for rule in self.rules if rule.heaviest]
+        if not wanted:
+            return {}
+        try:
+            threads = psutil.Process(self.pid).threads()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return {}
+        times = {thread.id: thread.user_time + thread.system_time for thread in threads}
+        usage = sorted(((total - self._cpu_times.get(tid, 0.0), tid) for tid, total in times.items()),
+                       reverse=True)
+        self._cpu_times = times
+        heavy = {}
+        position = 0
+        for rule in wanted:
+            for _, tid in usage[position:position + rule.heaviest]:
+                heavy[tid] = rule.policy
+            position += rule.heaviest
+        return heavy
+
+    def applied_summary(self):
+        """Short text of what is applied, e.g. "3 threads rr:10, 1 thread idle, io be:0" """
+        with self._lock:
+            counts = {}
+            for policy in self.applied.values():
+                counts[repr(policy)] = counts.get(repr(policy), 0) + 1
+            parts = [f"{count} thread{'s' if count != 1 else ''} {policy}" for policy, count in sorted(counts.items())]
+            if self.io_changed:
+                parts.append(f"io {self.io_priority!r}")
+            if self.original_nice is not None:
+                parts.append(f"nice {self.nice}")
+        return ', '.join(parts) or "none"
+
+    def check(self):
+        """
+        One guard pass: pick up new threads and test the safety limits
+        Returns False once the process is gone or the guard reverted.
+        """
+        with self._lock:
+            self.cycles += 1
+            if not self._apply_threads(full=self.cycles % VERIFY_EVERY == 0):
+                return False
+            reason = self._check_limits(time.monotonic())
+        if reason is not None:
+            self.revert(reason)
+            return False
+        return True
+
+    def _check_limits(self, now):
+        """Why the real-time policies must be dropped, or None (lock held)"""
+        if is_window_hung(self.pid):
+            if self._hung_since is None:
+                self._hung_since = now
+            elif now - self._hung_since >= self.hang_timeout:
+                return "game window stopped responding"
+        else:
+            self._hung_since = None
+
+        if IS_WINDOWS:
+            realtime = [tid for tid, policy in self.applied.items() if policy.realtime]
+            if not realtime:
+                return None
+            try:
+                cpu_times = {thread.id: thread.user_time + thread.system_time
+                             for thread in psutil.Process(self.pid).threads()}
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                return None
+            progress = {tid: (cpu_times[tid], None, True) for tid in realtime if tid in cpu_times}
+        else:
+            progress = {}
+            for tid, policy in self.applied.items():
+                if policy.realtime:
+                    sample = _read_thread_progress(self.pid, tid)
+                    if sample is not None:
+                        progress[tid] = sample
+
+        for tid, (cpu, switches, running) in progress.items():
+            previous = self._progress.get(tid)
+            if previous is None:
+                self._progress[tid] = (cpu, switches, now, now, cpu)
+                continue
+            _, last_switches, switched_at, window_start, window_cpu = previous
+            if switches != last_switches or not running:
+                switched_at = now
+            elif switches is not None and now - switched_at >= self.hang_timeout:
+                return f"real-time thread {tid} ran {self.hang_timeout:.1f}s without yielding"
+            if now - window_start >= BUDGET_WINDOW:
+                share = (cpu - window_cpu) / (now - window_start)
+                if share > self.rt_budget:
+                    return f"real-time thread {tid} used {share:.0%} of a CPU (budget {self.rt_budget:.0%})"
+                window_start, window_cpu = now, cpu
+            self._progress[tid] = (cpu, switches, switched_at, window_start, window_cpu)
+        return None
+
+    def revert(self, reason=None):
+        """Put every thread, nice and I/O priority back as they were"""
+        with self._lock:
+            if reason is not None:
+                self.revert_reason = reason
+            for tid, original in self.originals.items():
+                set_thread_policy(tid, original)
+            self.applied = {}
+            self.originals = {}
+            self._progress = {}
+            try:
+                process = psutil.Process(self.pid)
+                if self.original_nice is not None:
+                    process.nice(self.original_nice)
+                if self.io_changed:
+                    set_io_priority(process, self.original_io)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+            self.original_nice = None
+            self.io_changed = False
+        self.running = False
+        self._stop.set()
+
+    def start(self):
+        """Apply now and keep guarding in the background"""
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.apply()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, revert=True):
+        """Stop guarding, by default restoring the original scheduling"""
+        if revert:
+            self.revert()
+        self.running = False
+        self._stop.set()
+
+    def _run(self):
+        while self.running and not self._stop.wait(self.interval):
+            if not self.check():
+                self.running = False
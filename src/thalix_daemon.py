@@ -0,0 +1,679 @@
+"""
+Thalix Daemon - headless rules engine
+Loads a JSON rules file and applies each rule to matching processes as
+they start: CPU affinity, priority class, per-thread affinity and
+scheduler policies, eviction of other processes, IRQ steering and cpuset
+isolation. A watchdog re-applies affinity and priority when something
+else changes them. The file is re-read when it changes. The GUI hands session
+rules to a running daemon through DaemonClient, and only runs the engine
+itself when no daemon is listening.
+
+Rules file (~/.thalix/rules.json):
+    {
+      "presets": {"Elden Ring": {"cpus": [2, 3, 4, 5], "priority": "HIGH_PRIORITY_CLASS"}},
+      "rules": [
+        {"name": "Elden Ring",
+         "match": {"name": "eldenring.exe", "path": "*ELDEN RING*", "cmdline": "*"},
+         "cpus": "preset:game",
+         "priority": "HIGH_PRIORITY_CLASS",
+         "threads": "RenderThread*=2",
+         "policies": "RenderThread*=rr:10",
+         "io_priority": "be:0",
+         "evict": true, "irq": true, "isolate": false}
+      ]
+    }
+"cpus" is a list, a CPU list text ("1-7"), "preset:<topology preset>" or
+the name of a saved preset. Every match field is optional, but a rule
+needs at least one; all given fields must match.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+from affinity_watchdog import DEFAULT_MAX_INTERVAL, AffinityWatchdog
+from cpu_topology import PRESETS, get_topology
+from cpuset_partition import CpusetPartition, teardown_journal
+from irq_affinity import IrqSteering
+from journal import write_journal
+from process_eviction import ProcessEvictor, restore_journal
+from process_index import get_process_index
+from process_watcher import ProcessWatcher
+from scheduling import SchedulingManager, parse_ionice, parse_policy_rules, set_priority_class
+from thalix_ipc import DEFAULT_ADDRESS, BlockingClient, ThalixServer, server_running
+from thread_affinity import ThreadAffinityManager, parse_cpu_list, parse_thread_rules
+
+logger = logging.getLogger(__name__)
+
+IS_WINDOWS = os.name == 'nt'
+
+DEFAULT_RULES_PATH = os.path.join(os.path.expanduser('~'), '.thalix', 'rules.json')
+
+# Seconds between rules file checks and managed-process exit checks
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Actions that act on the whole system; only one managed process owns them at a time
+EXCLUSIVE_ACTIONS = ('evict', 'irq', 'isolate')
+
+_RULE_KEYS = {'name', 'match', 'cpus', 'priority', 'threads', 'per_thread', 'policies', 'io_priority',
+              'evict', 'irq', 'isolate'}
+_MATCH_KEYS = {'name', 'path', 'cmdline'}
+
+
+class Rule:
+    """What to do with processes that match"""
+
+    def __init__(self, data: dict, presets: Optional[dict] = None, source: str = 'file'):
+        """
+        Build a rule from its rules-file dict
+        Raises ValueError when the rule is malformed.
+        """
+        unknown = set(data) - _RULE_KEYS
+        if unknown:
+            raise ValueError(f"unknown keys {sorted(unknown)}")
+        match = data.get('match') or {}
+        if not isinstance(match, dict) or set(match) - _MATCH_KEYS or not match:
+            raise ValueError("'match' needs at least one of name, path, cmdline")
+        self.data = data
+        self.source = source
+        self.name = data.get('name') or match.get('name') or match.get('path') or match.get('cmdline')
+        self.match_name = match.get('name', '').lower() or None
+        self.match_path = match.get('path', '').lower() or None
+        self.match_cmdline = match.get('cmdline', '').lower() or None
+        self.cpus = self._resolve_cpus(data.get('cpus'), presets or {})
+        preset = (presets or {}).get(data['cpus'], {}) if isinstance(data.get('cpus'), str) else {}
+        self.priority = data.get('priority') or preset.get('priority')
+        self.thread_rules = parse_thread_rules(data.get('threads', ''))
+        self.per_thread = bool(data.get('per_thread') or self.thread_rules)
+        self.policy_rules = parse_policy_rules(data.get('policies', ''))
+        self.io_priority = parse_ionice(data['io_priority']) if data.get('io_priority') else None
+        self.evict = bool(data.get('evict'))
+        self.irq = bool(data.get('irq'))
+        self.isolate = bool(data.get('isolate'))
+        if (self.per_thread or self.exclusive) and not self.cpus:
+            raise ValueError("per-thread, evict, irq and isolate need 'cpus'")
+
+    @staticmethod
+    def _resolve_cpus(value, presets: dict) -> Optional[List[int]]:
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return sorted(int(cpu) for cpu in value)
+        if value.startswith('preset:'):
+            name = value.split(':', 1)[1]
+            if name not in PRESETS:
+                raise ValueError(f"unknown topology preset {name!r}")
+            return get_topology().preset(name)
+        if value in presets:
+            return sorted(presets[value]['cpus'])
+        return parse_cpu_list(value)
+
+    @property
+    def exclusive(self) -> bool:
+        return self.evict or self.irq or self.isolate
+
+    def matches(self, process: psutil.Process) -> bool:
+        """True when every given match field matches the process"""
+        try:
+            if self.match_name is not None and process.name().lower() != self.match_name:
+                return False
+            if self.match_path is not None and not fnmatch.fnmatchcase(process.exe().lower(), self.match_path):
+                return False
+            if self.match_cmdline is not None and not fnmatch.fnmatchcase(
+                    ' '.join(process.cmdline()).lower(), self.match_cmdline):
+                return False
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+        return True
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, source={self.source})"
+
+
+def load_rules_file(path: str = DEFAULT_RULES_PATH):
+    """
+    (rules, presets) from a rules file; a missing file has neither
+    Raises ValueError naming the broken rule.
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return [], {}
+    presets = data.get('presets', {})
+    rules = []
+    for position, rule_data in enumerate(data.get('rules', [])):
+        try:
+            rules.append(Rule(rule_data, presets))
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"rule {position + 1} ({rule_data.get('name', '?')}): {e}")
+    return rules, presets
+
+
+def _update_rules_file(path: str, change: Callable[[dict], None]):
+    """Apply change() to the file's JSON and replace the file in one step"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {'presets': {}, 'rules': []}
+    change(data)
+    write_journal(path, data, indent=2)
+
+
+class ManagedProcess:
+    """A process a rule was applied to, and the managers keeping it that way"""
+
+    def __init__(self, rule: Rule, process: psutil.Process, watchdog: Optional[AffinityWatchdog] = None):
+        self.rule = rule
+        self.process = process
+        self.pid = process.pid
+        self.watchdog = watchdog
+        self.thread_affinity = None
+        self.scheduling = None
+        self.evictor = None
+        self.cpuset = None
+        self.irq = None
+        self.original_cpus = None      # put back by rollback() when apply() fails
+        self.original_nice = None
+
+    def apply(self) -> str:
+        """Apply the rule; returns a one-line summary. Errors propagate; see rollback()."""
+        rule = self.rule
+        parts = []
+        if rule.cpus:
+            self.original_cpus = self.process.cpu_affinity()
+            self.process.cpu_affinity(rule.cpus)
+            parts.append(f"CPUs {self.process.cpu_affinity()}")
+        if rule.priority:
+            self.original_nice = self.process.nice()
+            set_priority_class(self.process, rule.priority)
+            parts.append(rule.priority)
+        if rule.per_thread:
+            self.thread_affinity = ThreadAffinityManager(self.pid, rule.cpus, rule.thread_rules)
+            self.thread_affinity.start()
+            parts.append(f"{len(self.thread_affinity.applied)} threads pinned")
+        if rule.policy_rules or rule.io_priority:
+            self.scheduling = SchedulingManager(self.pid, rule.policy_rules, io_priority=rule.io_priority)
+            self.scheduling.start()
+            parts.append(f"policies: {self.scheduling.applied_summary()}")
+        if rule.isolate and not IS_WINDOWS:
+            self.cpuset = CpusetPartition(rule.cpus)
+            self.cpuset.setup()
+            self.cpuset.add_process(self.pid)
+            parts.append(f"cpuset partition: {self.cpuset.partition}")
+        if rule.evict:
+            self.evictor = ProcessEvictor(rule.cpus, exclude_pids=[self.pid])
+            self.evictor.start()
+            parts.append(f"{len(self.evictor.evicted)} processes evicted")
+        if rule.irq and not IS_WINDOWS:
+            self.irq = IrqSteering(rule.cpus)
+            moves = self.irq.steer()[0]
+            parts.append(f"{sum(move.error is None for move in moves)} IRQs moved")
+        if self.watchdog is not None and (rule.cpus or rule.priority):
+            # Pinned threads are verified one by one instead of the process mask
+            thread_masks = self.thread_affinity.applied_masks if self.thread_affinity is not None else None
+            self.watchdog.watch(self.pid, None if rule.per_thread else rule.cpus, rule.priority, thread_masks)
+        return ', '.join(parts) or "nothing to apply"
+
+    def release_exclusive(self) -> List[str]:
+        """Undo eviction, IRQ steering and isolation; returns the errors"""
+        errors = []
+        if self.evictor is not None:
+            self.evictor.stop()
+            self.evictor = None
+        if self.irq is not None:
+            errors.extend(f"IRQ {irq}: {error}" for irq, error in self.irq.restore().items())
+            self.irq = None
+        if self.cpuset is not None:
+            errors.extend(self.cpuset.teardown())
+            self.cpuset = None
+        return errors
+
+    def release(self) -> List[str]:
+        """Stop every manager and undo what can be undone; returns the errors"""
+        if self.watchdog is not None:
+            self.watchdog.unwatch(self.pid)
+        if self.thread_affinity is not None:
+            self.thread_affinity.stop()
+            self.thread_affinity = None
+        if self.scheduling is not None:
+            self.scheduling.stop()
+            self.scheduling = None
+        return self.release_exclusive()
+
+    def rollback(self):
+        """Undo a partly applied rule: every manager, then the affinity and priority"""
+        self.release()
+        try:
+            if self.original_nice is not None:
+                self.process.nice(self.original_nice)
+            if self.original_cpus is not None:
+                self.process.cpu_affinity(self.original_cpus)
+        except (psutil.Error, OSError):
+            pass
+
+    @property
+    def owns_exclusive(self) -> bool:
+        return self.evictor is not None or self.irq is not None or self.cpuset is not None
+
+
+class ThalixDaemon:
+    """
+    Applies rules to processes as they start
+    All process work happens on one worker thread fed by a queue; the
+    watcher thread only enqueues new processes, and callers (the GUI) only
+    enqueue requests. Events are reported to subscribers from the worker.
+    """
+
+    def __init__(self, rules_path: str = DEFAULT_RULES_PATH, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 drift_bound: float = DEFAULT_MAX_INTERVAL):
+        """drift_bound: longest time affinity or priority drift of a managed process goes unrepaired"""
+        self.rules_path = rules_path
+        self.poll_interval = poll_interval
+        self.watchdog = AffinityWatchdog(max_interval=drift_bound, on_drift=self._on_drift)
+        self.rules: List[Rule] = []           # from the rules file
+        self.session_rules: List[Rule] = []   # added at runtime, never written to the file
+        self.presets: Dict[str, dict] = {}
+        self.managed: Dict[int, ManagedProcess] = {}
+        self.running = False
+        self._once: set = set()                # session rules dropped after their first match
+        self._listeners: List[Callable[[dict], None]] = []
+        self._queue: "queue.Queue" = queue.Queue()
+        self._file_stamp = None
+        self._watcher = None
+        self._thread = None
+
+    # Client side: safe from any thread
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        """Call callback(event) for every event; events are dicts with an 'event' key"""
+        self._listeners.append(callback)
+
+    def add_rule(self, data: dict, once: bool = False) -> Rule:
+        """
+        Add a session rule and apply it to matching processes now and as they start
+        once: drop the rule after it was applied to one process
+        Raises ValueError when the rule is malformed.
+        """
+        rule = Rule(data, self.presets, source='session')
+        self._queue.put(('add_rule', rule, once))
+        return rule
+
+    def remove_rule(self, rule: Rule):
+        """Drop a session rule; processes it was applied to stay managed"""
+        self._queue.put(('remove_rule', rule))
+
+    def apply_rule(self, data: dict) -> Rule:
+        """Apply a rule once to the processes running now, without keeping it"""
+        rule = Rule(data, self.presets, source='session')
+        self._queue.put(('apply_rule', rule))
+        return rule
+
+    def release_exclusive(self, actions=EXCLUSIVE_ACTIONS):
+        """Undo eviction, IRQ steering or isolation wherever they are active"""
+        self._queue.put(('release_exclusive', tuple(actions)))
+
+    def save_preset(self, name: str, preset: dict):
+        """Store a preset in the rules file"""
+        self.presets[name] = preset
+        _update_rules_file(self.rules_path, lambda data: data.setdefault('presets', {}).__setitem__(name, preset))
+
+    def delete_preset(self, name: str):
+        self.presets.pop(name, None)
+        _update_rules_file(self.rules_path, lambda data: data.setdefault('presets', {}).pop(name, None))
+
+    # Lifecycle
+
+    def start(self):
+        """Load the rules and start the worker and the process watcher"""
+        if self.running:
+            return
+        # Undo system-wide changes a crashed run left behind
+        restore_journal()
+        if not IS_WINDOWS:
+            teardown_journal()
+        self.running = True
+        self.watchdog.start()
+        self._reload(initial=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._watcher = ProcessWatcher()
+        # Renames are followed: a Proton game starts as the Wine loader and renames itself
+        self._watcher.watch_all(lambda process: self._queue.put(('process', process)), renames=True)
+
+    def stop(self):
+        """Stop watching and release every managed process"""
+        if not self.running:
+            return
+        self.running = False
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        self.watchdog.stop()
+        self._queue.put(('stop',))
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(10.0)
+        for managed in list(self.managed.values()):
+            managed.release()
+        self.managed = {}
+
+    def run_forever(self):
+        """Start and block until interrupted"""
+        self.start()
+        try:
+            while self.running:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    # Worker thread
+
+    def _run(self):
+        # On a deadline rather than after an idle poll: process starts never stop
+        # coming on a busy system, and exit cleanup must not wait for a lull
+        next_housekeeping = time.monotonic() + self.poll_interval
+        while self.running:
+            try:
+                task = self._queue.get(timeout=max(0.0, next_housekeeping - time.monotonic()))
+            except queue.Empty:
+                task = None
+            if task is not None:
+                try:
+                    self._handle(task)
+                except Exception:
+                    logger.exception("Task %s failed", task[0])
+            if time.monotonic() >= next_housekeeping:
+                try:
+                    self._housekeeping()
+                except Exception:
+                    logger.exception("Housekeeping failed")
+                next_housekeeping = time.monotonic() + self.poll_interval
+
+    def _handle(self, task):
+        kind = task[0]
+        if kind == 'process':
+            process = task[1]
+            if process.pid not in self.managed:
+                rule = self._match(process)
+                if rule is not None:
+                    self._manage(rule, process)
+        elif kind == 'add_rule':
+            _, rule, once = task
+            self.session_rules.append(rule)
+            if once:
+                self._once.add(rule)
+            self._apply_to_running(rule)
+        elif kind == 'remove_rule':
+            self._drop_session_rule(task[1])
+        elif kind == 'apply_rule':
+            if not self._apply_to_running(task[1]):
+                self._emit({'event': 'error', 'rule': task[1].name, 'message': f"'{task[1].name}' is not running"})
+        elif kind == 'release_exclusive':
+            for managed in self.managed.values():
+                if managed.owns_exclusive:
+                    errors = managed.release_exclusive()
+                    self._emit({'event': 'released', 'pid': managed.pid, 'rule': managed.rule.name,
+                                'errors': errors})
+
+    def _match(self, process: psutil.Process) -> Optional[Rule]:
+        """First matching rule, session rules before file rules"""
+        for rule in self.session_rules + self.rules:
+            if rule.matches(process):
+                return rule
+        return None
+
+    def _apply_to_running(self, rule: Rule) -> int:
+        """Apply a rule to every running process it matches; returns how many"""
+        index = get_process_index()
+        if rule.match_name is not None:
+            candidates = index.find_all(rule.match_name)
+        else:
+            candidates = [info.process for info in (index.get(pid) for _, pid in index.processes()) if info]
+        applied = 0
+        for process in candidates:
+            current = self.managed.get(process.pid)
+            if current is not None and (current.rule is rule or rule.source == 'file'):
+                # Already done, or taken by a session rule, which wins over the file
+                continue
+            if rule.matches(process) and self._manage(rule, process):
+                applied += 1
+                if rule in self._once:
+                    break
+        return applied
+
+    def _manage(self, rule: Rule, process: psutil.Process) -> bool:
+        """Apply a rule to a process, replacing any earlier management of it"""
+        previous = self.managed.pop(process.pid, None)
+        if previous is not None:
+            previous.release()
+        if rule.exclusive:
+            # System-wide actions follow the most recently applied rule
+            for managed in self.managed.values():
+                if managed.owns_exclusive:
+                    managed.release_exclusive()
+        managed = ManagedProcess(rule, process, self.watchdog)
+        try:
+            summary = managed.apply()
+        except Exception as e:
+            managed.rollback()
+            if isinstance(e, psutil.AccessDenied):
+                message = "Access denied. Run as Administrator"
+            elif isinstance(e, psutil.NoSuchProcess):
+                message = "Process not found or terminated"
+            else:
+                message = str(e)
+            if isinstance(e, (psutil.Error, OSError, ValueError)):
+                logger.warning("Rule %s on PID %d failed: %s", rule.name, process.pid, message)
+            else:
+                logger.exception("Rule %s on PID %d failed", rule.name, process.pid)
+            self._emit({'event': 'error', 'pid': process.pid, 'rule': rule.name, 'message': message})
+            return False
+        self.managed[process.pid] = managed
+        if rule in self._once:
+            self._drop_session_rule(rule)
+        logger.info("Rule %s applied to PID %d: %s", rule.name, process.pid, summary)
+        self._emit({'event': 'applied', 'pid': process.pid, 'rule': rule.name, 'summary': summary})
+        return True
+
+    def _on_drift(self, event):
+        """Watchdog thread: report a repaired (or unrepairable) drift"""
+        managed = self.managed.get(event.pid)
+        self._emit({'event': 'drift', 'pid': event.pid, 'rule': managed.rule.name if managed else event.name,
+                    'kind': event.kind, 'repaired': event.repaired, 'message': event.describe()})
+
+    def _drop_session_rule(self, rule: Rule):
+        self.session_rules = [r for r in self.session_rules if r is not rule]
+        self._once.discard(rule)
+
+    def _housekeeping(self):
+        """Release processes that exited and pick up rules file changes"""
+        for pid, managed in list(self.managed.items()):
+            if not managed.process.is_running():
+                del self.managed[pid]
+                managed.release()
+                self._emit({'event': 'exited', 'pid': pid, 'rule': managed.rule.name})
+            elif managed.scheduling is not None and managed.scheduling.revert_reason:
+                # The guard already put the defaults back
+                reason = managed.scheduling.revert_reason
+                managed.scheduling = None
+                self._emit({'event': 'reverted', 'pid': pid, 'rule': managed.rule.name, 'reason': reason})
+        self._reload()
+
+    def _reload(self, initial=False):
+        """Re-read the rules file if it changed since the last load"""
+        try:
+            stat = os.stat(self.rules_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._file_stamp and not initial:
+            return
+        self._file_stamp = stamp
+        try:
+            rules, presets = load_rules_file(self.rules_path)
+        except (OSError, ValueError) as e:
+            # Keep running on the last good rules
+            logger.error("Rules file %s not loaded: %s", self.rules_path, e)
+            self._emit({'event': 'error', 'message': f"rules file: {e}"})
+            return
+
+        old = {json.dumps(rule.data, sort_keys=True): rule for rule in self.rules}
+        self.rules = [old.get(json.dumps(rule.data, sort_keys=True), rule) for rule in rules]
+        self.presets = presets
+        kept = set(map(id, self.rules))
+        for pid, managed in list(self.managed.items()):
+            if managed.rule.source == 'file' and id(managed.rule) not in kept:
+                # Its rule was edited or removed
+                del self.managed[pid]
+                managed.release()
+        for rule in self.rules:
+            if not self._is_applied(rule):
+                self._apply_to_running(rule)
+        logger.info("Loaded %d rules and %d presets from %s", len(self.rules), len(self.presets), self.rules_path)
+        self._emit({'event': 'reloaded', 'rules': len(self.rules), 'presets': len(self.presets)})
+
+    def _is_applied(self, rule: Rule) -> bool:
+        return any(managed.rule is rule for managed in self.managed.values())
+
+    def _emit(self, event: dict):
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Event listener failed")
+
+
+class DaemonClient:
+    """
+    A daemon that is already running, behind the client side of ThalixDaemon
+    Session rules, presets and events go through its control API, so a
+    second engine never starts (and never undoes the running one's journals).
+    Raises OSError when no daemon is listening.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS):
+        self.address = address
+        self.running = False
+        self._client = BlockingClient(address)
+        try:
+            # A server without a rules engine can't stand in for one
+            self._client.call('presets')
+        except BaseException:
+            self._client.close()
+            raise
+        self._listeners: List[Callable[[dict], None]] = []
+        self._rule_ids: Dict[Rule, int] = {}
+        self._events = None
+        self._thread = None
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        """Call callback(event) for every event, from the event thread"""
+        self._listeners.append(callback)
+
+    @property
+    def presets(self) -> Dict[str, dict]:
+        return self._client.call('presets')
+
+    def add_rule(self, data: dict, once: bool = False) -> Rule:
+        """Add a session rule to the daemon; it is dropped when this client disconnects"""
+        rule = Rule(data, self.presets, source='session')
+        self._rule_ids[rule] = self._client.call('add_rule', rule=data, once=once)
+        return rule
+
+    def remove_rule(self, rule: Rule):
+        rule_id = self._rule_ids.pop(rule, None)
+        if rule_id is not None:
+            try:
+                self._client.call('remove_rule', rule_id=rule_id)
+            except KeyError:
+                # A once-rule the daemon already dropped
+                pass
+
+    def apply_rule(self, data: dict) -> Rule:
+        rule = Rule(data, self.presets, source='session')
+        self._client.call('apply_rule', rule=data)
+        return rule
+
+    def release_exclusive(self, actions=EXCLUSIVE_ACTIONS):
+        self._client.call('release_exclusive', actions=list(actions))
+
+    def save_preset(self, name: str, preset: dict):
+        self._client.call('save_preset', name=name, preset=preset)
+
+    def delete_preset(self, name: str):
+        self._client.call('delete_preset', name=name)
+
+    def start(self):
+        """Start passing the daemon's events to the subscribers"""
+        if self.running:
+            return
+        self.running = True
+        # Events can be minutes apart: this connection waits without a timeout
+        self._events = BlockingClient(self.address, timeout=None)
+        self._thread = threading.Thread(target=self._forward_events, daemon=True, name='thalix-events')
+        self._thread.start()
+
+    def stop(self):
+        """Disconnect; the daemon drops this client's session rules"""
+        if not self.running:
+            return
+        self.running = False
+        for client in (self._events, self._client):
+            try:
+                client.close()
+            except (OSError, RuntimeError):
+                pass
+        self._thread.join(5.0)
+
+    def _forward_events(self):
+        try:
+            for event in self._events.stream('events'):
+                self._emit(event)
+        except (OSError, RuntimeError) as e:
+            if self.running:
+                logger.warning("Lost the daemon's events: %s", e)
+                self._emit({'event': 'error', 'message': "connection to the Thalix daemon lost"})
+
+    def _emit(self, event: dict):
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Event listener failed")
+
+
+def main():
+    """Run the daemon and its control API on the rules file given as the first argument (or the default one)"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    rules_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RULES_PATH
+    if server_running():
+        # Two engines would undo each other's journals and fight over the same rules
+        logger.error("Another Thalix engine is already running on %s", DEFAULT_ADDRESS)
+        sys.exit(1)
+    logger.info("Thalix daemon using %s", rules_path)
+    daemon = ThalixDaemon(rules_path)
+    # Scripts drive the daemon through the local control API
+    server = ThalixServer(daemon)
+    try:
+        server.start_background()
+    except OSError as e:
+        logger.warning("Control API not started: %s", e)
+    try:
+        daemon.run_forever()
+    finally:
+        server.stop_background()
+
+
+if __name__ == "__main__":
+    main()
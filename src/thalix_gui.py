@@ -4,18 +4,32 @@ import customtkinter as ctk
 import psutil
 import ctypes
 import threading
+import multiprocessing
 import time
 from PIL import Image, ImageTk
 import os
+import struct
 import sys
 
+from cpu_topology import PRESETS, get_topology
+from irq_affinity import IrqSteering
+from process_index import get_process_index
+from scheduling import PRIORITY_CLASSES
+from thalix_daemon import DaemonClient, ThalixDaemon
+from thalix_ipc import ThalixServer
+
 try:
-    from memory_editor import MemoryEditor, CheatTable, MemoryFreezer
+    from memory_editor import MemoryEditor, CheatTable
+    from memory_freezer import DEFAULT_FREEZE_INTERVAL, FrozenEntry, MemoryFreezer
+    from memory_scanner import ScanSession
+    from pointer_resolver import PointerResolver
 except ImportError:
     print("Memory editor module not available")
     MemoryEditor = None
     CheatTable = None
     MemoryFreezer = None
+    ScanSession = None
+    PointerResolver = None
 
 class ThalixGUI:
     def __init__(self):
@@ -76,20 +90,37 @@ class ThalixGUI:
         
         # Initialize variables
         self.monitoring = False
-        self.monitor_thread = None
+        self.monitor_rule = None
+        self.evict_var = tk.BooleanVar(value=False)
+        self.isolate_var = tk.BooleanVar(value=False)
+        self.policy_rules_var = tk.StringVar()
+        self.io_priority_var = tk.StringVar(value="default")
+        self.thread_mode_var = tk.BooleanVar(value=False)
+        self.thread_rules_var = tk.StringVar()
         self.process_name = tk.StringVar(value="eldenring.exe")
         self.selected_cpus = []
         self.cpu_vars = []
-        self.presets = {}  # Store CPU affinity presets
         self.cpu_usage_monitoring = False
         self.cpu_usage_thread = None
         self.search_var = tk.StringVar()
         self.search_var.trace('w', self.filter_processes)
+        self.process_index = get_process_index()
+        self.topology = get_topology()
+        # Does all process work on its own thread; events come back through the Tk loop.
+        # A daemon that is already running is driven instead of starting a second engine.
+        try:
+            self.daemon = DaemonClient()
+            self.local_engine = False
+        except (OSError, ValueError):
+            self.daemon = ThalixDaemon()
+            self.local_engine = True
+        self.daemon.subscribe(lambda event: self.root.after(0, self.on_daemon_event, event))
         
         # Memory editor variables
         self.memory_editor = None
         self.cheat_table = CheatTable() if CheatTable else None
         self.memory_freezer = None
+        self.pointer_resolver = None
         
         # Elden Ring Color Scheme (semi-transparent look)
         self.colors = {
@@ -347,8 +378,7 @@ class ThalixGUI:
         priority_menu = ctk.CTkOptionMenu(
             priority_frame,
             variable=self.priority_var,
-            values=["REALTIME_PRIORITY_CLASS", "HIGH_PRIORITY_CLASS", "ABOVE_NORMAL_PRIORITY_CLASS", 
-                    "NORMAL_PRIORITY_CLASS", "BELOW_NORMAL_PRIORITY_CLASS"],
+            values=list(PRIORITY_CLASSES),
             font=ctk.CTkFont(size=11),
             fg_color=self.colors['surface'],
             button_color=self.colors['primary'],
@@ -356,6 +386,73 @@ class ThalixGUI:
         )
         priority_menu.grid(row=0, column=1, sticky="ew")
         
+        ctk.CTkOptionMenu(
+            priority_frame,
+            variable=self.io_priority_var,
+            values=["default", "rt:0", "be:0", "be:4", "idle"],
+            width=90,
+            font=ctk.CTkFont(size=11),
+            fg_color=self.colors['surface'],
+            button_color=self.colors['primary'],
+            button_hover_color="#B8941F"
+        ).grid(row=0, column=2, padx=(10, 0))
+        
+        ctk.CTkEntry(
+            priority_frame,
+            textvariable=self.policy_rules_var,
+            placeholder_text="Thread policies, e.g. RenderThread*=fifo:50; heaviest:1=rr:10",
+            font=ctk.CTkFont(size=11),
+            fg_color=self.colors['surface'],
+            text_color=self.colors['text']
+        ).grid(row=1, column=0, columnspan=3, pady=(8, 0), sticky="ew")
+        
+        # Per-thread affinity
+        thread_frame = ctk.CTkFrame(
+            input_frame,
+            fg_color="transparent"
+        )
+        thread_frame.grid(row=3, column=0, padx=20, pady=(0, 15), sticky="ew")
+        thread_frame.grid_columnconfigure(1, weight=1)
+        
+        ctk.CTkSwitch(
+            thread_frame,
+            text="Per-thread",
+            variable=self.thread_mode_var,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=self.colors['text'],
+            progress_color=self.colors['primary']
+        ).grid(row=0, column=0, padx=(0, 10), sticky="w")
+        
+        ctk.CTkEntry(
+            thread_frame,
+            textvariable=self.thread_rules_var,
+            placeholder_text="Thread rules, e.g. RenderThread*=2; heaviest:1=3",
+            font=ctk.CTkFont(size=11),
+            fg_color=self.colors['surface'],
+            text_color=self.colors['text']
+        ).grid(row=0, column=1, sticky="ew")
+        
+        ctk.CTkSwitch(
+            thread_frame,
+            text="Evict other processes from these cores",
+            variable=self.evict_var,
+            command=self.on_evict_toggle,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=self.colors['text'],
+            progress_color=self.colors['primary']
+        ).grid(row=1, column=0, columnspan=2, pady=(8, 0), sticky="w")
+        
+        ctk.CTkSwitch(
+            thread_frame,
+            text="Kernel isolation (cgroup cpuset partition)",
+            variable=self.isolate_var,
+            command=self.on_isolate_toggle,
+            state="disabled" if os.name == 'nt' else "normal",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=self.colors['text'],
+            progress_color=self.colors['primary']
+        ).grid(row=2, column=0, columnspan=2, pady=(8, 0), sticky="w")
+        
         # Process info section
         info_frame = ctk.CTkFrame(
             process_frame,
@@ -556,9 +653,10 @@ class ThalixGUI:
             cpu_frame.pack(fill="x", padx=15, pady=3)
             cpu_frame.grid_columnconfigure(1, weight=1)
             
+            topology_label = self.topology.label(i)
             checkbox = ctk.CTkCheckBox(
                 cpu_frame,
-                text=f"Core {i}",
+                text=f"Core {i}  ({topology_label})" if topology_label else f"Core {i}",
                 variable=var,
                 font=ctk.CTkFont(family="Copperplate Gothic Bold", size=13, weight="bold"),
                 text_color=self.colors['text'],
@@ -669,7 +767,23 @@ class ThalixGUI:
             border_color=self.colors['border'],
             corner_radius=10
         )
-        load_preset_button.grid(row=1, column=0, columnspan=2, padx=(25, 8), pady=(8, 25), sticky="ew")
+        load_preset_button.grid(row=1, column=0, padx=(25, 4), pady=(8, 25), sticky="ew")
+        
+        # IRQ steering button (Linux only)
+        irq_button = ctk.CTkButton(
+            footer_frame,
+            text="IRQ STEERING",
+            command=self.open_irq_steering,
+            state="disabled" if os.name == 'nt' else "normal",
+            font=ctk.CTkFont(family="Copperplate Gothic Bold", size=13, weight="bold"),
+            height=40,
+            fg_color=self.colors['surface_light'],
+            hover_color=self.colors['surface'],
+            border_width=2,
+            border_color=self.colors['border'],
+            corner_radius=10
+        )
+        irq_button.grid(row=1, column=1, padx=(4, 8), pady=(8, 25), sticky="ew")
         
         # Performance Stats button
         stats_button = ctk.CTkButton(
@@ -727,12 +841,9 @@ class ThalixGUI:
             self.process_listbox.delete(0, tk.END)
             self.all_processes = []
             
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    if proc.info['name']:
-                        self.all_processes.append(f"{proc.info['name']} (PID: {proc.info['pid']})")
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            self.process_index.refresh(force=True)
+            for name, pid in self.process_index.processes():
+                self.all_processes.append(f"{name} (PID: {pid})")
                     
             self.all_processes.sort()
             
@@ -760,16 +871,14 @@ class ThalixGUI:
     def update_process_info(self, process_name):
         """Update process information display"""
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_affinity']):
-                if proc.info['name'] and proc.info['name'].lower() == process_name.lower():
-                    try:
-                        p = psutil.Process(proc.info['pid'])
-                        affinity = p.cpu_affinity()
-                        info_text = f"Process: {process_name}\nPID: {proc.info['pid']}\nCurrent Affinity: {affinity}"
-                        self.process_info_label.configure(text=info_text)
-                        return
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
+            for p in self.process_index.find_all(process_name):
+                try:
+                    affinity = p.cpu_affinity()
+                    info_text = f"Process: {process_name}\nPID: {p.pid}\nCurrent Affinity: {affinity}"
+                    self.process_info_label.configure(text=info_text)
+                    return
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
                         
             self.process_info_label.configure(text=f"Process: {process_name}\nStatus: Not found or access denied")
             
@@ -793,13 +902,32 @@ class ThalixGUI:
         self.update_status("All CPU cores deselected", self.colors['warning'])
         
     def select_performance_cores(self):
-        """Select performance cores (even-numbered cores)"""
+        """Select one thread per fast core in a single cache domain, core 0 excluded"""
+        selected = set(self.topology.preset('game'))
         for i, var in enumerate(self.cpu_vars):
-            var.set(i % 2 == 0)
-        self.update_status("Performance cores selected", self.colors['success'])
+            var.set(i in selected)
+        self.update_status(f"{PRESETS['game'][0]}: {sorted(selected)}", self.colors['success'])
+        
+    def build_rule(self, process_name, selected_cpus):
+        """Session rule for the daemon from the current settings"""
+        rule = {
+            'match': {'name': process_name},
+            'cpus': selected_cpus,
+            'priority': self.priority_var.get(),
+            'evict': self.evict_var.get(),
+            'isolate': self.isolate_var.get(),
+        }
+        if self.thread_mode_var.get():
+            rule['per_thread'] = True
+            rule['threads'] = self.thread_rules_var.get()
+        if self.policy_rules_var.get().strip():
+            rule['policies'] = self.policy_rules_var.get()
+        if self.io_priority_var.get() != "default":
+            rule['io_priority'] = self.io_priority_var.get()
+        return rule
         
     def apply_affinity(self):
-        """Apply CPU affinity to the selected process"""
+        """Apply CPU affinity and the other settings to the selected process (through the daemon)"""
         process_name = self.process_name.get().strip()
         if not process_name:
             self.update_status("Please enter a process name", self.colors['error'])
@@ -810,34 +938,26 @@ class ThalixGUI:
             self.update_status("Please select at least one CPU core", self.colors['error'])
             return
             
+        if not self.process_index.find(process_name):
+            self.update_status(f"Process '{process_name}' not found", self.colors['error'])
+            return
         try:
-            # Find the process
-            target_process = None
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'] and proc.info['name'].lower() == process_name.lower():
-                    target_process = psutil.Process(proc.info['pid'])
-                    break
-                    
-            if not target_process:
-                self.update_status(f"Process '{process_name}' not found", self.colors['error'])
-                return
-                
-            # Apply affinity
-            target_process.cpu_affinity(selected_cpus)
-            new_affinity = target_process.cpu_affinity()
-            
-            self.update_status(
-                f"Affinity set for '{process_name}': {new_affinity}", 
-                self.colors['success']
-            )
-            
-        except psutil.AccessDenied:
-            self.update_status("Access denied. Run as Administrator", self.colors['error'])
-        except psutil.NoSuchProcess:
-            self.update_status("Process not found or terminated", self.colors['error'])
-        except Exception as e:
-            self.update_status(f"Error: {str(e)}", self.colors['error'])
-            
+            self.daemon.apply_rule(self.build_rule(process_name, selected_cpus))
+        except ValueError as e:
+            self.update_status(str(e), self.colors['error'])
+            return
+        self.update_status(f"Applying to '{process_name}'...", self.colors['warning'])
+        
+    def on_evict_toggle(self):
+        """Restore evicted processes when the switch is turned off"""
+        if not self.evict_var.get():
+            self.daemon.release_exclusive(('evict',))
+        
+    def on_isolate_toggle(self):
+        """Tear the cpusets down when the switch is turned off"""
+        if not self.isolate_var.get():
+            self.daemon.release_exclusive(('isolate',))
+        
     def toggle_monitoring(self):
         """Toggle process monitoring"""
         if not self.monitoring:
@@ -845,45 +965,56 @@ class ThalixGUI:
             if not process_name:
                 self.update_status("Please enter a process name first", self.colors['error'])
                 return
+            selected_cpus = self.get_selected_cpus()
+            if not selected_cpus:
+                self.update_status("Please select at least one CPU core", self.colors['error'])
+                return
+            try:
+                # The daemon applies it the moment the process starts, then drops it
+                self.monitor_rule = self.daemon.add_rule(self.build_rule(process_name, selected_cpus), once=True)
+            except ValueError as e:
+                self.update_status(str(e), self.colors['error'])
+                return
                 
             self.monitoring = True
             self.monitor_button.configure(text="STOP MONITORING")
             self.apply_button.configure(state="disabled")
-            
-            # Start monitoring thread
-            self.monitor_thread = threading.Thread(target=self.monitor_process, daemon=True)
-            self.monitor_thread.start()
-            
             self.update_status(f"Monitoring for '{process_name}'...", self.colors['warning'])
         else:
             self.monitoring = False
+            if self.monitor_rule:
+                self.daemon.remove_rule(self.monitor_rule)
+                self.monitor_rule = None
             self.monitor_button.configure(text="START MONITORING")
             self.apply_button.configure(state="normal")
             self.update_status("Monitoring stopped", self.colors['text'])
             
-    def monitor_process(self):
-        """Monitor for the target process and apply affinity when found"""
-        process_name = self.process_name.get().strip()
-        
-        while self.monitoring:
-            try:
-                # Check if process exists
-                found = False
-                for proc in psutil.process_iter(['pid', 'name']):
-                    if proc.info['name'] and proc.info['name'].lower() == process_name.lower():
-                        found = True
-                        break
-                        
-                if found:
-                    # Apply affinity
-                    self.root.after(0, self.apply_affinity)
-                    self.root.after(0, lambda: self.toggle_monitoring())
-                    break
-                    
-            except Exception as e:
-                self.root.after(0, lambda: self.update_status(f"Monitor error: {str(e)}", self.colors['error']))
-                
-            time.sleep(2)  # Check every 2 seconds
+    def stop_monitoring(self):
+        """Stop monitoring if it is still running"""
+        if self.monitoring:
+            self.toggle_monitoring()
+            
+    def on_daemon_event(self, event):
+        """Show what the daemon did (Tk thread)"""
+        kind = event['event']
+        if kind == 'applied':
+            if self.monitor_rule and event['rule'] == self.monitor_rule.name:
+                # A once-rule is gone after its first match
+                self.monitor_rule = None
+                self.stop_monitoring()
+            self.update_status(f"'{event['rule']}' (PID {event['pid']}): {event['summary']}", self.colors['success'])
+        elif kind == 'error':
+            self.update_status(f"Error: {event['message']}", self.colors['error'])
+        elif kind == 'released':
+            if event['errors']:
+                self.update_status(f"Release: {'; '.join(event['errors'])}", self.colors['warning'])
+            else:
+                self.update_status(f"Released system-wide changes for '{event['rule']}'", self.colors['success'])
+        elif kind == 'drift':
+            self.update_status(f"Drift: {event['message']}",
+                               self.colors['warning'] if event['repaired'] else self.colors['error'])
+        elif kind == 'reverted':
+            self.update_status(f"Scheduling reverted: {event['reason']}", self.colors['warning'])
             
     def filter_processes(self, *args):
         """Filter process list based on search query"""
@@ -937,38 +1068,6 @@ class ThalixGUI:
     def apply_affinity_and_priority(self):
         """Apply both CPU affinity and process priority"""
         self.apply_affinity()
-        self.set_process_priority()
-    
-    def set_process_priority(self):
-        """Set process priority"""
-        process_name = self.process_name.get().strip()
-        if not process_name:
-            return
-        
-        priority_map = {
-            "REALTIME_PRIORITY_CLASS": psutil.REALTIME_PRIORITY_CLASS,
-            "HIGH_PRIORITY_CLASS": psutil.HIGH_PRIORITY_CLASS,
-            "ABOVE_NORMAL_PRIORITY_CLASS": psutil.ABOVE_NORMAL_PRIORITY_CLASS,
-            "NORMAL_PRIORITY_CLASS": psutil.NORMAL_PRIORITY_CLASS,
-            "BELOW_NORMAL_PRIORITY_CLASS": psutil.BELOW_NORMAL_PRIORITY_CLASS
-        }
-        
-        try:
-            target_process = None
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'] and proc.info['name'].lower() == process_name.lower():
-                    target_process = psutil.Process(proc.info['pid'])
-                    break
-            
-            if target_process:
-                priority = priority_map[self.priority_var.get()]
-                target_process.nice(priority)
-                self.update_status(
-                    f"Priority set to {self.priority_var.get()}",
-                    self.colors['success']
-                )
-        except Exception as e:
-            self.update_status(f"Priority error: {str(e)}", self.colors['error'])
     
     def save_preset(self):
         """Save current CPU affinity configuration as a preset"""
@@ -985,16 +1084,21 @@ class ThalixGUI:
         preset_name = dialog.get_input()
         
         if preset_name:
-            self.presets[preset_name] = {
-                'cpus': selected_cpus,
-                'priority': self.priority_var.get()
-            }
+            try:
+                # Kept in the rules file, so rules can use it by name
+                self.daemon.save_preset(preset_name, {
+                    'cpus': selected_cpus,
+                    'priority': self.priority_var.get()
+                })
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Could not save preset: {e}")
+                return
             self.update_status(f"Preset '{preset_name}' saved!", self.colors['success'])
             messagebox.showinfo("Success", f"Preset '{preset_name}' saved successfully!")
     
     def load_preset(self):
         """Load a saved CPU affinity preset"""
-        if not self.presets:
+        if not self.daemon.presets:
             messagebox.showinfo("No Presets", "No presets available. Save a preset first!")
             return
         
@@ -1029,7 +1133,7 @@ class ThalixGUI:
         ).pack(pady=20)
         
         # Preset list
-        for preset_name, preset_data in self.presets.items():
+        for preset_name, preset_data in self.daemon.presets.items():
             preset_frame = ctk.CTkFrame(
                 main_frame,
                 fg_color=self.colors['surface_light'],
@@ -1037,7 +1141,7 @@ class ThalixGUI:
             )
             preset_frame.pack(fill="x", padx=20, pady=10)
             
-            info_text = f"{preset_name}\nCPUs: {preset_data['cpus']}\nPriority: {preset_data['priority']}"
+            info_text = f"{preset_name}\nCPUs: {preset_data['cpus']}\nPriority: {preset_data.get('priority', '-')}"
             
             ctk.CTkLabel(
                 preset_frame,
@@ -1071,7 +1175,8 @@ class ThalixGUI:
             var.set(i in preset_data['cpus'])
         
         # Set priority
-        self.priority_var.set(preset_data['priority'])
+        if preset_data.get('priority'):
+            self.priority_var.set(preset_data['priority'])
         
         self.update_status("Preset loaded!", self.colors['success'])
         window.destroy()
@@ -1165,6 +1270,86 @@ Percentage: {disk.percent}%
             hover_color="#B8941F"
         ).pack(pady=20)
     
+    def open_irq_steering(self):
+        """Window to move device interrupts off the selected cores, with rates before and after"""
+        selected_cpus = self.get_selected_cpus()
+        if not selected_cpus:
+            self.update_status("Please select the game's CPU cores first", self.colors['error'])
+            return
+        steering = IrqSteering(selected_cpus)
+        
+        irq_window = ctk.CTkToplevel(self.root)
+        irq_window.title("IRQ Steering")
+        irq_window.geometry("760x520")
+        irq_window.configure(fg_color=self.colors['background'])
+        irq_window.transient(self.root)
+        
+        main_frame = ctk.CTkFrame(
+            irq_window,
+            fg_color=self.colors['surface'],
+            corner_radius=15,
+            border_width=2,
+            border_color=self.colors['border']
+        )
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        ctk.CTkLabel(
+            main_frame,
+            text="IRQ STEERING",
+            font=ctk.CTkFont(size=24, weight="bold"),
+            text_color=self.colors['primary']
+        ).pack(pady=(20, 10))
+        
+        report_frame = ctk.CTkScrollableFrame(
+            main_frame,
+            fg_color=self.colors['surface_light'],
+            corner_radius=10
+        )
+        report_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        report_label = ctk.CTkLabel(
+            report_frame,
+            text="Dry run measures interrupt rates for one second and shows the plan",
+            font=ctk.CTkFont(family="Consolas", size=12),
+            text_color=self.colors['text'],
+            justify="left"
+        )
+        report_label.pack(padx=10, pady=10, anchor="w")
+        
+        button_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        button_frame.pack(pady=(5, 15))
+        
+        def run(action):
+            # Sampling sleeps for a second, so keep it off the Tk thread
+            report_label.configure(text="Measuring interrupt rates...")
+            
+            def worker():
+                try:
+                    if action == 'restore':
+                        errors = steering.restore()
+                        text = "Restored original IRQ affinities"
+                        if errors:
+                            text += "\n" + "\n".join(f"IRQ {irq}: {error}" for irq, error in errors.items())
+                    else:
+                        moves, before, after = steering.steer(dry_run=action == 'dry_run')
+                        text = steering.report(moves, before, after)
+                except OSError as e:
+                    text = f"Error: {e}"
+                self.root.after(0, lambda: report_label.configure(text=text))
+                
+            threading.Thread(target=worker, daemon=True).start()
+        
+        for column, (label, action) in enumerate((("DRY RUN", 'dry_run'), ("APPLY", 'apply'),
+                                                  ("RESTORE", 'restore'))):
+            ctk.CTkButton(
+                button_frame,
+                text=label,
+                command=lambda action=action: run(action),
+                width=140,
+                fg_color=self.colors['primary'],
+                hover_color="#B8941F"
+            ).grid(row=0, column=column, padx=8)
+    
     def open_settings(self):
         """Open settings dialog with Elden Ring styling"""
         settings_window = ctk.CTkToplevel(self.root)
@@ -1274,12 +1459,8 @@ Percentage: {disk.percent}%
             return
             
         # Find process PID
-        target_pid = None
-        for proc in psutil.process_iter(['pid', 'name']):
-            if proc.info['name'] and proc.info['name'].lower() == process_name.lower():
-                target_pid = proc.info['pid']
-                break
-                
+        target_process = self.process_index.find(process_name)
+        target_pid = target_process.pid if target_process else None
         if not target_pid:
             messagebox.showerror("Error", f"Process '{process_name}' not found!")
             return
@@ -1299,8 +1480,9 @@ Percentage: {disk.percent}%
             mem_window.destroy()
             return
             
-        # Initialize memory freezer
+        # Initialize memory freezer and pointer chain cache
         self.memory_freezer = MemoryFreezer(self.memory_editor)
+        self.pointer_resolver = PointerResolver(self.memory_editor)
         
         # Main container
         main_frame = ctk.CTkFrame(
@@ -1382,6 +1564,17 @@ Percentage: {disk.percent}%
         )
         type_menu.pack(fill="x")
         
+        # First scan mode
+        scan_mode_var = tk.StringVar(value="Exact value")
+        ctk.CTkOptionMenu(
+            type_frame,
+            variable=scan_mode_var,
+            values=["Exact value", "Unknown initial value"],
+            font=ctk.CTkFont(size=12),
+            fg_color=self.colors['surface'],
+            button_color=self.colors['primary']
+        ).pack(fill="x", pady=(5, 0))
+        
         # Scan results listbox
         results_frame = ctk.CTkFrame(scanner_frame, fg_color=self.colors['background'], corner_radius=8)
         results_frame.pack(fill="both", expand=True, padx=15, pady=15)
@@ -1404,60 +1597,207 @@ Percentage: {disk.percent}%
         results_listbox.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         
         scan_addresses = []  # Store scan results
+        scan_session = {'session': None}
+        scan_state = {'running': False}
+        
+        # Next Scan predicates (label -> ScanSession predicate)
+        next_scan_types = {
+            "Exact value": 'exact',
+            "Changed": 'changed',
+            "Unchanged": 'unchanged',
+            "Increased": 'increased',
+            "Decreased": 'decreased',
+            "Increased by": 'increased_by',
+            "Decreased by": 'decreased_by',
+            "Between": 'between',
+        }
+        
+        def parse_scan_value(value_str, value_type):
+            """Convert entry text to the scan value type"""
+            if value_type in ('int', 'long'):
+                return int(value_str)
+            return float(value_str)
+        
+        def show_scan_results():
+            """Show the first candidates of the current scan"""
+            session = scan_session['session']
+            results_listbox.delete(0, tk.END)
+            scan_addresses.clear()
+            
+            count = len(session) if session else 0
+            if session and session.snapshot is not None:
+                results_listbox.insert(0, "Snapshot taken - change the value, then Next Scan")
+                scan_count_label.configure(text=f"Unknown initial value: {count:,} candidates")
+                return
+            if count == 0:
+                results_listbox.insert(0, "No results found")
+                scan_count_label.configure(text="Found: 0")
+                return
+                
+            for addr in session.results.page(0, 500)[0].tolist():  # Limit to 500 results
+                results_listbox.insert(tk.END, f"0x{addr:X}")
+                scan_addresses.append(addr)
+            if count > 500:
+                scan_count_label.configure(text=f"Found: {count:,} (showing first 500)")
+            else:
+                scan_count_label.configure(text=f"Found: {count:,}")
+        
+        def run_scan_in_background(scan):
+            """Run a scan off the Tk thread and show the results when it finishes"""
+            if scan_state['running']:
+                return
+            scan_state['running'] = True
+            results_listbox.delete(0, tk.END)
+            results_listbox.insert(0, "Scanning memory...")
+            for button in scan_buttons:
+                button.configure(state="disabled")
+                
+            def finish(error=None):
+                scan_state['running'] = False
+                if not mem_window.winfo_exists():
+                    return
+                for button in scan_buttons:
+                    button.configure(state="normal")
+                if error:
+                    results_listbox.delete(0, tk.END)
+                    messagebox.showerror("Scan Error", f"Error during scan: {error}")
+                else:
+                    show_scan_results()
+                    
+            def worker():
+                try:
+                    scan()
+                except Exception as e:
+                    mem_window.after(0, lambda err=str(e): finish(err))
+                    return
+                mem_window.after(0, finish)
+                
+            threading.Thread(target=worker, daemon=True).start()
         
         def perform_scan():
             """Perform memory scan"""
             value_str = scan_value_var.get().strip()
-            if not value_str:
+            unknown_initial = scan_mode_var.get() == "Unknown initial value"
+            if not value_str and not unknown_initial:
                 messagebox.showwarning("No Value", "Enter a value to scan!")
                 return
                 
+            value_type = type_var.get()
             try:
-                value_type = type_var.get()
-                if value_type == 'int':
-                    value = int(value_str)
-                elif value_type == 'float':
-                    value = float(value_str)
-                elif value_type == 'long':
-                    value = int(value_str)
-                elif value_type == 'double':
-                    value = float(value_str)
-                    
-                # Show scanning message
-                results_listbox.delete(0, tk.END)
-                results_listbox.insert(0, "Scanning memory...")
-                mem_window.update()
-                
-                # Perform scan
-                addresses = self.memory_editor.scan_memory(value, value_type, 0x10000, 0x7FFFFFFF)
+                value = None if unknown_initial else parse_scan_value(value_str, value_type)
+            except ValueError:
+                messagebox.showwarning("Invalid Value", "Enter a valid value for this type!")
+                return
                 
-                # Update results
-                results_listbox.delete(0, tk.END)
-                scan_addresses.clear()
+            # Parallel workers stay off the cores selected for the game
+            workers = parallel_workers() if parallel_var.get() else None
+            avoid_cpus = self.get_selected_cpus()
                 
-                if len(addresses) > 1000:
-                    results_listbox.insert(0, f"Too many results ({len(addresses)}). Refine your search!")
+            def scan():
+                if scan_session['session']:
+                    scan_session['session'].reset()
+                session = ScanSession(self.memory_editor, value_type)
+                if unknown_initial:
+                    session.first_scan_unknown()
                 else:
-                    for addr in addresses[:500]:  # Limit to 500 results
-                        results_listbox.insert(tk.END, f"0x{addr:X}")
-                        scan_addresses.append(addr)
-                        
-                    if len(addresses) == 0:
-                        results_listbox.insert(0, "No results found")
-                        
-            except Exception as e:
-                messagebox.showerror("Scan Error", f"Error during scan: {str(e)}")
+                    session.first_scan(value, workers=workers, avoid_cpus=avoid_cpus)
+                scan_session['session'] = session
+                
+            run_scan_in_background(scan)
         
-        # Scan button
-        ctk.CTkButton(
+        def perform_next_scan():
+            """Narrow the previous scan results"""
+            session = scan_session['session']
+            if not session or session.value_type != type_var.get():
+                messagebox.showwarning("No Scan", "Run a first scan with this value type first!")
+                return
+                
+            predicate = next_scan_types[next_scan_var.get()]
+            try:
+                value = value2 = None
+                if predicate in ('exact', 'increased_by', 'decreased_by', 'between'):
+                    value = parse_scan_value(scan_value_var.get().strip(), session.value_type)
+                if predicate == 'between':
+                    value2 = parse_scan_value(scan_value2_var.get().strip(), session.value_type)
+            except ValueError:
+                messagebox.showwarning("Invalid Value", "Enter valid value(s) for this scan type!")
+                return
+                
+            run_scan_in_background(lambda: session.next_scan(predicate, value, value2))
+        
+        def parallel_workers():
+            """Scan workers: every core not reserved for the game"""
+            game_cpus = set(self.get_selected_cpus())
+            free_cpus = [cpu for cpu in range(psutil.cpu_count() or 1) if cpu not in game_cpus]
+            return max(2, len(free_cpus))
+        
+        scan_count_label = ctk.CTkLabel(
+            scanner_frame,
+            text="Found: 0",
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors['text_secondary']
+        )
+        scan_count_label.pack(anchor="w", padx=15, pady=(0, 5))
+        
+        # Next scan options
+        next_scan_frame = ctk.CTkFrame(scanner_frame, fg_color="transparent")
+        next_scan_frame.pack(fill="x", padx=15, pady=(0, 10))
+        next_scan_frame.grid_columnconfigure((0, 1), weight=1)
+        
+        next_scan_var = tk.StringVar(value="Exact value")
+        ctk.CTkOptionMenu(
+            next_scan_frame,
+            variable=next_scan_var,
+            values=list(next_scan_types),
+            font=ctk.CTkFont(size=12),
+            fg_color=self.colors['surface'],
+            button_color=self.colors['primary']
+        ).grid(row=0, column=0, padx=(0, 5), sticky="ew")
+        
+        scan_value2_var = tk.StringVar()
+        ctk.CTkEntry(
+            next_scan_frame,
+            textvariable=scan_value2_var,
+            placeholder_text="and (Between)",
+            font=ctk.CTkFont(size=12)
+        ).grid(row=0, column=1, padx=(5, 0), sticky="ew")
+        
+        parallel_var = tk.BooleanVar(value=False)
+        ctk.CTkSwitch(
             scanner_frame,
+            text="Parallel scan (off game cores)",
+            variable=parallel_var,
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors['text'],
+            progress_color=self.colors['primary']
+        ).pack(anchor="w", padx=15, pady=(0, 10))
+        
+        scan_button_frame = ctk.CTkFrame(scanner_frame, fg_color="transparent")
+        scan_button_frame.pack(fill="x", padx=15, pady=(0, 15))
+        scan_button_frame.grid_columnconfigure((0, 1), weight=1)
+        
+        # Scan buttons
+        first_scan_button = ctk.CTkButton(
+            scan_button_frame,
             text="FIRST SCAN",
             command=perform_scan,
             font=ctk.CTkFont(family="Copperplate Gothic Bold", size=13, weight="bold"),
             fg_color=self.colors['success'],
             hover_color="#45A049",
             height=40
-        ).pack(fill="x", padx=15, pady=(0, 15))
+        )
+        first_scan_button.grid(row=0, column=0, padx=(0, 5), sticky="ew")
+        
+        next_scan_button = ctk.CTkButton(
+            scan_button_frame,
+            text="NEXT SCAN",
+            command=perform_next_scan,
+            font=ctk.CTkFont(family="Copperplate Gothic Bold", size=13, weight="bold"),
+            fg_color=self.colors['primary'],
+            height=40
+        )
+        next_scan_button.grid(row=0, column=1, padx=(5, 0), sticky="ew")
+        scan_buttons = (first_scan_button, next_scan_button)
         
         # Right panel - Cheat Table
         table_frame = ctk.CTkFrame(
@@ -1494,7 +1834,7 @@ Percentage: {disk.percent}%
         table_tree.column('Address', width=120)
         table_tree.column('Type', width=60)
         table_tree.column('Value', width=100)
-        table_tree.column('Frozen', width=60)
+        table_tree.column('Frozen', width=110)
         table_tree.column('Description', width=200)
         
         table_tree.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
@@ -1504,28 +1844,52 @@ Percentage: {disk.percent}%
         table_scrollbar.grid(row=0, column=1, sticky="ns")
         table_tree.configure(yscrollcommand=table_scrollbar.set)
         
+        def entry_address(entry):
+            """Address of a table entry, following its pointer chain if it has one"""
+            offsets = entry.get('offsets')
+            if offsets:
+                return self.pointer_resolver.compile(entry['address'], offsets).resolve()
+            return entry['address']
+        
         def refresh_table():
             """Refresh cheat table display"""
             table_tree.delete(*table_tree.get_children())
-            for i, entry in enumerate(self.cheat_table.entries):
-                addr_str = f"0x{entry['address']:X}"
+            entries = self.cheat_table.entries
+            addresses = [entry_address(entry) for entry in entries]
+            
+            # Read every value in one batch
+            requests = []
+            for entry, address in zip(entries, addresses):
+                if address is not None and entry['type'] in ('int', 'float', 'long', 'double'):
+                    requests.append((address, entry['type']))
+            batch = iter(self.memory_editor.read_batch(requests))
                 
-                # Read current value
-                try:
-                    if entry['type'] == 'int':
-                        value = self.memory_editor.read_int(entry['address'])
-                    elif entry['type'] == 'float':
-                        value = self.memory_editor.read_float(entry['address'])
-                    elif entry['type'] == 'long':
-                        value = self.memory_editor.read_long(entry['address'])
-                    elif entry['type'] == 'double':
-                        value = self.memory_editor.read_double(entry['address'])
-                    else:
-                        value = "???"
-                except:
-                    value = "Error"
+            for i, (entry, address) in enumerate(zip(entries, addresses)):
+                if entry.get('offsets'):
+                    addr_str = f"P->0x{address:X}" if address is not None else "P->???"
+                else:
+                    addr_str = f"0x{address:X}"
                     
-                frozen_str = "✓" if entry.get('frozen', False) else ""
+                if address is None:
+                    value = "Error"
+                elif entry['type'] not in ('int', 'float', 'long', 'double'):
+                    value = "???"
+                else:
+                    value = next(batch)
+                    if value is None and entry.get('offsets'):
+                        # The chain may have moved; re-walk it next time
+                        self.pointer_resolver.compile(entry['address'], entry['offsets']).invalidate()
+                        
+                frozen_str = ""
+                if entry.get('frozen', False):
+                    frozen_str = "✓"
+                    frozen = self.memory_freezer.frozen_addresses.get(entry.get('frozen_address', address))
+                    if frozen is not None:
+                        summary = frozen.stats.summary()
+                        if summary['jitter_p99'] is not None:
+                            frozen_str += f" p99 {summary['jitter_p99'] * 1000:.2f}ms"
+                        if summary['failures']:
+                            frozen_str += " !"
                 table_tree.insert('', 'end', iid=i, values=(
                     addr_str,
                     entry['type'],
@@ -1533,6 +1897,21 @@ Percentage: {disk.percent}%
                     frozen_str,
                     entry.get('description', '')
                 ))
+            update_freeze_stats()
+            
+        def update_freeze_stats():
+            """Show write counts, lost races and tick jitter of all frozen entries"""
+            if not self.memory_freezer.frozen_addresses:
+                freeze_stats_label.configure(text="Freeze: nothing frozen")
+                return
+            summary = self.memory_freezer.get_total_stats()
+            text = (f"Freeze: {len(self.memory_freezer.frozen_addresses)} entries | "
+                    f"{summary['writes']:,} writes | {summary['failures']:,} failed | "
+                    f"{summary['races']:,} overwritten by game")
+            if summary['jitter_p99'] is not None:
+                text += (f"\nJitter min/avg/p99: {summary['jitter_min'] * 1000:.3f} / "
+                         f"{summary['jitter_avg'] * 1000:.3f} / {summary['jitter_p99'] * 1000:.3f} ms")
+            freeze_stats_label.configure(text=text)
         
         def add_address_to_table():
             """Add selected address to cheat table"""
@@ -1572,18 +1951,21 @@ Percentage: {disk.percent}%
             new_value_str = ctk.CTkInputDialog(text="Enter new value:", title="Modify Value").get_input()
             if new_value_str:
                 try:
+                    address = entry_address(entry)
+                    if address is None:
+                        raise ValueError("Pointer chain could not be resolved")
                     if entry['type'] == 'int':
                         new_value = int(new_value_str)
-                        self.memory_editor.write_int(entry['address'], new_value)
+                        self.memory_editor.write_int(address, new_value)
                     elif entry['type'] == 'float':
                         new_value = float(new_value_str)
-                        self.memory_editor.write_float(entry['address'], new_value)
+                        self.memory_editor.write_float(address, new_value)
                     elif entry['type'] == 'long':
                         new_value = int(new_value_str)
-                        self.memory_editor.write_long(entry['address'], new_value)
+                        self.memory_editor.write_long(address, new_value)
                     elif entry['type'] == 'double':
                         new_value = float(new_value_str)
-                        self.memory_editor.write_double(entry['address'], new_value)
+                        self.memory_editor.write_double(address, new_value)
                         
                     refresh_table()
                     messagebox.showinfo("Success", "Value modified successfully!")
@@ -1603,26 +1985,46 @@ Percentage: {disk.percent}%
             if not entry:
                 return
                 
-            entry['frozen'] = not entry.get('frozen', False)
-            
-            if entry['frozen']:
+            if not entry.get('frozen', False):
+                address = entry_address(entry)
+                if address is None:
+                    messagebox.showerror("Error", "Pointer chain could not be resolved!")
+                    return
+                    
                 # Read current value and freeze it
+                value = None
                 if entry['type'] == 'int':
-                    value = self.memory_editor.read_int(entry['address'])
+                    value = self.memory_editor.read_int(address)
                 elif entry['type'] == 'float':
-                    value = self.memory_editor.read_float(entry['address'])
+                    value = self.memory_editor.read_float(address)
                 elif entry['type'] == 'long':
-                    value = self.memory_editor.read_long(entry['address'])
+                    value = self.memory_editor.read_long(address)
                 elif entry['type'] == 'double':
-                    value = self.memory_editor.read_double(entry['address'])
+                    value = self.memory_editor.read_double(address)
+                if value is None:
+                    messagebox.showerror("Error", f"Cannot read a {entry['type']} value at 0x{address:X}!")
+                    return
                     
+                # A chained entry follows its chain when it moves (respawn, level load)
+                chain = None
+                if entry.get('offsets'):
+                    chain = self.pointer_resolver.compile(entry['address'], entry['offsets'])
+                # Packed before the row is marked, so a bad value leaves it unfrozen
+                try:
+                    frozen = FrozenEntry(address, value, entry['type'], DEFAULT_FREEZE_INTERVAL, False, chain)
+                except (KeyError, TypeError, ValueError, struct.error) as e:
+                    messagebox.showerror("Error", f"Cannot freeze {value!r} as {entry['type']}: {e}")
+                    return
+                self.memory_freezer.add_frozen_entries([frozen])
+                entry['frozen'] = True
                 entry['frozen_value'] = value
-                self.memory_freezer.add_frozen_address(entry['address'], value, entry['type'])
+                entry['frozen_address'] = address
                 
                 if not self.memory_freezer.running:
                     self.memory_freezer.start()
             else:
-                self.memory_freezer.remove_frozen_address(entry['address'])
+                entry['frozen'] = False
+                self.memory_freezer.remove_frozen_address(entry.get('frozen_address', entry['address']))
                 
             refresh_table()
         
@@ -1696,6 +2098,15 @@ Percentage: {disk.percent}%
             height=35
         ).grid(row=0, column=4, padx=2, sticky="ew")
         
+        freeze_stats_label = ctk.CTkLabel(
+            table_frame,
+            text="Freeze: nothing frozen",
+            font=ctk.CTkFont(size=11),
+            text_color=self.colors['text_secondary'],
+            justify="left"
+        )
+        freeze_stats_label.grid(row=3, column=0, padx=15, pady=(0, 10), sticky="w")
+        
         # Auto-refresh table values
         def auto_refresh():
             if mem_window.winfo_exists():
@@ -1715,6 +2126,8 @@ Percentage: {disk.percent}%
         
         # Cleanup on close
         def on_closing():
+            if scan_session['session']:
+                scan_session['session'].reset()
             if self.memory_freezer:
                 self.memory_freezer.stop()
             if self.memory_editor:
@@ -1728,11 +2141,31 @@ Percentage: {disk.percent}%
         # Load initial process list
         self.refresh_process_list()
         
+        # A local engine also undoes an eviction or cpusets left behind by a crash
+        self.daemon.start()
+        control_api = None
+        if self.local_engine:
+            # Lets scripts drive the same engine while the GUI is open
+            control_api = ThalixServer(self.daemon)
+            try:
+                control_api.start_background()
+            except OSError as e:
+                print(f"Control API not started: {e}")
+        else:
+            self.update_status("Connected to the running Thalix daemon", self.colors['success'])
+        
         # Start the main loop
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if control_api is not None:
+                control_api.stop_background()
+            self.daemon.stop()
 
 def main():
     """Main entry point"""
+    # Parallel scan workers re-launch the frozen executable
+    multiprocessing.freeze_support()
     app = ThalixGUI()
     app.run()
 
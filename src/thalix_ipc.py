@@ -0,0 +1,777 @@
+"""
+Thalix IPC - local control API for the engine
+An asyncio server on a Unix socket (a named pipe on Windows) speaking JSON
+lines, and a matching client. Every request carries an id and runs as its
+own task, so a client can pipeline requests and replies come back as they
+finish. Blocking work (process calls, memory scans) runs in a thread pool,
+so slow requests from one client don't hold up the others. Streaming
+requests send items before their final reply.
+
+    -> {"id": 1, "method": "set_affinity", "params": {"pid": 1234, "cpus": [2, 3]}}
+    <- {"id": 1, "result": [2, 3]}
+    -> {"id": 2, "method": "scan_results", "params": {"session": 1}}
+    <- {"id": 2, "item": [[addresses...], [values...]]}
+    <- {"id": 2, "result": 1000}
+    <- {"id": 3, "error": {"type": "ValueError", "message": "..."}}
+
+Processes, scan sessions and freezes a client opens belong to its
+connection and are closed when it disconnects.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import psutil
+
+from process_index import get_process_index
+from scheduling import set_priority_class
+
+try:
+    from memory_editor import MemoryEditor
+    from memory_freezer import DEFAULT_FREEZE_INTERVAL, FrozenEntry, MemoryFreezer
+    from memory_scanner import ScanSession
+except ImportError:
+    MemoryEditor = None
+
+logger = logging.getLogger(__name__)
+
+IS_WINDOWS = os.name == 'nt'
+
+PROTOCOL_VERSION = 1
+
+if IS_WINDOWS:
+    DEFAULT_ADDRESS = r'\\.\pipe\thalix'
+else:
+    DEFAULT_ADDRESS = os.path.join(os.path.expanduser('~'), '.thalix', 'thalix.sock')
+
+# Threads running blocking requests, shared by all clients
+DEFAULT_WORKERS = 8
+
+# Longest request or reply line
+MAX_LINE = 64 * 1024 * 1024
+
+# Scan hits and freeze results per streamed item
+DEFAULT_STREAM_CHUNK = 4096
+
+# Exception types a client gets back as themselves
+_BUILTIN_ERRORS = {error.__name__: error for error in (
+    ValueError, TypeError, KeyError, LookupError, OSError, PermissionError, ProcessLookupError,
+    FileNotFoundError, TimeoutError)}
+
+
+class RemoteError(RuntimeError):
+    """A server-side error without a matching builtin exception type"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+def _describe_error(error: BaseException) -> dict:
+    """Wire form of an exception; psutil errors become their builtin equivalents"""
+    if isinstance(error, psutil.AccessDenied):
+        return {'type': 'PermissionError', 'message': "Access denied. Run as Administrator"}
+    if isinstance(error, (psutil.NoSuchProcess, psutil.ZombieProcess)):
+        return {'type': 'ProcessLookupError', 'message': "Process not found or terminated"}
+    if isinstance(error, OSError) and error.strerror:
+        return {'type': type(error).__name__, 'message': error.strerror}
+    if isinstance(error, KeyError) and error.args:
+        return {'type': 'KeyError', 'message': str(error.args[0])}
+    return {'type': type(error).__name__, 'message': str(error)}
+
+
+def _raise_remote(error: dict):
+    kind = error.get('type', 'RemoteError')
+    exception = _BUILTIN_ERRORS.get(kind)
+    if exception is None:
+        raise RemoteError(kind, error.get('message', ''))
+    raise exception(error.get('message', ''))
+
+
+class _Connection:
+    """One client and everything it has opened"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.write_lock = asyncio.Lock()
+        self.tasks: Dict[Any, asyncio.Task] = {}
+        self.editors: Dict[int, Any] = {}
+        self.freezers: Dict[int, Any] = {}
+        self.sessions: Dict[int, Any] = {}
+        self.session_locks: Dict[int, asyncio.Lock] = {}
+        self.rules: Dict[int, Any] = {}
+        self.events: Optional[asyncio.Queue] = None
+        self.jobs = set()   # concurrent.futures.Future of blocking calls on the above, until they finish
+
+    async def send(self, message: dict):
+        # One line at a time; drain keeps a slow reader from piling up replies
+        async with self.write_lock:
+            self.writer.write(_encode(message))
+            await self.writer.drain()
+
+    def release(self):
+        """Stop freezes and close sessions and processes (blocking)"""
+        for freezer in self.freezers.values():
+            freezer.stop()
+        for session in self.sessions.values():
+            session.reset()
+            session.results.close()
+        for editor in self.editors.values():
+            editor.close_process()
+        self.freezers = {}
+        self.sessions = {}
+        self.editors = {}
+
+
+class ThalixServer:
+    """
+    Serves the control API
+    daemon: a ThalixDaemon to expose rules and events through; without one
+    only the direct process, scan and freeze requests are available.
+    """
+
+    def __init__(self, daemon=None, address: str = DEFAULT_ADDRESS, workers: int = DEFAULT_WORKERS):
+        self.daemon = daemon
+        self.address = address
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix='thalix-ipc')
+        self._ids = itertools.count(1)
+        self._connections = set()
+        self._server = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = None
+        if daemon is not None:
+            daemon.subscribe(self._on_daemon_event)
+
+    # Lifecycle
+
+    async def start(self):
+        """Start listening; raises OSError when another server owns the address"""
+        self._loop = asyncio.get_running_loop()
+        factory = functools.partial(self._protocol, self._loop)
+        if IS_WINDOWS:
+            self._server = await self._loop.start_serving_pipe(factory, self.address)
+            return
+        self._remove_stale_socket()
+        self._server = await self._loop.create_unix_server(factory, self.address)
+        os.chmod(self.address, 0o600)
+
+    def _protocol(self, loop):
+        reader = asyncio.StreamReader(limit=MAX_LINE, loop=loop)
+        return asyncio.StreamReaderProtocol(reader, self._serve_client, loop=loop)
+
+    def _remove_stale_socket(self):
+        os.makedirs(os.path.dirname(self.address) or '.', exist_ok=True)
+        if not os.path.exists(self.address):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+        except OSError:
+            # Left by a server that is gone
+            os.remove(self.address)
+            return
+        finally:
+            probe.close()
+        raise OSError(f"another Thalix server is listening on {self.address}")
+
+    async def close(self):
+        """Stop listening and drop every client"""
+        if self._server is not None:
+            if IS_WINDOWS:
+                for pipe in self._server:
+                    pipe.close()
+            else:
+                self._server.close()
+                try:
+                    os.remove(self.address)
+                except OSError:
+                    pass
+            self._server = None
+        for connection in list(self._connections):
+            connection.writer.close()
+            for task in list(connection.tasks.values()):
+                task.cancel()
+
+    def start_background(self):
+        """Run the server on its own event loop thread (for the GUI and the daemon)"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self.close())
+                loop.run_until_complete(asyncio.sleep(0))
+                loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True, name='thalix-ipc-server')
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread = None
+            raise errors[0]
+        logger.info("IPC server listening on %s", self.address)
+
+    def stop_background(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5.0)
+        self._thread = None
+        self._executor.shutdown(wait=False)
+
+    # Connections
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = _Connection(writer)
+        self._connections.add(connection)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    request_id = request['id']
+                    method = request['method']
+                    params = request.get('params') or {}
+                except (ValueError, KeyError, TypeError) as e:
+                    await connection.send({'id': None, 'error': {'type': 'ValueError',
+                                                                 'message': f"bad request: {e}"}})
+                    continue
+                # Each request is its own task: pipelined requests overlap
+                task = asyncio.ensure_future(self._dispatch(connection, request_id, method, params))
+                connection.tasks[request_id] = task
+                task.add_done_callback(functools.partial(self._forget_task, connection, request_id))
+        finally:
+            self._connections.discard(connection)
+            for task in list(connection.tasks.values()):
+                task.cancel()
+            for rule in connection.rules.values():
+                self.daemon.remove_rule(rule)
+            # Scans of the cancelled requests may still be running: closing their
+            # sessions and process handles (fds that could be reused) must wait
+            jobs = list(connection.jobs)
+            if jobs:
+                await asyncio.wait([asyncio.wrap_future(job, loop=self._loop) for job in jobs])
+            await self._loop.run_in_executor(self._executor, connection.release)
+            writer.close()
+
+    @staticmethod
+    def _forget_task(connection, request_id, task):
+        if connection.tasks.get(request_id) is task:
+            del connection.tasks[request_id]
+
+    async def _dispatch(self, connection: _Connection, request_id, method: str, params: dict):
+        handler = getattr(self, '_rpc_' + method, None) if method.isidentifier() else None
+        try:
+            if handler is None:
+                raise ValueError(f"unknown method {method!r}")
+
+            async def emit(item):
+                await connection.send({'id': request_id, 'item': item})
+
+            result = await handler(connection, emit, **params)
+            await connection.send({'id': request_id, 'result': result})
+        except asyncio.CancelledError:
+            try:
+                await connection.send({'id': request_id, 'error': {'type': 'CancelledError',
+                                                                   'message': "cancelled"}})
+            except (ConnectionError, RuntimeError):
+                pass
+        except (ConnectionError, RuntimeError) as e:
+            if connection.writer.is_closing():
+                return
+            await self._send_error(connection, request_id, e)
+        except Exception as e:
+            await self._send_error(connection, request_id, e)
+
+    async def _send_error(self, connection, request_id, error):
+        if not isinstance(error, (ValueError, TypeError, KeyError, OSError, psutil.Error)):
+            logger.exception("Request %s failed", request_id)
+        try:
+            await connection.send({'id': request_id, 'error': _describe_error(error)})
+        except (ConnectionError, RuntimeError):
+            pass
+
+    def _blocking(self, function: Callable, *args, **kwargs):
+        """Run a blocking call in the shared thread pool"""
+        return self._loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    def _connection_job(self, connection: _Connection, function: Callable, *args, **kwargs):
+        """
+        Run a blocking call on a client's processes or sessions in the thread pool
+        Cancelling the request does not stop a call that already started, so
+        the connection keeps it until it finishes and release() waits for it.
+        """
+        job = self._executor.submit(functools.partial(function, *args, **kwargs))
+        connection.jobs.add(job)
+        job.add_done_callback(connection.jobs.discard)
+        return asyncio.wrap_future(job, loop=self._loop)
+
+    def _on_daemon_event(self, event: dict):
+        """Daemon worker thread: hand the event to the subscribed clients"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._fan_out, event)
+        except RuntimeError:
+            pass
+
+    def _fan_out(self, event: dict):
+        for connection in self._connections:
+            if connection.events is not None:
+                connection.events.put_nowait(event)
+
+    def _require_daemon(self):
+        if self.daemon is None:
+            raise ValueError("this server has no rules engine")
+        return self.daemon
+
+    @staticmethod
+    def _get(table: dict, key, what: str):
+        try:
+            return table[key]
+        except (KeyError, TypeError):
+            raise KeyError(f"no {what} {key}")
+
+    # Requests: general
+
+    async def _rpc_ping(self, connection, emit):
+        return {'version': PROTOCOL_VERSION, 'pid': os.getpid()}
+
+    async def _rpc_cancel(self, connection, emit, request):
+        """Cancel a running request of this client (a stream the caller no longer wants)"""
+        task = connection.tasks.get(request)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def _rpc_processes(self, connection, emit, name=None):
+        """[[pid, name], ...] of every process, or of the processes with a name"""
+        index = get_process_index()
+        if name is not None:
+            processes = await self._blocking(index.find_all, name)
+            return [[process.pid, name] for process in processes]
+        processes = await self._blocking(index.processes)
+        return [[pid, process_name] for process_name, pid in processes]
+
+    # Requests: affinity and priority
+
+    async def _rpc_get_affinity(self, connection, emit, pid):
+        return await self._blocking(lambda: psutil.Process(pid).cpu_affinity())
+
+    async def _rpc_set_affinity(self, connection, emit, pid, cpus):
+        def set_affinity():
+            process = psutil.Process(pid)
+            process.cpu_affinity(cpus)
+            return process.cpu_affinity()
+        return await self._blocking(set_affinity)
+
+    async def _rpc_set_priority(self, connection, emit, pid, priority):
+        await self._blocking(lambda: set_priority_class(psutil.Process(pid), priority))
+        return priority
+
+    # Requests: rules engine
+
+    async def _rpc_apply_rule(self, connection, emit, rule):
+        return self._require_daemon().apply_rule(rule).name
+
+    async def _rpc_add_rule(self, connection, emit, rule, once=False):
+        """Add a session rule; returns its id. It is removed when the client disconnects."""
+        added = self._require_daemon().add_rule(rule, once)
+        rule_id = next(self._ids)
+        connection.rules[rule_id] = added
+        return rule_id
+
+    async def _rpc_remove_rule(self, connection, emit, rule_id):
+        self._require_daemon().remove_rule(self._get(connection.rules, rule_id, "rule"))
+        del connection.rules[rule_id]
+        return True
+
+    async def _rpc_release_exclusive(self, connection, emit, actions=None):
+        daemon = self._require_daemon()
+        if actions is None:
+            daemon.release_exclusive()
+        else:
+            daemon.release_exclusive(actions)
+        return True
+
+    async def _rpc_presets(self, connection, emit):
+        """Saved presets by name"""
+        return self._require_daemon().presets
+
+    async def _rpc_save_preset(self, connection, emit, name, preset):
+        await self._blocking(self._require_daemon().save_preset, name, preset)
+        return True
+
+    async def _rpc_delete_preset(self, connection, emit, name):
+        await self._blocking(self._require_daemon().delete_preset, name)
+        return True
+
+    async def _rpc_events(self, connection, emit):
+        """Stream daemon events until cancelled"""
+        self._require_daemon()
+        if connection.events is not None:
+            raise ValueError("already subscribed")
+        connection.events = asyncio.Queue()
+        try:
+            while True:
+                await emit(await connection.events.get())
+        finally:
+            connection.events = None
+
+    # Requests: memory
+
+    def _require_editor(self):
+        if MemoryEditor is None:
+            raise ValueError("memory editor module not available")
+
+    async def _rpc_open_process(self, connection, emit, pid):
+        """Open a process for scanning and freezing; returns its handle"""
+        self._require_editor()
+        editor = MemoryEditor()
+        if not await self._connection_job(connection, editor.open_process, pid):
+            raise PermissionError(f"cannot open process {pid}")
+        handle = next(self._ids)
+        connection.editors[handle] = editor
+        return handle
+
+    async def _rpc_close_process(self, connection, emit, handle):
+        editor = self._get(connection.editors, handle, "process")
+        freezer = connection.freezers.pop(handle, None)
+        if freezer is not None:
+            freezer.stop()
+        for session_id, session in list(connection.sessions.items()):
+            if session.memory_editor is editor:
+                await self._close_session(connection, session_id)
+        del connection.editors[handle]
+        await self._connection_job(connection, editor.close_process)
+        return True
+
+    async def _rpc_scan_first(self, connection, emit, handle, value, value_type='int', **options):
+        """Exact value first scan; options as ScanSession.first_scan. Returns {session, count}"""
+        session = ScanSession(self._get(connection.editors, handle, "process"), value_type)
+        session_id = next(self._ids)
+        lock = asyncio.Lock()
+        connection.sessions[session_id] = session
+        connection.session_locks[session_id] = lock
+        async with lock:
+            count = await self._connection_job(connection, session.first_scan, value, **options)
+        return {'session': session_id, 'count': count}
+
+    async def _rpc_scan_unknown(self, connection, emit, handle, value_type='int', **options):
+        """Unknown initial value scan; options as ScanSession.first_scan_unknown"""
+        session = ScanSession(self._get(connection.editors, handle, "process"), value_type)
+        session_id = next(self._ids)
+        lock = asyncio.Lock()
+        connection.sessions[session_id] = session
+        connection.session_locks[session_id] = lock
+        async with lock:
+            count = await self._connection_job(connection, session.first_scan_unknown, **options)
+        return {'session': session_id, 'count': count}
+
+    async def _rpc_scan_next(self, connection, emit, session, predicate, value=None, value2=None):
+        scan = self._get(connection.sessions, session, "scan session")
+        # Scans of one session run one after the other; other sessions aren't held up
+        async with connection.session_locks[session]:
+            return await self._connection_job(connection, scan.next_scan, predicate, value, value2)
+
+    async def _rpc_scan_results(self, connection, emit, session, start=0, count=None,
+                                chunk=DEFAULT_STREAM_CHUNK):
+        """Stream [addresses, values] chunks of a session's hits; returns how many were sent"""
+        scan = self._get(connection.sessions, session, "scan session")
+        if scan.snapshot is not None:
+            raise ValueError("an unknown value scan has no hits until the next scan")
+        chunk = max(1, int(chunk))
+        sent = 0
+        async with connection.session_locks[session]:
+            stop = len(scan.results) if count is None else min(len(scan.results), start + count)
+            for position in range(start, stop, chunk):
+                addresses, values = await self._connection_job(connection, scan.results.page, position,
+                                                               min(chunk, stop - position))
+                await emit([addresses.tolist(), values.tolist() if values is not None else None])
+                sent += len(addresses)
+        return sent
+
+    async def _rpc_scan_close(self, connection, emit, session):
+        self._get(connection.sessions, session, "scan session")
+        await self._close_session(connection, session)
+        return True
+
+    async def _close_session(self, connection, session_id):
+        session = connection.sessions.pop(session_id)
+        async with connection.session_locks.pop(session_id):
+            await self._connection_job(connection, session.reset)
+            await self._connection_job(connection, session.results.close)
+
+    async def _rpc_freeze(self, connection, emit, handle, entries, chunk=DEFAULT_STREAM_CHUNK):
+        """
+        Freeze a batch of {address, value, value_type, interval, read_compare} entries
+        Streams [[address, error or null], ...] chunks in entry order and
+        returns the number frozen. All good entries start with one registry update.
+        """
+        editor = self._get(connection.editors, handle, "process")
+        frozen = []
+        outcomes = []
+        for data in entries:
+            try:
+                entry = FrozenEntry(int(data['address']), data['value'], data.get('value_type', 'int'),
+                                    data.get('interval', DEFAULT_FREEZE_INTERVAL),
+                                    bool(data.get('read_compare', False)))
+            except (KeyError, TypeError, ValueError, struct.error) as e:
+                outcomes.append([data.get('address') if isinstance(data, dict) else None, str(e)])
+                continue
+            frozen.append(entry)
+            outcomes.append([entry.address, None])
+
+        freezer = connection.freezers.get(handle)
+        if freezer is None:
+            freezer = connection.freezers[handle] = MemoryFreezer(editor)
+        freezer.add_frozen_entries(frozen)
+        freezer.start()
+        chunk = max(1, int(chunk))
+        for position in range(0, len(outcomes), chunk):
+            await emit(outcomes[position:position + chunk])
+        return len(frozen)
+
+    async def _rpc_unfreeze(self, connection, emit, handle, addresses=None):
+        """Stop freezing the given addresses (all of them when None); returns how many are left"""
+        freezer = connection.freezers.get(handle)
+        if freezer is None:
+            return 0
+        if addresses is None:
+            addresses = list(freezer.frozen_addresses)
+        freezer.remove_frozen_addresses(addresses)
+        if not freezer.frozen_addresses:
+            freezer.stop()
+        return len(freezer.frozen_addresses)
+
+    async def _rpc_freeze_stats(self, connection, emit, handle):
+        freezer = connection.freezers.get(handle)
+        if freezer is None:
+            return None
+        return await self._connection_job(connection, freezer.get_total_stats)
+
+
+class ThalixClient:
+    """
+    Asyncio client; requests may be issued concurrently and are pipelined
+
+        async with ThalixClient() as client:
+            cpus, handle = await asyncio.gather(client.call('set_affinity', pid=pid, cpus=[2, 3]),
+                                                client.call('open_process', pid=pid))
+            async for addresses, values in client.stream('scan_results', session=session):
+                ...
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS):
+        self.address = address
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._streams: Dict[int, asyncio.Queue] = {}
+        self._reader_task = None
+
+    async def connect(self):
+        """Raises OSError when no server is listening"""
+        loop = asyncio.get_running_loop()
+        if IS_WINDOWS:
+            reader = asyncio.StreamReader(limit=MAX_LINE, loop=loop)
+            protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+            transport, _ = await loop.create_pipe_connection(lambda: protocol, self.address)
+            self._reader = reader
+            self._writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        else:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.address, limit=MAX_LINE)
+        self._reader_task = asyncio.ensure_future(self._read_replies())
+        return self
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def call(self, method: str, **params) -> Any:
+        """Send a request and wait for its result; items of a streaming request are dropped"""
+        request_id, future = self._send(method, params)
+        return await future
+
+    async def stream(self, method: str, **params) -> AsyncIterator[Any]:
+        """Send a streaming request and yield its items; the final result ends the stream"""
+        request_id, future = self._send(method, params)
+        items = self._streams[request_id] = asyncio.Queue()
+        finished = False
+        try:
+            while True:
+                getter = asyncio.ensure_future(items.get())
+                await asyncio.wait([getter, future], return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                while not items.empty():
+                    yield items.get_nowait()
+                finished = True
+                # Raises if the request failed
+                future.result()
+                return
+        finally:
+            self._streams.pop(request_id, None)
+            if not finished and not future.done() and self._writer is not None:
+                # Abandoned early: stop the server's work too. Nobody waits for either reply.
+                self._pending.pop(request_id, None)
+                self._writer.write(_encode({'id': next(self._ids), 'method': 'cancel',
+                                            'params': {'request': request_id}}))
+
+    def _send(self, method: str, params: dict):
+        if self._writer is None:
+            raise ConnectionError("not connected")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(_encode({'id': request_id, 'method': method, 'params': params}))
+        return request_id, future
+
+    async def _read_replies(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                request_id = reply.get('id')
+                if 'item' in reply:
+                    items = self._streams.get(request_id)
+                    if items is not None:
+                        items.put_nowait(reply['item'])
+                    continue
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if 'error' in reply:
+                    try:
+                        _raise_remote(reply['error'])
+                    except Exception as e:
+                        future.set_exception(e)
+                else:
+                    future.set_result(reply.get('result'))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("connection to the Thalix server lost"))
+            self._pending = {}
+
+
+class BlockingClient:
+    """
+    Thread-safe synchronous client for scripts and the GUI
+    The connection lives on a private event loop thread. call() blocks,
+    submit() returns a concurrent.futures.Future so requests can be
+    pipelined, and stream() is a plain iterator.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: Optional[float] = 30.0):
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name='thalix-ipc-client')
+        self._thread.start()
+        self._client = ThalixClient(address)
+        try:
+            self._run(self._client.connect()).result(timeout)
+        except BaseException:
+            self._stop_loop()
+            raise
+
+    def _run(self, coroutine) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def submit(self, method: str, **params) -> concurrent.futures.Future:
+        return self._run(self._client.call(method, **params))
+
+    def call(self, method: str, **params) -> Any:
+        return self.submit(method, **params).result(self.timeout)
+
+    def stream(self, method: str, **params):
+        """Yield the items of a streaming request as they arrive"""
+        iterator = self._client.stream(method, **params)
+        try:
+            while True:
+                try:
+                    yield self._run(iterator.__anext__()).result(self.timeout)
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(iterator.aclose()).result(self.timeout)
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._run(self._client.close()).result(self.timeout)
+        self._stop_loop()
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5.0)
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def server_running(address: str = DEFAULT_ADDRESS, timeout: float = 2.0) -> bool:
+    """True when a Thalix server answers on the address"""
+    try:
+        with BlockingClient(address, timeout) as client:
+            client.call('ping')
+    except (OSError, RemoteError):
+        return False
+    return True
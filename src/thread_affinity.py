@@ -0,0 +1,295 @@
+"""
+Thread Affinity - per-thread CPU pinning for a target process
+Applies affinity to every thread (TID) of the target instead of only the
+process mask, with optional rules giving named threads or the heaviest
+threads their own cores. While enforcing, each cycle only diffs the TID set
+and pins new threads; every few cycles a full pass re-reads names, re-ranks
+CPU usage and repairs threads that changed their own affinity.
+"""
+
+import ctypes
+from ctypes import wintypes
+import fnmatch
+import os
+import threading
+
+import psutil
+
+IS_WINDOWS = os.name == 'nt'
+
+THREAD_SET_INFORMATION = 0x0020
+THREAD_QUERY_LIMITED_INFORMATION = 0x1000
+
+# Seconds between enforcement cycles
+DEFAULT_ENFORCE_INTERVAL = 0.25
+
+# Cycles between full passes
+VERIFY_EVERY = 8
+
+if IS_WINDOWS:
+    _kernel32 = ctypes.windll.kernel32
+    _kernel32.OpenThread.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    _kernel32.OpenThread.restype = wintypes.HANDLE
+    _kernel32.SetThreadAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+    _kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    # Thread names exist from Windows 10 1607 on
+    _GetThreadDescription = getattr(_kernel32, 'GetThreadDescription', None)
+    if _GetThreadDescription is not None:
+        _GetThreadDescription.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.LPWSTR)]
+        _GetThreadDescription.restype = ctypes.c_long
+
+
+def parse_cpu_list(text):
+    """CPU numbers from a list like "0-3,6" """
+    cpus = set()
+    for part in text.strip().replace(' ', '').split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus):
+    """CPU list text like "0-3,6" """
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+class ThreadRule:
+    """Core set for threads picked by name pattern, or for the N heaviest threads"""
+
+    __slots__ = ('cpus', 'pattern', 'heaviest')
+
+    def __init__(self, cpus, pattern=None, heaviest=0):
+        self.cpus = sorted(cpus)
+        self.pattern = pattern.lower() if pattern else None
+        self.heaviest = heaviest
+
+    def matches_name(self, name):
+        return self.pattern is not None and fnmatch.fnmatchcase(name.lower(), self.pattern)
+
+    def __repr__(self):
+        target = f"heaviest:{self.heaviest}" if self.heaviest else self.pattern
+        return f"ThreadRule({target} -> {self.cpus})"
+
+
+def parse_thread_rules(text):
+    """
+    Rules from text like "RenderThread*=2,3; heaviest:1=4-5"
+    Each rule is <name pattern>=<cpus> or heaviest:<count>=<cpus>; patterns
+    are case-insensitive globs matched against the thread name.
+    """
+    rules = []
+    for item in text.split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        target, sep, cpu_text = item.rpartition('=')
+        target = target.strip()
+        if not sep or not target:
+            raise ValueError(f"Invalid thread rule: {item!r}")
+        cpus = parse_cpu_list(cpu_text)
+        if not cpus:
+            raise ValueError(f"Thread rule without CPUs: {item!r}")
+        if target.lower().startswith('heaviest:'):
+            rules.append(ThreadRule(cpus, heaviest=int(target.split(':', 1)[1])))
+        else:
+            rules.append(ThreadRule(cpus, pattern=target))
+    return rules
+
+
+def list_thread_ids(pid):
+    """TIDs of a process, or None if it is gone"""
+    if not IS_WINDOWS:
+        try:
+            return {int(tid) for tid in os.listdir(f"/proc/{pid}/task")}
+        except OSError:
+            return None
+    try:
+        return {thread.id for thread in psutil.Process(pid).threads()}
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+
+def get_thread_name(pid, tid):
+    """Thread name ('' if unknown)"""
+    if not IS_WINDOWS:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/comm", 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+    if _GetThreadDescription is None:
+        return ''
+    handle = _kernel32.OpenThread(THREAD_QUERY_LIMITED_INFORMATION, False, tid)
+    if not handle:
+        return ''
+    try:
+        description = wintypes.LPWSTR()
+        if _GetThreadDescription(handle, ctypes.byref(description)) < 0:
+            return ''
+        name = description.value or ''
+        _kernel32.LocalFree(description)
+        return name
+    finally:
+        _kernel32.CloseHandle(handle)
+
+
+def set_thread_affinity(tid, cpus):
+    """Pin one thread; False if it is gone or access was denied"""
+    if not IS_WINDOWS:
+        try:
+            os.sched_setaffinity(tid, cpus)
+            return True
+        except OSError:
+            return False
+    handle = _kernel32.OpenThread(THREAD_SET_INFORMATION | THREAD_QUERY_LIMITED_INFORMATION, False, tid)
+    if not handle:
+        return False
+    try:
+        mask = sum(1 << cpu for cpu in cpus)
+        return _kernel32.SetThreadAffinityMask(handle, mask) != 0
+    finally:
+        _kernel32.CloseHandle(handle)
+
+
+def get_thread_affinity(tid):
+    """Current CPUs of a thread, or None where it can't be read (Windows, gone)"""
+    if IS_WINDOWS:
+        return None
+    try:
+        return sorted(os.sched_getaffinity(tid))
+    except OSError:
+        return None
+
+
+class ThreadAffinityManager:
+    """Pins every thread of a process and keeps new threads pinned"""
+
+    def __init__(self, pid, cpus, rules=(), interval=DEFAULT_ENFORCE_INTERVAL):
+        self.pid = pid
+        self.cpus = sorted(cpus)
+        self.rules = list(rules)
+        self.interval = interval
+        self.applied = {}      # tid -> cpus last applied
+        self.names = {}        # tid -> thread name
+        self.heavy = {}        # tid -> cpus from a heaviest rule
+        self.failures = 0
+        self.cycles = 0
+        self.running = False
+        self._cpu_times = {}   # tid -> CPU seconds at the last full pass
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def applied_masks(self):
+        """Copy of {tid: cpus} as last applied, safe to take from other threads"""
+        with self._lock:
+            return dict(self.applied)
+
+    def target_cpus(self, tid):
+        """CPUs a thread should run on: first matching named rule, then heaviest, then default"""
+        name = self.names.get(tid, '')
+        for rule in self.rules:
+            if rule.matches_name(name):
+                return rule.cpus
+        return self.heavy.get(tid, self.cpus)
+
+    def apply(self):
+        """Full pass over every thread; False if the process is gone"""
+        return self.enforce(full=True)
+
+    def enforce(self, full=False):
+        """One cycle: pin new threads, and on full passes re-check all of them"""
+        with self._lock:
+            return self._enforce(full)
+
+    def _enforce(self, full):
+        tids = list_thread_ids(self.pid)
+        if tids is None:
+            return False
+        known = self.applied.keys()
+        for tid in known - tids:
+            del self.applied[tid]
+            self.names.pop(tid, None)
+            self.heavy.pop(tid, None)
+            self._cpu_times.pop(tid, None)
+
+        full = full or self.cycles % VERIFY_EVERY == 0
+        self.cycles += 1
+        if full:
+            for tid in tids:
+                self.names[tid] = get_thread_name(self.pid, tid)
+            self._rank_heaviest()
+            pending = tids
+        else:
+            pending = tids - known
+            for tid in pending:
+                self.names[tid] = get_thread_name(self.pid, tid)
+
+        for tid in pending:
+            cpus = self.target_cpus(tid)
+            if not full or self.applied.get(tid) != cpus or get_thread_affinity(tid) != cpus:
+                if set_thread_affinity(tid, cpus):
+                    self.applied[tid] = cpus
+                else:
+                    self.failures += 1
+                    # Still record it so a denied thread isn't retried every cycle
+                    self.applied.setdefault(tid, None)
+        return True
+
+    def _rank_heaviest(self):
+        """Give the heaviest-rule CPUs to the threads that used the most CPU since the last pass"""
+        wanted = [rule for rule in self.rules if rule.heaviest]
+        if not wanted:
+            return
+        try:
+            threads = psutil.Process(self.pid).threads()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        usage = []
+        times = {}
+        for thread in threads:
+            total = thread.user_time + thread.system_time
+            times[thread.id] = total
+            if not any(rule.matches_name(self.names.get(thread.id, '')) for rule in self.rules):
+                usage.append((total - self._cpu_times.get(thread.id, 0.0), thread.id))
+        self._cpu_times = times
+        usage.sort(reverse=True)
+
+        self.heavy = {}
+        position = 0
+        for rule in wanted:
+            for _, tid in usage[position:position + rule.heaviest]:
+                self.heavy[tid] = rule.cpus
+            position += rule.heaviest
+
+    def start(self):
+        """Pin all threads now and keep enforcing in the background"""
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.apply()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+
+    def _run(self):
+        while self.running and not self._stop.wait(self.interval):
+            if not self.enforce():
+                # Target exited
+                self.running = False
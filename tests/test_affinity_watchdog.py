@@ -0,0 +1,39 @@
+import os
+
+import affinity_watchdog
+from affinity_watchdog import AffinityWatchdog
+
+
+def run_checks(watchdog, count):
+    events = []
+    for _ in range(count):
+        for entry in watchdog._watched.values():
+            entry.due = 0.0
+        events.extend(watchdog.check())
+    return events
+
+
+def test_unrepairable_drift_is_reported_once_and_backs_off(monkeypatch):
+    found = {'cpus': frozenset({0, 1})}
+    monkeypatch.setattr(affinity_watchdog, '_read_cpus', lambda tid: found['cpus'])
+    monkeypatch.setattr(AffinityWatchdog, '_set_cpus', staticmethod(lambda pid, cpus: False))
+    watchdog = AffinityWatchdog(min_interval=0.1, max_interval=2.0)
+    watchdog.watch(os.getpid(), cpus=[2, 3])
+
+    events = run_checks(watchdog, 10)
+    assert len(events) == 1 and not events[0].repaired
+    assert watchdog._watched[os.getpid()].interval == 2.0
+
+    # A different wrong mask is news again
+    found['cpus'] = frozenset({0})
+    assert len(run_checks(watchdog, 3)) == 1
+
+
+def test_repaired_drift_is_reported_every_time(monkeypatch):
+    monkeypatch.setattr(affinity_watchdog, '_read_cpus', lambda tid: frozenset({0, 1}))
+    monkeypatch.setattr(AffinityWatchdog, '_set_cpus', staticmethod(lambda pid, cpus: True))
+    watchdog = AffinityWatchdog(min_interval=0.1, max_interval=2.0)
+    watchdog.watch(os.getpid(), cpus=[2, 3])
+
+    assert len(run_checks(watchdog, 3)) == 3
+    assert watchdog._watched[os.getpid()].interval == 0.1
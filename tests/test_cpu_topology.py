@@ -0,0 +1,29 @@
+from cpu_topology import CpuTopology, LogicalCpu
+
+
+def two_ccx(cores_per_ccx=4, smt=False):
+    """Two L3 domains of equal cores; CPU n + cores is the SMT sibling of CPU n"""
+    total = 2 * cores_per_ccx
+    cpus = []
+    for core in range(total):
+        domain = 0 if core < cores_per_ccx else cores_per_ccx
+        cpus.append(LogicalCpu(core, core, cache_domain=domain))
+        if smt:
+            cpus.append(LogicalCpu(core + total, core, cache_domain=domain, smt_index=1))
+    return CpuTopology(cpus)
+
+
+def test_game_preset_prefers_the_cache_domain_without_cpu_0():
+    assert two_ccx().preset('game') == [4, 5, 6, 7]
+    assert two_ccx(smt=True).preset('game') == [4, 5, 6, 7]
+
+
+def test_best_cache_domain_counts_core_0_unless_excluded():
+    topology = two_ccx()
+    assert topology.best_cache_domain() == 0
+    assert topology.best_cache_domain(exclude_first_core=True) == 4
+
+
+def test_game_preset_keeps_core_0_domain_when_it_is_still_larger():
+    cpus = [LogicalCpu(cpu, cpu, cache_domain=0 if cpu < 6 else 6) for cpu in range(8)]
+    assert CpuTopology(cpus).preset('game') == [1, 2, 3, 4, 5]
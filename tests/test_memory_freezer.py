@@ -0,0 +1,160 @@
+import random
+import struct
+import threading
+import time
+
+from memory_freezer import MemoryFreezer
+
+
+class FakeEditor:
+    """Flat byte memory that records every write"""
+
+    def __init__(self, size=0x1000):
+        self.memory = bytearray(size)
+        self.writes = []
+        self.lock = threading.Lock()
+
+    def read_memory(self, address, size):
+        with self.lock:
+            return bytes(self.memory[address:address + size])
+
+    def write_memory(self, address, data):
+        with self.lock:
+            self.memory[address:address + len(data)] = data
+            self.writes.append((address, bytes(data)))
+        return True
+
+    def read_int(self, address):
+        return struct.unpack('<i', self.read_memory(address, 4))[0]
+
+    def written_to(self, address):
+        with self.lock:
+            return [data for written, data in self.writes if written == address]
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+def test_publish_during_freeze_loop():
+    editor = FakeEditor()
+    freezer = MemoryFreezer(editor)
+    freezer.add_frozen_address(0x100, 7, 'int', interval=0.01)
+    freezer.start()
+    try:
+        assert wait_for(lambda: editor.read_int(0x100) == 7)
+
+        # Added while the loop is waiting on the first entry's deadline
+        freezer.add_frozen_address(0x200, 9, 'int', interval=10.0)
+        assert wait_for(lambda: editor.read_int(0x200) == 9)
+
+        # Replaced: the new value wins and the old entry leaves the heap
+        freezer.add_frozen_address(0x100, 8, 'int', interval=0.01)
+        assert wait_for(lambda: editor.read_int(0x100) == 8)
+        editor.memory[0x100:0x104] = struct.pack('<i', 0)
+        assert wait_for(lambda: editor.read_int(0x100) == 8)
+
+        # Removed: no more writes after the removal has been picked up
+        freezer.remove_frozen_address(0x100)
+        time.sleep(0.05)
+        count = len(editor.written_to(0x100))
+        time.sleep(0.1)
+        assert len(editor.written_to(0x100)) == count
+        assert list(freezer.frozen_addresses) == [0x200]
+    finally:
+        freezer.stop()
+
+
+def test_registry_is_replaced_not_mutated():
+    freezer = MemoryFreezer(FakeEditor())
+    before = freezer.frozen_addresses
+    freezer.add_frozen_address(0x10, 1, 'int')
+    assert len(before) == 0
+    assert list(freezer.frozen_addresses) == [0x10]
+
+
+class FlakyChain:
+    """Pointer chain whose first resolve raises"""
+
+    def __init__(self, address):
+        self.address = address
+        self.calls = 0
+
+    def resolve(self, now=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("dictionary changed size during iteration")
+        return self.address
+
+    def invalidate(self):
+        pass
+
+
+def test_freeze_loop_survives_a_failing_pass():
+    editor = FakeEditor()
+    freezer = MemoryFreezer(editor)
+    chain = FlakyChain(0x300)
+    freezer.add_frozen_address(0x300, 5, 'int', interval=0.01, chain=chain)
+    freezer.start()
+    try:
+        assert wait_for(lambda: editor.read_int(0x300) == 5)
+        assert freezer._thread.is_alive()
+    finally:
+        freezer.stop()
+
+
+def test_concurrent_writers_lose_no_updates():
+    editor = FakeEditor(0x2000)
+    freezer = MemoryFreezer(editor)
+    freezer.start()
+    writers = 4
+    slots = 64
+    expected = [dict() for _ in range(writers)]
+
+    def writer(number):
+        # Each writer owns its own addresses, 8 bytes apart so no writes coalesce
+        rng = random.Random(number)
+        owned = expected[number]
+        for step in range(2000):
+            address = 0x100 + (number * slots + rng.randrange(slots)) * 8
+            if rng.random() < 0.4:
+                freezer.remove_frozen_address(address)
+                owned.pop(address, None)
+            elif rng.random() < 0.5:
+                batch = [0x100 + (number * slots + rng.randrange(slots)) * 8 for _ in range(3)]
+                freezer.remove_frozen_addresses(batch)
+                for removed in batch:
+                    owned.pop(removed, None)
+            else:
+                value = number * 100000 + step
+                freezer.add_frozen_address(address, value, 'int', interval=0.002)
+                owned[address] = value
+
+    threads = [threading.Thread(target=writer, args=(number,)) for number in range(writers)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        final = {address: value for owned in expected for address, value in owned.items()}
+        registry = freezer.frozen_addresses
+        assert set(registry) == set(final)
+        assert all(registry[address].value == value for address, value in final.items())
+
+        # Every live entry converges on its last value
+        assert wait_for(lambda: all(editor.read_int(address) == value for address, value in final.items()))
+
+        # Removed addresses get no writes once the loop has seen the last registry
+        time.sleep(0.05)
+        removed = [0x100 + slot * 8 for slot in range(writers * slots) if 0x100 + slot * 8 not in final]
+        counts = {address: len(editor.written_to(address)) for address in removed}
+        time.sleep(0.1)
+        assert {address: len(editor.written_to(address)) for address in removed} == counts
+    finally:
+        freezer.stop()
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from memory_editor import BufferPool, MemoryEditor, MemoryRegion
+from memory_scanner import ScanSession, read_values
+from parallel_scan import parallel_scan
+
+HOLE_START = 0x1000
+HOLE_END = 0x2000
+
+# Above the Linux pid_max limit, so /proc/<pid>/mem never opens
+UNOPENABLE_PID = 0x7fffffff
+
+
+class HoleEditor:
+    """Memory where every byte reads as its address & 0xff, except an unmapped hole"""
+
+    def __init__(self, all_or_nothing=False, block_size=0x4000):
+        self.buffer_pool = BufferPool(block_size)
+        self.all_or_nothing = all_or_nothing
+        self.reads = []
+
+    def read_into(self, address, buffer, size=None):
+        size = len(buffer) if size is None else size
+        self.reads.append((address, size))
+        end = address + size
+        if address < HOLE_END and end > HOLE_START:
+            if self.all_or_nothing or address >= HOLE_START:
+                return 0
+            end = HOLE_START
+        for offset, byte in enumerate(range(address, end)):
+            buffer[offset] = byte & 0xff
+        return end - address
+
+
+def expected_value(address, dtype):
+    return np.frombuffer(bytes((address + i) & 0xff for i in range(dtype.itemsize)), dtype=dtype)[0]
+
+
+@pytest.mark.parametrize('all_or_nothing', [False, True])
+def test_read_values_across_a_hole(all_or_nothing):
+    dtype = np.dtype('<u4')
+    addresses = np.array([0x100, 0x200, 0xffe, 0x1004, 0x1ffe, 0x2000, 0x2100], dtype=np.uint64)
+    editor = HoleEditor(all_or_nothing)
+    values, valid = read_values(editor, addresses, dtype)
+
+    # 0xffe and 0x1ffe straddle the hole's edges
+    assert valid.tolist() == [True, True, False, False, False, True, True]
+    for address, value, ok in zip(addresses.tolist(), values.tolist(), valid.tolist()):
+        if ok:
+            assert value == expected_value(address, dtype)
+    # Candidates after the hole are read together again, not one by one
+    assert editor.reads[-1] == (0x2000, 0x104)
+
+
+def test_read_values_splits_on_large_gaps():
+    dtype = np.dtype('<i8')
+    addresses = np.array([0x10, 0x3000, 0x3000 + 0x20000], dtype=np.uint64)
+    editor = HoleEditor(block_size=0x1000)
+    values, valid = read_values(editor, addresses, dtype)
+    assert valid.all()
+    assert values.tolist() == [expected_value(address, dtype) for address in addresses.tolist()]
+
+
+def test_read_values_empty():
+    values, valid = read_values(HoleEditor(), np.empty(0, dtype=np.uint64), np.dtype('<f4'))
+    assert len(values) == len(valid) == 0
+
+
+def test_parallel_scan_fails_when_workers_cannot_open_the_target():
+    region = MemoryRegion(0x10000, 0x1000, 'rw-', 'private')
+    with pytest.raises(PermissionError):
+        list(parallel_scan(UNOPENABLE_PID, 1, 'int', [region], workers=2))
+
+
+def test_first_scan_falls_back_to_serial_when_workers_cannot_open_the_target(monkeypatch):
+    marker = np.array([0x5ca1ab1e] * 4, dtype=np.int32)
+    start = marker.ctypes.data
+    editor = MemoryEditor()
+    assert editor.open_process(os.getpid())
+    # The forked workers inherit this and fail to open; the session's own handle still reads
+    monkeypatch.setattr(MemoryEditor, 'open_process', lambda self, pid: False)
+    session = ScanSession(editor, 'int')
+    found = session.first_scan(0x5ca1ab1e, start, start + marker.nbytes, workers=2)
+    assert found == 4
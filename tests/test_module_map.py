@@ -0,0 +1,36 @@
+import module_map
+from module_map import ModuleInfo, ModuleMap
+
+
+class ReloadingMap(ModuleMap):
+    """Module map over a scripted module list instead of a live process"""
+
+    def __init__(self):
+        super().__init__(pid=0)
+        self.bases = {'game.dll': 0x10000}
+
+    def _process_start_time(self):
+        return 1
+
+    def _module_signature(self):
+        return tuple(sorted(self.bases.items()))
+
+    def _enumerate(self):
+        return {name: ModuleInfo(name, base, 0x1000) for name, base in self.bases.items()}
+
+
+def test_reloaded_module_is_found_at_its_new_base(monkeypatch):
+    clock = {'now': 100.0}
+    monkeypatch.setattr(module_map.time, 'monotonic', lambda: clock['now'])
+    modules = ReloadingMap()
+    assert modules.base_of('GAME.dll') == 0x10000
+
+    # Unloaded and loaded again elsewhere: trusted until the recheck interval passes
+    modules.bases['game.dll'] = 0x50000
+    assert modules.base_of('game.dll') == 0x10000
+    clock['now'] += module_map.MODULE_RECHECK_INTERVAL
+    assert modules.base_of('game.dll') == 0x50000
+
+    del modules.bases['game.dll']
+    clock['now'] += module_map.MODULE_RECHECK_INTERVAL
+    assert modules.base_of('game.dll') is None
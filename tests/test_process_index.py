@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+import psutil
+import pytest
+
+import process_index
+from process_index import ProcessIndex
+
+# Renames its main thread the way exec changes the name of a freshly forked PID
+RENAMING_CHILD = """
+import ctypes, sys, time
+sys.stdin.readline()
+ctypes.CDLL(None).prctl(15, b'thalix-execd', 0, 0, 0)
+sys.stdout.write('renamed\\n')
+sys.stdout.flush()
+time.sleep(30)
+"""
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="renames through prctl")
+def test_young_process_is_reindexed_under_its_new_name():
+    index = ProcessIndex(max_age=0)
+    child = subprocess.Popen([sys.executable, '-c', RENAMING_CHILD], stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE)
+    try:
+        index.refresh(force=True)
+        assert index.get(child.pid) is not None
+        child.stdin.write(b'go\n')
+        child.stdin.flush()
+        assert child.stdout.readline() == b'renamed\n'
+        assert [process.pid for process in index.find_all('thalix-execd')] == [child.pid]
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_unreadable_pids_are_retried_with_backoff(monkeypatch):
+    pid = os.getpid()
+    denied = {'on': True}
+    real_name = psutil.Process.name
+
+    def name(self):
+        if self.pid == pid and denied['on']:
+            raise psutil.AccessDenied(pid)
+        return real_name(self)
+
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(psutil.Process, 'name', name)
+    monkeypatch.setattr(process_index.time, 'monotonic', lambda: clock['now'])
+    index = ProcessIndex(max_age=0)
+
+    index.refresh(force=True)
+    assert pid not in index.by_pid
+    assert index._unreadable[pid][1] == process_index.UNREADABLE_RETRY
+
+    # Not retried before its delay, then retried with the delay doubled
+    index.refresh(force=True)
+    assert index._unreadable[pid][1] == process_index.UNREADABLE_RETRY
+    clock['now'] += process_index.UNREADABLE_RETRY
+    index.refresh(force=True)
+    assert index._unreadable[pid][1] == 2 * process_index.UNREADABLE_RETRY
+
+    denied['on'] = False
+    clock['now'] += 2 * process_index.UNREADABLE_RETRY
+    index.refresh(force=True)
+    assert pid in index.by_pid and pid not in index._unreadable
@@ -0,0 +1,135 @@
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from process_watcher import (CN_IDX_PROC, CN_VAL_PROC, NLMSG_DONE, PROC_EVENT_COMM, PROC_EVENT_EXEC,
+                             PROC_EVENT_EXIT, NetlinkBackend, ProcDirBackend, ProcessWatcher, _CN_MSG,
+                             _NLMSGHDR, _PROC_EVENT_HEADER)
+
+PROC_EVENT_FORK = 0x00000001
+
+
+def proc_event(what, pid, tgid, payload=b''):
+    """One netlink message carrying a proc connector event, padded like the kernel does"""
+    event = _PROC_EVENT_HEADER.pack(what, 0, 0) + struct.pack('=II', pid, tgid) + payload
+    cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(event), 0) + event
+    message = _NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, 0) + cn_msg
+    return message + bytes(-len(message) % 4)
+
+
+def exec_event(pid, tgid=None):
+    return proc_event(PROC_EVENT_EXEC, pid, pid if tgid is None else tgid)
+
+
+def comm_event(pid, tgid=None, comm=b'game.exe'):
+    return proc_event(PROC_EVENT_COMM, pid, pid if tgid is None else tgid, comm.ljust(16, b'\0'))
+
+
+def test_exec_events_of_main_threads():
+    backend = NetlinkBackend()
+    data = exec_event(100) + exec_event(101, tgid=100) + proc_event(PROC_EVENT_FORK, 5, 5, bytes(8)) + exec_event(200)
+    assert backend._parse(data) == [100, 200]
+
+
+def test_comm_after_exec_is_not_reported_again():
+    backend = NetlinkBackend()
+    assert backend._parse(exec_event(100) + comm_event(100) + comm_event(300)) == [100, 300]
+    # Later renames of either process stay quiet
+    assert backend._parse(comm_event(100) + comm_event(300)) == []
+
+
+def test_exit_forgets_the_pid():
+    backend = NetlinkBackend()
+    backend._parse(exec_event(100))
+    assert backend._parse(proc_event(PROC_EVENT_EXIT, 100, 100, bytes(8)) + comm_event(100)) == [100]
+
+
+def test_truncated_and_malformed_messages():
+    backend = NetlinkBackend()
+    # A message that ends inside the event is skipped
+    length = _NLMSGHDR.size + _CN_MSG.size + 4
+    truncated = _NLMSGHDR.pack(length, NLMSG_DONE, 0, 0, 0) + exec_event(100)[_NLMSGHDR.size:length]
+    assert backend._parse(truncated + exec_event(200)) == [200]
+    # Parsing stops at a length shorter than the header
+    bad = _NLMSGHDR.pack(4, NLMSG_DONE, 0, 0, 0)
+    assert backend._parse(exec_event(300) + bad + exec_event(400)) == [300]
+
+
+# Starts under its interpreter's name, then renames its main thread like a Wine loader
+RENAMING_CHILD = """
+import ctypes, sys, time
+time.sleep(0.3)
+ctypes.CDLL(None).prctl(15, b'thalix-renamed', 0, 0, 0)
+sys.stdout.write('renamed\\n')
+sys.stdout.flush()
+time.sleep(30)
+"""
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="needs /proc")
+def test_watch_all_follows_a_rename_after_start():
+    seen = []
+    renamed = threading.Event()
+
+    def on_start(process):
+        try:
+            name = process.name()
+        except Exception:
+            return
+        if child is not None and process.pid == child.pid:
+            seen.append(name)
+            if name == 'thalix-renamed':
+                renamed.set()
+
+    child = None
+    watcher = ProcessWatcher(ProcDirBackend())
+    watcher.watch_all(on_start, renames=True)
+    try:
+        child = subprocess.Popen([sys.executable, '-c', RENAMING_CHILD], stdout=subprocess.PIPE)
+        assert child.stdout.readline() == b'renamed\n'
+        assert renamed.wait(2.0), seen
+    finally:
+        watcher.stop()
+        if child is not None:
+            child.kill()
+            child.wait()
+
+
+# Poll interval of the diff backend plus scheduling slack on a busy test machine
+START_TO_AFFINITY_BOUND = 0.5
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc') or not hasattr(os, 'sched_setaffinity'),
+                    reason="needs /proc and sched_setaffinity")
+def test_start_to_affinity_latency():
+    cpus = sorted(os.sched_getaffinity(0))[:1]
+    pinned = {}
+    done = threading.Event()
+
+    def on_start(process):
+        # Matched by its unique argument: Popen may not have returned yet
+        if process.cmdline()[1:] == ['10.25'] and not done.is_set():
+            process.cpu_affinity(cpus)
+            pinned['at'] = time.monotonic()
+            done.set()
+
+    child = None
+    watcher = ProcessWatcher(ProcDirBackend())
+    watcher.watch('sleep', on_start, existing=False)
+    try:
+        started = time.monotonic()
+        child = subprocess.Popen(['sleep', '10.25'])
+        assert done.wait(5.0)
+        latency = pinned['at'] - started
+        assert sorted(os.sched_getaffinity(child.pid)) == cpus
+        assert latency < START_TO_AFFINITY_BOUND, f"start to affinity took {latency * 1000:.0f} ms"
+    finally:
+        watcher.stop()
+        if child is not None:
+            child.kill()
+            child.wait()
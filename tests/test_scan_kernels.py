@@ -0,0 +1,64 @@
+import random
+import struct
+
+import numpy as np
+import pytest
+
+from scan_kernels import VALUE_TYPES, find_value, strided_view
+
+
+def reference_find(block, value, value_type, base_address=0, alignment=None, stride=None, limit=None):
+    """Byte-for-byte search, one position at a time"""
+    fmt = VALUE_TYPES[value_type][0]
+    size = struct.calcsize(fmt)
+    packed = struct.pack(fmt, value)
+    alignment = alignment or size
+    stride = stride or alignment
+    limit = len(block) if limit is None else min(limit, len(block))
+    offset = (-base_address) % alignment
+    hits = []
+    while offset < limit and offset + size <= len(block):
+        if bytes(block[offset:offset + size]) == packed:
+            hits.append(offset)
+        offset += stride
+    return hits
+
+
+def make_block(value, value_type, length, seed):
+    """Random bytes with the value planted at aligned and unaligned offsets"""
+    rng = random.Random(seed)
+    block = bytearray(rng.getrandbits(8) for _ in range(length))
+    packed = struct.pack(VALUE_TYPES[value_type][0], value)
+    for _ in range(40):
+        offset = rng.randrange(0, length - len(packed) + 1)
+        block[offset:offset + len(packed)] = packed
+    block[-len(packed):] = packed
+    return block
+
+
+@pytest.mark.parametrize('value_type, value', [
+    ('int', 12345), ('int', -1), ('long', 2 ** 40 + 7), ('float', 1.5), ('double', -0.25),
+])
+@pytest.mark.parametrize('base_address', [0x10000, 0x10003])
+@pytest.mark.parametrize('alignment, stride, limit', [
+    (None, None, None), (1, None, None), (2, 6, None), (None, None, 1000), (1, 3, 517),
+])
+def test_find_value_matches_reference(value_type, value, base_address, alignment, stride, limit):
+    block = make_block(value, value_type, 4099, seed=f"{value_type}-{base_address}")
+    found = find_value(block, value, value_type, base_address, alignment, stride, limit)
+    assert found.tolist() == reference_find(block, value, value_type, base_address, alignment, stride, limit)
+
+
+def test_find_value_compares_float_bits():
+    block = bytearray(struct.pack('<4f', 0.0, -0.0, float('nan'), 0.0))
+    assert find_value(block, 0.0, 'float').tolist() == [0, 12]
+    assert find_value(block, -0.0, 'float').tolist() == [4]
+
+
+def test_strided_view_has_no_partial_tail():
+    block = bytearray(range(10))
+    array, first, stride = strided_view(block, np.dtype('<u4'), base_address=1, alignment=2)
+    assert (first, stride) == (1, 2)
+    # Offsets 1, 3 and 5 fit a 4-byte value in 10 bytes, 7 does not
+    assert len(array) == 3
+    assert array[1] == int.from_bytes(block[3:7], 'little')
@@ -0,0 +1,24 @@
+import threading
+import time
+
+from thalix_daemon import ThalixDaemon
+
+
+def test_housekeeping_runs_under_steady_process_churn(tmp_path):
+    daemon = ThalixDaemon(str(tmp_path / 'rules.json'), poll_interval=0.1)
+    runs = []
+    daemon._housekeeping = lambda: runs.append(time.monotonic())
+    daemon.running = True
+    worker = threading.Thread(target=daemon._run)
+    worker.start()
+    try:
+        # A task every 10 ms: the queue is never idle for a whole poll interval
+        deadline = time.monotonic() + 0.6
+        while time.monotonic() < deadline:
+            daemon._queue.put(('process-churn',))
+            time.sleep(0.01)
+    finally:
+        daemon.running = False
+        daemon._queue.put(('stop',))
+        worker.join(5.0)
+    assert len(runs) >= 3
@@ -0,0 +1,44 @@
+import os
+import threading
+import time
+
+from memory_editor import MemoryEditor
+from memory_scanner import ScanSession
+from thalix_ipc import BlockingClient, ThalixServer
+
+
+def test_disconnect_waits_for_running_scans_before_closing(tmp_path, monkeypatch):
+    events = []
+    scanning = threading.Event()
+
+    def slow_scan(self, value, **options):
+        scanning.set()
+        events.append('scan started')
+        time.sleep(0.5)
+        events.append('scan finished')
+        return 0
+
+    close_process = MemoryEditor.close_process
+
+    def closing(self):
+        events.append('process closed')
+        return close_process(self)
+
+    monkeypatch.setattr(ScanSession, 'first_scan', slow_scan)
+    monkeypatch.setattr(MemoryEditor, 'close_process', closing)
+
+    server = ThalixServer(address=str(tmp_path / 'thalix.sock'))
+    server.start_background()
+    try:
+        client = BlockingClient(server.address)
+        handle = client.call('open_process', pid=os.getpid())
+        client.submit('scan_first', handle=handle, value=5)
+        assert scanning.wait(5.0)
+        # Disconnecting cancels the request while its scan keeps running
+        client.close()
+        deadline = time.monotonic() + 5.0
+        while 'process closed' not in events and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.stop_background()
+    assert events == ['scan started', 'scan finished', 'process closed']